@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+#
+#  __main__.py
+"""
+Run the benchmarks and write the results as JSON.
+"""
+#
+#  Copyright © 2021 Dominic Davis-Foster <dominic@davis-foster.co.uk>
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+#  EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+#  MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+#  IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM,
+#  DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+#  OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE
+#  OR OTHER DEALINGS IN THE SOFTWARE.
+#
+
+# stdlib
+import json
+import sys
+from typing import Optional, Sequence, TextIO
+
+# 3rd party
+import click
+
+# this package
+from benchmarks.suite import DEFAULT_SIZES, run_benchmarks
+
+__all__ = ["main"]
+
+
+@click.option(
+		"-o",
+		"--output",
+		type=click.File('w'),
+		default=None,
+		help="Write the results to this file rather than to stdout.",
+		)
+@click.option("-r", "--repeat", type=click.INT, default=5, show_default=True, help="The number of samples to take.")
+@click.option(
+		"-s",
+		"--size",
+		"sizes",
+		type=click.INT,
+		multiple=True,
+		help=f"The number of objects in the inventory. May be given multiple times. Defaults to {DEFAULT_SIZES}.",
+		)
+@click.command()
+def main(sizes: Sequence[int] = (), repeat: int = 5, output: Optional[TextIO] = None) -> None:
+	"""
+	Run the searchdocs benchmarks offline, and print the results as JSON.
+	"""
+
+	results = run_benchmarks(sizes or DEFAULT_SIZES, repeat)
+
+	json.dump(results, output or sys.stdout, indent=2)
+	(output or sys.stdout).write('\n')
+
+
+if __name__ == "__main__":
+	sys.exit(main())
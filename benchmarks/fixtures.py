@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+#
+#  fixtures.py
+"""
+Synthetic inventories, and a local HTTP server to serve them.
+
+These are also used by the test suite, so both build and serve inventories in the same way.
+"""
+#
+#  Copyright © 2021 Dominic Davis-Foster <dominic@davis-foster.co.uk>
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+#  EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+#  MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+#  IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM,
+#  DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+#  OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE
+#  OR OTHER DEALINGS IN THE SOFTWARE.
+#
+
+# stdlib
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, List, Sequence, Tuple
+
+# 3rd party
+import sphobjinv  # type: ignore[import-untyped]
+from apeye.url import URL
+from domdf_python_tools.paths import PathPlus
+
+__all__ = ["DocsServer", "synthetic_objects", "write_objects_inv"]
+
+_SYLLABLES = [
+		"ab", "ac", "ad", "al", "an", "ar", "as", "at", "ba", "be", "ca", "ce", "ch", "co", "da", "de", "di",
+		"do", "el", "en", "er", "es", "fi", "fo", "ge", "ha", "he", "in", "io", "is", "it", "ka", "la", "le",
+		"li", "lo", "ma", "me", "mi", "mo", "na", "ne", "no", "or", "pa", "pe", "po", "ra", "re", "ri", "ro",
+		"sa", "se", "si", "so", "st", "ta", "te", "ti", "to", "tr", "un", "ur", "va", "ve", "wa", "xe", "yo",
+		]
+
+# role, weight
+_ROLES = [("method", 5), ("function", 3), ("attribute", 3), ("class", 2), ("exception", 1), ("data", 1)]
+
+
+def _word(rng: random.Random, syllables: int) -> str:
+	return ''.join(rng.choice(_SYLLABLES) for _ in range(syllables))
+
+
+def synthetic_objects(count: int, seed: int = 0) -> List[Tuple[str, str, str, str]]:
+	"""
+	Generate count objects resembling those in a large Python project's inventory.
+
+	The same count and seed always give the same objects.
+
+	:param count:
+	:param seed:
+
+	:returns: A list of (name, domain, role, uri) tuples.
+	"""
+
+	rng = random.Random(seed)
+	roles, weights = zip(*_ROLES)
+
+	packages = [_word(rng, 2) for _ in range(max(1, count // 2000))]
+	modules = [f"{rng.choice(packages)}.{_word(rng, rng.randint(2, 3))}" for _ in range(max(1, count // 40))]
+
+	objects = [(module, "py", "module", f"{module.replace('.', '/')}.html#module-$") for module in modules]
+	seen = {obj[0] for obj in objects}
+
+	while len(objects) < count:
+		module = rng.choice(modules)
+		role = rng.choices(roles, weights)[0]
+
+		if role in {"method", "attribute"}:
+			name = f"{module}.{_word(rng, 3).capitalize()}.{_word(rng, rng.randint(2, 4))}"
+		elif role in {"class", "exception"}:
+			name = f"{module}.{_word(rng, rng.randint(2, 4)).capitalize()}"
+		else:
+			name = f"{module}.{_word(rng, rng.randint(2, 4))}"
+
+		if name not in seen:
+			seen.add(name)
+			objects.append((name, "py", role, f"{module.replace('.', '/')}.html#$"))
+
+	return objects[:count]
+
+
+def write_objects_inv(
+		filename: PathPlus,
+		objects: Sequence[Tuple[str, str, str, str]],
+		project: str = "Benchmark",
+		) -> PathPlus:
+	"""
+	Write a compressed Sphinx ``objects.inv`` file containing the given objects.
+
+	:param filename:
+	:param objects: A list of ``(name, domain, role, uri)`` tuples.
+	:param project: The name of the project, written in the file's header.
+	"""
+
+	inventory = sphobjinv.Inventory()
+	inventory.project = project
+	inventory.version = "1.0"
+
+	for name, domain, role, uri in objects:
+		inventory.objects.append(
+				sphobjinv.DataObjStr(name=name, domain=domain, role=role, priority='1', uri=uri, dispname='-')
+				)
+
+	sphobjinv.writebytes(str(filename), sphobjinv.compress(inventory.data_file(contract=True)))
+	return filename
+
+
+class DocsServer:
+	"""
+	Local HTTP server standing in for a documentation site.
+
+	``/`` redirects to ``/3/``, which serves ``objects.inv`` with an ETag
+	and answers conditional requests with ``304 Not Modified``.
+
+	The file is read for each request, and :attr:`~.etag` and :attr:`~.delay` may be changed at any time,
+	to simulate a new version of the documentation or a slow server.
+
+	:param objects_inv: The file to serve as ``/3/objects.inv``.
+	"""
+
+	def __init__(self, objects_inv: PathPlus):
+		self.objects_inv = objects_inv
+
+		#: The ETag sent with ``objects.inv``.
+		self.etag = '"abc123"'
+
+		#: The number of seconds to wait before sending ``objects.inv``.
+		self.delay = 0.0
+
+		#: The method and path of each request received.
+		self.requests: List[Tuple[str, str]] = []
+
+		self.server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler_class())
+		self.url = f"http://127.0.0.1:{self.server.server_address[1]}/"
+		self.docs_url = URL(self.url) / '3'
+
+	def _handler_class(self) -> type:
+		docs_server = self
+
+		class Handler(BaseHTTPRequestHandler):
+
+			protocol_version = "HTTP/1.1"
+
+			def log_message(self, format: str, *args: Any) -> None:  # noqa: A002  # pylint: disable=redefined-builtin
+				pass
+
+			def respond(self, body: bool) -> None:
+				docs_server.requests.append((self.command, self.path))
+
+				if self.path == '/':
+					self.send_response(301)
+					self.send_header("Location", "/3/")
+					self.send_header("Content-Length", '0')
+					self.end_headers()
+				elif self.path == "/3/objects.inv" and self.headers.get("If-None-Match") == docs_server.etag:
+					self.send_response(304)
+					self.send_header("ETag", docs_server.etag)
+					self.end_headers()
+				elif self.path == "/3/objects.inv":
+					time.sleep(docs_server.delay)
+					content = docs_server.objects_inv.read_bytes()
+					self.send_response(200)
+					self.send_header("ETag", docs_server.etag)
+					self.send_header("Content-Length", str(len(content)))
+					self.end_headers()
+					if body:
+						self.wfile.write(content)
+				else:
+					self.send_response(200)
+					self.send_header("Content-Length", '0')
+					self.end_headers()
+
+			def do_HEAD(self) -> None:
+				self.respond(body=False)
+
+			def do_GET(self) -> None:
+				self.respond(body=True)
+
+		return Handler
+
+	def __enter__(self) -> "DocsServer":
+		threading.Thread(target=self.server.serve_forever, args=(0.01, ), daemon=True).start()
+		return self
+
+	def __exit__(self, *args) -> None:
+		self.server.shutdown()
+		self.server.server_close()
@@ -0,0 +1,321 @@
+#!/usr/bin/env python3
+#
+#  suite.py
+"""
+The benchmarks, and functions to run them.
+
+Each benchmark produces a record such as::
+
+	{"benchmark": "find_url.warm", "size": 15000, "unit": "s", "min": ..., "median": ..., "mean": ..., "samples": 5}
+
+Timings are in seconds, memory use in bytes, and throughput in queries per second.
+"""
+#
+#  Copyright © 2021 Dominic Davis-Foster <dominic@davis-foster.co.uk>
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+#  EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+#  MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+#  IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM,
+#  DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+#  OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE
+#  OR OTHER DEALINGS IN THE SOFTWARE.
+#
+
+# stdlib
+import contextlib
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterator, List, Sequence
+
+# 3rd party
+from domdf_python_tools.paths import PathPlus
+
+# this package
+import searchdocs
+from benchmarks.fixtures import DocsServer, synthetic_objects, write_objects_inv
+from searchdocs.index import InventoryIndex, build_index, process_name
+from searchdocs.interactive import IncrementalSearch
+from searchdocs.results import ResultCache, close_all_result_caches
+
+__all__ = ["DEFAULT_SIZES", "run_benchmarks"]
+
+#: The default inventory sizes to benchmark.
+DEFAULT_SIZES = (1000, 15000, 100000)
+
+Record = Dict[str, Any]
+
+
+def _timing(benchmark: str, size: int, samples: Sequence[float]) -> Record:
+	return {
+			"benchmark": benchmark,
+			"size": size,
+			"unit": 's',
+			"min": min(samples),
+			"median": statistics.median(samples),
+			"mean": statistics.mean(samples),
+			"samples": len(samples),
+			}
+
+
+def _time(func: Callable[[], Any], repeat: int) -> List[float]:
+	samples = []
+
+	for _ in range(repeat):
+		start = time.perf_counter()
+		func()
+		samples.append(time.perf_counter() - start)
+
+	return samples
+
+
+def _throughput(benchmark: str, size: int, func: Callable[[str], Any], queries: Sequence[str]) -> Record:
+	start = time.perf_counter()
+	for query in queries:
+		func(query)
+	elapsed = time.perf_counter() - start
+
+	return {"benchmark": benchmark, "size": size, "unit": "queries/s", "value": len(queries) / elapsed}
+
+
+def _batch_throughput(
+		benchmark: str,
+		size: int,
+		func: Callable[[Sequence[str]], Any],
+		queries: Sequence[str],
+		) -> Record:
+	start = time.perf_counter()
+	func(queries)
+	elapsed = time.perf_counter() - start
+
+	return {"benchmark": benchmark, "size": size, "unit": "queries/s", "value": len(queries) / elapsed}
+
+
+def _peak_memory(benchmark: str, size: int, func: Callable[[], Any]) -> Record:
+	tracemalloc.start()
+	try:
+		result = func()
+		peak = tracemalloc.get_traced_memory()[1]
+	finally:
+		tracemalloc.stop()
+
+	del result
+	return {"benchmark": benchmark, "size": size, "unit": "bytes", "value": peak}
+
+
+@contextlib.contextmanager
+def _cache_dir(directory: PathPlus) -> Iterator[PathPlus]:
+	# Use a separate searchdocs cache, so the user's cache is neither used nor modified.
+
+	previous = searchdocs.__dict__.get("cache_dir")
+	close_all_result_caches()
+	searchdocs.cache_dir_for_url.cache_clear()
+	searchdocs.cache_dir = directory
+
+	try:
+		yield directory
+	finally:
+		close_all_result_caches()
+		searchdocs.cache_dir_for_url.cache_clear()
+		if previous is None:
+			del searchdocs.cache_dir
+		else:
+			searchdocs.cache_dir = previous
+
+
+def _queries(objects: Sequence[Sequence[str]], count: int, seed: int = 1) -> List[str]:
+	# A mixture of exact names, unqualified names and misspellings.
+
+	rng = random.Random(seed)
+	queries = []
+
+	for idx in range(count):
+		name = rng.choice(objects)[0]
+
+		if idx % 3 == 0:
+			queries.append(name)
+		elif idx % 3 == 1:
+			queries.append(name.rpartition('.')[2])
+		else:
+			position = rng.randrange(len(name))
+			queries.append(name[:position] + name[position + 1:])
+
+	return queries
+
+
+def _benchmark_size(size: int, repeat: int, workdir: PathPlus) -> List[Record]:
+	# this package
+	from searchdocs._inventory import Inventory
+	from searchdocs.compact import CompactInventory
+	from searchdocs.search import BACKENDS, SearchEngine
+
+	records = []
+	objects = synthetic_objects(size)
+	objects_inv = write_objects_inv(workdir / f"objects-{size}.inv", objects)
+
+	# Fuzzy scoring every object is slow for large inventories, so fewer queries are used.
+	queries = _queries(objects, max(5, min(200, 200_000 // size)))
+
+	# Parsing and indexing
+	records.append(_timing("parse.sphobjinv", size, _time(lambda: Inventory(objects_inv), repeat)))
+	records.append(_peak_memory("memory.sphobjinv", size, lambda: Inventory(objects_inv)))
+	records.append(_timing("parse.compact", size, _time(lambda: CompactInventory(objects_inv), repeat)))
+	records.append(_peak_memory("memory.compact", size, lambda: CompactInventory(objects_inv)))
+
+	index_file = workdir / f"objects-{size}.idx"
+	records.append(_timing("index.build", size, _time(lambda: build_index(objects_inv, index_file), repeat)))
+
+	def load_index() -> InventoryIndex:
+		index = InventoryIndex(index_file)
+		index.names  # pylint: disable=pointless-statement
+		return index
+
+	records.append(_timing("index.load", size, _time(lambda: load_index().close(), repeat)))
+	records.append(_peak_memory("memory.index", size, load_index))
+
+	# Search throughput
+	inventory = Inventory(objects_inv)
+	records.append(
+			_throughput(
+					"suggest_from_name",
+					size,
+					lambda query: inventory.suggest_from_name(query, limit=1),
+					queries,
+					)
+			)
+	del inventory
+
+	with InventoryIndex(index_file) as index, SearchEngine(index, processes=1) as engine:
+		records.append(_throughput("search_engine.search", size, lambda query: engine.search(query, limit=1), queries))
+
+		# The time taken to update the results after each character of a query is typed.
+		keystroke_samples = []
+		for query in queries[:10]:
+			incremental = IncrementalSearch(engine)
+			for end in range(1, len(query) + 1):
+				keystroke_samples.extend(_time(lambda: incremental.update(query[:end]), 1))
+
+		records.append(_timing("interactive.keystroke", size, keystroke_samples))
+
+	# Scoring every object for one query, in the current process and sharded across worker processes.
+	processed_query = process_name(queries[0])
+	for mode, processes in [("serial", 1), ("parallel", None)]:
+		with InventoryIndex(index_file) as index, SearchEngine(index, processes=processes) as engine:
+			engine.parallel_score_threshold = 0
+			engine.score(processed_query, limit=10)  # Start any worker processes.
+			records.append(
+					_timing(
+							f"search_engine.score.{mode}",
+							size,
+							_time(lambda: engine.score(processed_query, limit=10), repeat),
+							)
+					)
+
+	for backend in BACKENDS:
+		with InventoryIndex(index_file) as index, SearchEngine(index, processes=1, backend=backend) as engine:
+			records.append(
+					_batch_throughput(f"search_engine.best_matches.{backend}", size, engine.best_matches, queries)
+					)
+
+	# Lookups through the local HTTP server
+	with DocsServer(objects_inv) as docs:
+		cold_samples = []
+
+		for idx in range(repeat):
+			with _cache_dir(workdir / f"cold-{size}-{idx}"):
+				start = time.perf_counter()
+				searchdocs.find_url(docs.url, queries[0])
+				cold_samples.append(time.perf_counter() - start)
+
+		records.append(_timing("find_url.cold", size, cold_samples))
+
+		with _cache_dir(workdir / f"warm-{size}"):
+			searchdocs.find_url(docs.url, queries[0])
+
+			uncached = iter(queries[1:] * repeat)
+			records.append(
+					_timing(
+							"find_url.warm_inventory",
+							size,
+							_time(lambda: searchdocs.find_url(docs.url, next(uncached)), min(repeat, len(queries) - 1)),
+							)
+					)
+
+			records.append(
+					_timing("find_url.warm", size, _time(lambda: searchdocs.find_url(docs.url, queries[0]), repeat))
+					)
+
+			records.append(
+					_timing(
+							"download_objects_inv.revalidate",
+							size,
+							_time(lambda: searchdocs.download_objects_inv(docs.url, max_age=0), repeat),
+							)
+					)
+
+	# Result cache lookups
+	result_cache = ResultCache(workdir / f"results-{size}", objects_inv)
+	for query in queries:
+		result_cache.set(query, "https://example.com")
+
+	records.append(_timing("result_cache.memory_hit", size, _time(lambda: result_cache.get(queries[0]), repeat)))
+
+	result_cache.close()
+	result_cache = ResultCache(workdir / f"results-{size}", objects_inv)
+	disk_queries = iter(queries * repeat)
+	records.append(
+			_timing(
+					"result_cache.disk_hit",
+					size,
+					_time(lambda: result_cache.get(next(disk_queries)), min(repeat, len(queries))),
+					)
+			)
+	result_cache.close()
+
+	return records
+
+
+def run_benchmarks(sizes: Sequence[int] = DEFAULT_SIZES, repeat: int = 5) -> Dict[str, Any]:
+	"""
+	Run the benchmarks for inventories of each of the given sizes.
+
+	:param sizes: The numbers of objects in the inventories.
+	:param repeat: The number of times to repeat each timing.
+
+	:returns: A JSON-serialisable mapping containing details of the environment,
+		and a list of records under the ``'results'`` key.
+	"""
+
+	results = []
+
+	with tempfile.TemporaryDirectory() as tmpdir:
+		for size in sizes:
+			workdir = PathPlus(tmpdir) / str(size)
+			workdir.maybe_make()
+			results.extend(_benchmark_size(size, repeat, workdir))
+
+	return {
+			"searchdocs": searchdocs.__version__,
+			"python": sys.version,
+			"implementation": platform.python_implementation(),
+			"platform": platform.platform(),
+			"timestamp": datetime.now(timezone.utc).isoformat(),
+			"repeat": repeat,
+			"results": results,
+			}
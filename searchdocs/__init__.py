@@ -27,29 +27,60 @@ Search the Python documentation from your terminal.
 #
 
 # stdlib
+import contextlib
 import functools
-import re
-import shutil
-import warnings
+import itertools
+import os
+import threading
+import time
 from base64 import urlsafe_b64encode
-from typing import List, Tuple, Union, overload
+from typing import (
+		TYPE_CHECKING,
+		Any,
+		Dict,
+		Iterable,
+		Iterator,
+		List,
+		Mapping,
+		NamedTuple,
+		Optional,
+		Sequence,
+		Tuple,
+		Union
+		)
 
 # 3rd party
-import appdirs
-import diskcache  # type: ignore[import-untyped]
-import sphobjinv  # type: ignore[import-untyped]
-from apeye.requests_url import RequestsURL
 from apeye.url import URL
 from domdf_python_tools.paths import PathPlus
-from fuzzywuzzy.fuzz import ratio  # type: ignore[import-untyped]
-from typing_extensions import Literal
+
+# this package
+from searchdocs._locking import FileLock
+from searchdocs.index import index_filename, load_index, write_index
+from searchdocs.instrumentation import count, span
+from searchdocs.results import ResultCache, get_result_cache
+
+# Importing requests, sphobjinv and fuzzywuzzy takes much longer than a cached lookup,
+# so they are imported only when a download or search requires them.
+if TYPE_CHECKING:
+	# 3rd party
+	import requests
+	from apeye.requests_url import RequestsURL
+
+	# this package
+	from searchdocs._inventory import Inventory
+	from searchdocs.search import Match
 
 __all__ = [
 		"cache_dir",
+		"DEFAULT_MAX_AGE",
 		"resolve_url",
 		"cache_dir_for_url",
 		"download_objects_inv",
 		"find_url",
+		"find_urls",
+		"ObjectNotFoundError",
+		"SearchResult",
+		"search_sites",
 		]
 
 __author__: str = "Dominic Davis-Foster"
@@ -58,19 +89,297 @@ __license__: str = "MIT License"
 __version__: str = "0.2.2"
 __email__: str = "dominic@davis-foster.co.uk"
 
+# The number of search terms :func:`~.find_urls` reads and looks up at a time.
+_BATCH_CHUNK_SIZE = 1000
+
+# The number of bytes of objects.inv read from the network at once.
+_DOWNLOAD_CHUNK_SIZE = 1 << 16
+
+# Serialises updates to ``redirects.json`` between threads.
+# Updates from other processes are serialised by :func:`~._redirects_file_lock`.
+_redirects_lock = threading.Lock()
+
+
+#: The default number of seconds for which redirects and downloaded inventories are considered fresh.
+#: Within this time they are used without contacting the documentation server.
+DEFAULT_MAX_AGE: float = 3600
+
+
 #: Directory in which cached files are stored.
-cache_dir = PathPlus(appdirs.user_cache_dir("searchdocs"))
-cache_dir.maybe_make(parents=True)
+#: It is determined on first use, and created when something is first written to it.
+#:
+#: .. versionchanged:: 0.3.0  The directory is no longer created when :mod:`searchdocs` is imported.
+cache_dir: PathPlus
+
+
+def __getattr__(name: str) -> Any:
+	if name == "cache_dir":
+		# 3rd party
+		import appdirs
+
+		globals()["cache_dir"] = PathPlus(appdirs.user_cache_dir("searchdocs"))
+		return globals()["cache_dir"]
+
+	elif name == "Inventory":
+		# this package
+		from searchdocs._inventory import Inventory
+
+		return Inventory
+
+	raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+class ObjectNotFoundError(ValueError):
+	"""
+	Raised when no object in the inventory matches the search term well enough.
+
+	:param search_term: The search term which was not found.
+	:param suggestions: The names of the objects most similar to ``search_term``, best match first.
 
+	.. versionadded:: 0.3.0
+	"""
+
+	def __init__(self, search_term: str, suggestions: Sequence[str] = ()):
+		#: The search term which was not found.
+		self.search_term: str = search_term
+
+		#: The names of the objects most similar to the search term, best match first.
+		self.suggestions: List[str] = list(suggestions)
+
+		message = f"Object {search_term} not found."
+		if self.suggestions:
+			message += f" Did you mean {', '.join(self.suggestions)}?"
+
+		super().__init__(message)
 
-def resolve_url(url: Union[str, RequestsURL]) -> RequestsURL:
+	def __reduce__(self) -> Tuple[Any, ...]:  # noqa: D105
+		return type(self), (self.search_term, self.suggestions)
+
+
+def _cache_dir() -> PathPlus:
+	# ``cache_dir`` is only set on first use, so is looked up through the module.
+	if "cache_dir" in globals():
+		return globals()["cache_dir"]
+	return __getattr__("cache_dir")
+
+
+def _is_fresh(checked: float, max_age: Optional[float]) -> bool:
+	"""
+	Returns whether data last validated at ``checked`` is still fresh.
+
+	:param checked: The time the data was last validated, in seconds since the epoch.
+	:param max_age: The number of seconds the data remains fresh for, or :py:obj:`None` to never revalidate.
+	"""
+
+	return max_age is None or (time.time() - checked) < max_age
+
+
+def resolve_url(url: Union[str, URL], *, max_age: Optional[float] = DEFAULT_MAX_AGE) -> "RequestsURL":
 	"""
 	Resolve any redirects in the given URL.
 
 	:param url:
+	:param max_age: The number of seconds for which a previously resolved redirect is reused
+		without contacting the server. If :py:obj:`None` a cached redirect is never revalidated.
+		If ``0`` the URL is always resolved.
+
+	.. versionchanged:: 0.3.0  Added the ``max_age`` argument.
+	"""
+
+	# 3rd party
+	from apeye.requests_url import RequestsURL
+
+	resolved_url = RequestsURL(_resolve_url(url, max_age))
+	resolved_url.session = _http_session()
+	return resolved_url
+
+
+def _resolve_url(url: Union[str, URL], max_age: Optional[float]) -> URL:
+	"""
+	Like :func:`~.resolve_url`, but returns a plain :class:`~apeye.url.URL`.
+
+	:mod:`requests` is only imported if the server must be contacted.
+
+	:param url:
+	:param max_age:
+	"""
+
+	with span("resolve_url"):
+		resolved = _cached_redirect(str(url), max_age)
+
+		if resolved is None:
+			count("redirect_cache.miss")
+			resolved = _http_session().head(str(url), allow_redirects=True).url
+			_store_redirect(str(url), resolved)
+		else:
+			count("redirect_cache.hit")
+
+		return URL(resolved)
+
+
+@functools.lru_cache(maxsize=None)
+def _http_session() -> "requests.Session":
+	"""
+	Returns the HTTP session shared by all requests, which keeps connections open between them.
+	"""
+
+	# 3rd party
+	import requests
+
+	return requests.Session()
+
+
+def _cached_redirect(url: str, max_age: Optional[float]) -> Optional[str]:
+	"""
+	Returns the cached resolution of ``url``, or :py:obj:`None` if there is no fresh cached resolution.
+
+	:param url:
+	:param max_age:
+	"""
+
+	redirects_file = _cache_dir() / "redirects.json"
+
+	if redirects_file.is_file():
+		redirects = redirects_file.load_json()
+
+		if url in redirects:
+			resolved, checked = redirects[url]
+			if _is_fresh(checked, max_age):
+				return resolved
+
+	return None
+
+
+def _store_redirect(url: str, resolved: str) -> None:
+	"""
+	Cache the resolution of ``url``.
+
+	:param url:
+	:param resolved:
+	"""
+
+	redirects_file = _cache_dir() / "redirects.json"
+
+	with _redirects_lock, _redirects_file_lock():
+		if redirects_file.is_file():
+			redirects = redirects_file.load_json()
+		else:
+			redirects = {}
+
+		redirects[url] = [resolved, time.time()]
+		_dump_json(redirects_file, redirects)
+
+
+def _redirects_file_lock() -> FileLock:
+	"""
+	Returns the lock which serialises updates to ``redirects.json`` between processes.
+	"""
+
+	return FileLock(_cache_dir() / ".redirects.lock")
+
+
+def _site_lock(docs_cache_dir: PathPlus) -> FileLock:
+	"""
+	Returns the lock which serialises updates to ``docs_cache_dir`` between processes.
+
+	The lock file is kept alongside the directory, so it is not removed with it.
+
+	:param docs_cache_dir:
+	"""
+
+	return FileLock(docs_cache_dir.parent / f".{docs_cache_dir.name}.lock")
+
+
+def _readers_lock(docs_cache_dir: PathPlus, shared: bool = True) -> FileLock:
+	"""
+	Returns the lock held, shared, by processes which read the files in ``docs_cache_dir``.
+
+	The directory is only removed by a process which holds the lock exclusively.
+
+	:param docs_cache_dir:
+	:param shared:
+	"""
+
+	return FileLock(docs_cache_dir.parent / f".{docs_cache_dir.name}.readers.lock", shared=shared)
+
+
+# The readers locks held by this process, which are held until it exits,
+# as the site's result cache and indexes may be kept open until then.
+_sites_in_use: Dict[PathPlus, FileLock] = {}
+_sites_in_use_lock = threading.Lock()
+
+
+def _use_site(docs_cache_dir: PathPlus) -> None:
+	"""
+	Record that this process reads the files in ``docs_cache_dir``, so other processes do not remove them.
+
+	:param docs_cache_dir:
+	"""
+
+	with _sites_in_use_lock:
+		if docs_cache_dir not in _sites_in_use:
+			lock = _readers_lock(docs_cache_dir)
+			lock.acquire()
+			_sites_in_use[docs_cache_dir] = lock
+
+
+def _stop_using_sites() -> None:
+	"""
+	Release the readers locks held by this process.
+	"""
+
+	with _sites_in_use_lock:
+		locks = list(_sites_in_use.values())
+		_sites_in_use.clear()
+
+	for lock in locks:
+		lock.release()
+
+
+@contextlib.contextmanager
+def _unused_site(docs_cache_dir: PathPlus) -> Iterator[bool]:
+	"""
+	Context manager which yields whether no other process is reading the files in ``docs_cache_dir``.
+
+	While it yields :py:obj:`True` other processes wait to start reading them, so the directory may be removed.
+	The caller must close anything this process has open in the directory first.
+
+	:param docs_cache_dir:
 	"""
 
-	return RequestsURL(RequestsURL(url).head(allow_redirects=True).url)
+	with _sites_in_use_lock:
+		own_lock = _sites_in_use.pop(docs_cache_dir, None)
+
+	if own_lock is not None:
+		own_lock.release()
+
+	lock = _readers_lock(docs_cache_dir, shared=False)
+	acquired = lock.acquire(blocking=False)
+
+	try:
+		yield acquired
+	finally:
+		if acquired:
+			lock.release()
+
+		if own_lock is not None and docs_cache_dir.is_dir():
+			_use_site(docs_cache_dir)
+
+
+def _dump_json(filename: PathPlus, data: object) -> None:
+	"""
+	Write ``data`` to ``filename`` as JSON.
+
+	The file is replaced atomically, so concurrent readers never see a partially written file.
+
+	:param filename:
+	:param data:
+	"""
+
+	filename.parent.maybe_make(parents=True)
+	tmp_filename = filename.with_name(f".{filename.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+	tmp_filename.dump_json(data)
+	os.replace(tmp_filename, filename)
 
 
 @functools.lru_cache()
@@ -81,198 +390,582 @@ def cache_dir_for_url(url: Union[str, URL]) -> PathPlus:
 	:param url:
 	"""
 
-	return cache_dir / urlsafe_b64encode(str(url).encode("UTF-8")).decode("UTF-8")
+	return _cache_dir() / urlsafe_b64encode(str(url).encode("UTF-8")).decode("UTF-8")
 
 
-def download_objects_inv(docs_url: Union[str, RequestsURL]) -> PathPlus:
+def download_objects_inv(
+		docs_url: Union[str, URL],
+		*,
+		max_age: Optional[float] = DEFAULT_MAX_AGE,
+		) -> PathPlus:
 	"""
 	Download the Sphinx ``objects.inv`` file for the documentation available at the given URL.
 
 	:param docs_url: The base URL for the documentation, e.g. ``"https://docs.python.org/3/"``.
+	:param max_age: The number of seconds for which a previously downloaded file is used
+		without checking whether it has changed on the server.
+		If :py:obj:`None` a cached file is never revalidated.
+		If ``0`` the server is always checked.
 
 	:returns: The filename of the cached file.
 
+	.. versionchanged:: 0.3.0  Added the ``max_age`` argument.
+
 	.. latex:clearpage::
 	"""
 
-	docs_url = resolve_url(docs_url)
-	objects_inv_url = docs_url / "objects.inv"
+	return _download_objects_inv(_resolve_url(docs_url, max_age), max_age)
 
-	docs_cache_dir = cache_dir_for_url(docs_url)
 
-	if docs_cache_dir.exists():
-		current_etag = objects_inv_url.head(allow_redirects=True).headers["etag"].strip('"')
+def _download_objects_inv(docs_url: URL, max_age: Optional[float]) -> PathPlus:
+	"""
+	Like :func:`~.download_objects_inv`, for a URL which has already been resolved.
 
-		if (docs_cache_dir / current_etag).is_file():
-			return docs_cache_dir / current_etag
-		else:
-			shutil.rmtree(docs_cache_dir)
+	:param docs_url:
+	:param max_age:
+	"""
+
+	with span("download_objects_inv"):
+		docs_cache_dir = cache_dir_for_url(docs_url)
+
+		objects_inv_file = _fresh_objects_inv(docs_cache_dir, max_age)
+		if objects_inv_file is not None:
+			return objects_inv_file
+
+		# Only one process downloads the inventory at a time.
+		# The others wait for it, then use the inventory it downloaded.
+		started = time.time()
 
-	response = objects_inv_url.get()
-	objects_inv_file = docs_cache_dir / response.headers["etag"].strip('"')
-	objects_inv_file.parent.maybe_make(parents=True)
-	objects_inv_file.write_bytes(response.content)
+		with _site_lock(docs_cache_dir):
+			objects_inv_file = _fresh_objects_inv(docs_cache_dir, _validated_since(started, max_age))
+			if objects_inv_file is not None:
+				return objects_inv_file
+
+			with span("download_objects_inv.request"):
+				response = _http_session().get(
+						str(docs_url / "objects.inv"),
+						headers=_conditional_headers(docs_cache_dir),
+						stream=True,
+						)
+
+				with response:
+					if response.status_code == 304:
+						return _touch_objects_inv(docs_cache_dir)
+
+					response.raise_for_status()
+
+					with _InventoryDownload(docs_cache_dir) as download:
+						for chunk in response.iter_content(_DOWNLOAD_CHUNK_SIZE):
+							download.write(chunk)
+
+			return download.finish(response.headers)
+
+
+def _validated_since(started: float, max_age: Optional[float]) -> Optional[float]:
+	"""
+	Returns the maximum age at which data validated after ``started`` is still fresh.
+
+	This is used after waiting for another process, so the inventory it has just validated is reused.
+
+	:param started:
+	:param max_age:
+	"""
+
+	if max_age is None:
+		return None
+
+	return max(max_age, time.time() - started)
+
+
+def _objects_inv_file(docs_cache_dir: PathPlus, etag: str) -> PathPlus:
+	"""
+	Returns the filename of the cached ``objects.inv`` file with the given ETag.
+
+	The ETag is chosen by the server, so the filename is derived from its hash
+	rather than the ETag itself, and is always within ``docs_cache_dir``.
+
+	:param docs_cache_dir:
+	:param etag:
+	"""
+
+	# stdlib
+	import hashlib
+
+	return docs_cache_dir / f"{hashlib.sha256(str(etag).encode('UTF-8')).hexdigest()}.inv"
+
+
+def _fresh_objects_inv(docs_cache_dir: PathPlus, max_age: Optional[float]) -> Optional[PathPlus]:
+	"""
+	Returns the cached ``objects.inv`` file in ``docs_cache_dir`` if it does not need revalidating.
+
+	Every use of a site starts here, so this process is recorded as reading its files by :func:`~._use_site`.
+
+	:param docs_cache_dir:
+	:param max_age:
+	"""
+
+	_use_site(docs_cache_dir)
+
+	metadata_file = docs_cache_dir / "inventory.json"
+
+	if metadata_file.is_file():
+		metadata = metadata_file.load_json()
+		objects_inv_file = _objects_inv_file(docs_cache_dir, metadata["etag"])
+
+		if objects_inv_file.is_file() and _is_fresh(metadata["checked"], max_age):
+			count("inventory.fresh")
+			_mark_used(objects_inv_file)
+			return objects_inv_file
+
+	return None
+
+
+def _mark_used(objects_inv_file: PathPlus) -> None:
+	"""
+	Record that the cached ``objects.inv`` file was used, so the least recently used sites are removed first.
+
+	The modification time is only updated once a minute, rather than for every lookup.
+
+	:param objects_inv_file:
+	"""
+
+	try:
+		if time.time() - objects_inv_file.stat().st_mtime > 60:
+			os.utime(objects_inv_file)
+	except OSError:
+		pass
+
+
+def _conditional_headers(docs_cache_dir: PathPlus) -> Dict[str, str]:
+	"""
+	Returns the headers for a conditional request for ``objects.inv``.
+
+	The server only sends the file if it differs from the cached copy.
+
+	:param docs_cache_dir:
+	"""
+
+	metadata_file = docs_cache_dir / "inventory.json"
+	headers = {}
+
+	if metadata_file.is_file():
+		metadata = metadata_file.load_json()
+
+		if _objects_inv_file(docs_cache_dir, metadata["etag"]).is_file():
+			if metadata.get("etag_header"):
+				headers["If-None-Match"] = metadata["etag_header"]
+			if metadata.get("last_modified"):
+				headers["If-Modified-Since"] = metadata["last_modified"]
+
+	return headers
+
+
+def _touch_objects_inv(docs_cache_dir: PathPlus) -> PathPlus:
+	"""
+	Record that the cached ``objects.inv`` file in ``docs_cache_dir`` was found to be current.
+
+	:param docs_cache_dir:
+	"""
+
+	count("inventory.not_modified")
+
+	metadata_file = docs_cache_dir / "inventory.json"
+	metadata = metadata_file.load_json()
+	metadata["checked"] = time.time()
+	_dump_json(metadata_file, metadata)
+
+	objects_inv_file = _objects_inv_file(docs_cache_dir, metadata["etag"])
+	_mark_used(objects_inv_file)
 
 	return objects_inv_file
 
 
-def find_url(docs_url: Union[str, RequestsURL], search_term: str) -> URL:
+class _InventoryDownload:
+	"""
+	An ``objects.inv`` file which is being downloaded into ``docs_cache_dir``.
+
+	Each chunk is written to a temporary file and parsed as soon as it arrives,
+	so decompressing and parsing the inventory overlaps with the download,
+	and the index can be written without reading the file again.
+
+	If the download fails the temporary file is removed when the ``with`` block exits.
+
+	:param docs_cache_dir:
+	"""
+
+	def __init__(self, docs_cache_dir: PathPlus):
+		# stdlib
+		import hashlib
+
+		# this package
+		from searchdocs.compact import InventoryParser
+
+		self.docs_cache_dir = docs_cache_dir
+		self._parser: Optional[InventoryParser] = InventoryParser()
+		self._digest = hashlib.sha256()
+		self._size = 0
+
+		docs_cache_dir.parent.maybe_make(parents=True)
+		self._tmp_file = docs_cache_dir.parent / f".{docs_cache_dir.name}.{os.getpid()}.{threading.get_ident()}.tmp"
+		self._fp = self._tmp_file.open("wb")
+
+	def write(self, chunk: bytes) -> None:
+		"""
+		Write and parse the next chunk of the file.
+
+		:param chunk:
+		"""
+
+		self._fp.write(chunk)
+		self._digest.update(chunk)
+		self._size += len(chunk)
+
+		if self._parser is not None:
+			try:
+				self._parser.feed(chunk)
+			except ValueError:
+				# The file is still cached; the error is reported when it is searched.
+				self._parser = None
+
+	def finish(self, headers: Mapping[str, str]) -> PathPlus:
+		"""
+		Move the downloaded file into the cache, and write its index.
+
+		Each file is written to a temporary file and renamed into place, so other processes never see partial files.
+		The previous inventory is left in place for processes which are still reading it,
+		and removed once it has not been used for a while.
+		Cached search results for the previous inventory are kept if the changes do not affect them.
+
+		This must be called while holding the lock for the cache directory.
+
+		:param headers: The response headers.
+
+		:returns: The filename of the cached file.
+		"""
+
+		count("inventory.downloaded")
+		count("bytes_downloaded", self._size)
+
+		inventory = None
+		if self._parser is not None:
+			try:
+				inventory = self._parser.close()
+			except ValueError:
+				pass
+
+		etag_header = headers.get("etag")
+
+		if etag_header:
+			etag = etag_header[2:] if etag_header.startswith("W/") else etag_header
+			etag = etag.strip('"')
+		else:
+			etag = self._digest.hexdigest()
+
+		# this package
+		from searchdocs.cache import _collect_garbage_if_limited, _current_objects_inv, _remove_outdated
+
+		docs_cache_dir = self.docs_cache_dir
+		objects_inv_file = _objects_inv_file(docs_cache_dir, etag)
+		previous_objects_inv = _current_objects_inv(docs_cache_dir)
+
+		objects_inv_file.parent.maybe_make(parents=True)
+		os.replace(self._tmp_file, objects_inv_file)
+
+		if inventory is not None:
+			with span("index.build"):
+				write_index(inventory, index_filename(objects_inv_file))
+
+			if previous_objects_inv is not None and previous_objects_inv != objects_inv_file:
+				# this package
+				from searchdocs.diff import carry_over_results
+
+				with span("result_cache.carry_over"):
+					carry_over_results(previous_objects_inv, objects_inv_file)
+
+		metadata = {
+				"etag": etag,
+				"checked": time.time(),
+				"etag_header": etag_header,
+				"last_modified": headers.get("last-modified"),
+				}
+		_dump_json(docs_cache_dir / "inventory.json", metadata)
+
+		_remove_outdated(docs_cache_dir, {objects_inv_file.name, index_filename(objects_inv_file).name})
+		_collect_garbage_if_limited(keep=docs_cache_dir)
+
+		return objects_inv_file
+
+	def __enter__(self) -> "_InventoryDownload":
+		return self
+
+	def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+		self._fp.close()
+
+		if exc_type is not None:
+			self._tmp_file.unlink(missing_ok=True)
+
+
+def find_url(
+		docs_url: Union[str, URL],
+		search_term: str,
+		*,
+		max_age: Optional[float] = DEFAULT_MAX_AGE,
+		backend: str = "python",
+		) -> URL:
 	"""
 	Find the complete documentation URL for the given function, class, method etc.
 
 	:param docs_url: The base URL for the documentation, e.g. ``"https://docs.python.org/3/"``.
 	:param search_term: The object to search for, e.g. ``'TemporaryDirectory'``.
+	:param max_age: The number of seconds for which cached redirects and inventories are used
+		without contacting the server. If :py:obj:`None` they are never revalidated,
+		which allows lookups to work offline once the inventory has been downloaded.
+	:param backend: The scoring backend to use. One of :py:data:`searchdocs.search.BACKENDS`.
 
 	:return: The url of the object in the documentation, e.g.
 		``URL('https://docs.python.org/3/'library/tempfile.html#tempfile.TemporaryDirectory')``.
+
+	:raises ObjectNotFoundError: If the object could not be found.
+		Search terms which were not found are cached, so repeating the search fails without searching again.
+
+	.. versionchanged:: 0.3.0
+
+		* Added the ``max_age`` and ``backend`` arguments.
+		* Raises :exc:`~.ObjectNotFoundError`, a subclass of :exc:`ValueError`, with suggestions.
+	"""
+
+	docs_url = _resolve_url(docs_url, max_age)
+	objects_inv = _download_objects_inv(docs_url, max_age)
+
+	return _find_url_in_inventory(docs_url, objects_inv, search_term, backend)
+
+
+def _find_url_in_inventory(docs_url: URL, objects_inv: PathPlus, search_term: str, backend: str = "python") -> URL:
+	"""
+	Search for ``search_term`` in the result cache, or in the given inventory on a cache miss.
+
+	:param docs_url: The resolved base URL for the documentation.
+	:param objects_inv: The filename of the cached ``objects.inv`` file.
+	:param search_term:
+	:param backend: The scoring backend to use.
+	"""
+
+	with span("result_cache.open"):
+		search_result_cache = get_result_cache(cache_dir_for_url(docs_url), objects_inv)
+
+	with span("result_cache.lookup"):
+		cached = search_result_cache.get(search_term)
+		suggestions = None if cached is not None else search_result_cache.get_not_found(search_term)
+
+	if cached is not None:
+		return URL(cached)
+	if suggestions is not None:
+		raise ObjectNotFoundError(search_term, suggestions)
+
+	# this package
+	from searchdocs.search import SearchEngine
+
+	with load_index(objects_inv) as index, SearchEngine(index, backend=backend) as engine:
+		with span("search"):
+			match, near_matches = engine.best_match(search_term)
+
+		if match is None:
+			raise _not_found(search_term, near_matches, search_result_cache)
+
+		url = docs_url / index[match.idx].uri
+
+	search_result_cache.set(search_term, str(url), match.idx)
+
+	return url
+
+
+def _not_found(search_term: str, suggestions: Iterable["Match"], result_cache: ResultCache) -> ObjectNotFoundError:
+	"""
+	Cache that ``search_term`` was not found, with the names of the most similar objects as suggestions.
+
+	:param search_term:
+	:param suggestions: The suggestions returned by :meth:`SearchEngine.best_match() <.best_match>`.
+	:param result_cache: The result cache for the inventory.
+
+	:returns: The exception to raise.
+	"""
+
+	names = [match.name for match in suggestions]
+	result_cache.set_not_found(search_term, names)
+
+	return ObjectNotFoundError(search_term, names)
+
+
+def find_urls(
+		docs_url: Union[str, URL],
+		search_terms: Iterable[str],
+		*,
+		max_age: Optional[float] = DEFAULT_MAX_AGE,
+		processes: Optional[int] = None,
+		backend: str = "python",
+		) -> Iterator[Tuple[str, Optional[URL]]]:
+	"""
+	Find the complete documentation URLs for many functions, classes, methods etc.
+
+	The documentation URL is resolved, and the inventory downloaded and loaded, only once for the whole batch.
+	Search terms are consumed lazily, and results are yielded in the same order as the search terms.
+
+	:param docs_url: The base URL for the documentation, e.g. ``"https://docs.python.org/3/"``.
+	:param search_terms: The objects to search for.
+	:param max_age: The number of seconds for which cached redirects and inventories are used
+		without contacting the server. If :py:obj:`None` they are never revalidated.
+	:param processes: The number of worker processes used to search large batches.
+		Defaults to the number of CPUs.
+	:param backend: The scoring backend to use. One of :py:data:`searchdocs.search.BACKENDS`.
+		With ``'rapidfuzz'`` each chunk of the batch is scored in bulk, rather than in worker processes.
+
+	:returns: An iterator of ``(search_term, url)`` tuples.
+		``url`` is :py:obj:`None` if the object could not be found.
+		Search terms which were not found are cached, as by :func:`~.find_url`.
+
+	.. versionadded:: 0.3.0
 	"""
 
-	docs_url = resolve_url(docs_url)
+	docs_url = _resolve_url(docs_url, max_age)
 	docs_cache_dir = cache_dir_for_url(docs_url)
 
-	objects_inv = download_objects_inv(docs_url)
+	objects_inv = _download_objects_inv(docs_url, max_age)
 
-	with diskcache.Cache(directory=str(docs_cache_dir)) as search_result_cache:
-		if search_term in search_result_cache:
-			return URL(search_result_cache[search_term])
+	search_result_cache = get_result_cache(docs_cache_dir, objects_inv)
 
-		else:
-			inventory = Inventory(objects_inv)
-
-			# TODO: expose with_score as an option?
-			suggestions: List[Tuple[str, int, int]] = inventory.suggest_from_name(
-					search_term,
-					with_index=True,
-					with_score=True,
-					)
-
-			if not suggestions:
-				raise ValueError(f"Object {search_term} not found.")
-
-			desired_object = inventory.objects[suggestions[0][2]]
-			url = docs_url / desired_object.uri_expanded
-
-			search_result_cache.set(search_term, str(url))
-
-			return url
-
-
-class Inventory(sphobjinv.inventory.Inventory):
-
-	# Based on https://github.com/bskinn/sphobjinv
-	# Copyright (c) 2016-2021 Brian Skinn
-	# MIT Licensed
-
-	@overload
-	def suggest_from_name(
-			self,
-			name: str,
-			*,
-			with_index: Literal[True],
-			thresh: int = ...,
-			with_score: Literal[False] = ...
-			) -> List[Tuple[str, int]]: ...
-
-	@overload
-	def suggest_from_name(
-			self,
-			name: str,
-			*,
-			with_score: Literal[True],
-			thresh: int = ...,
-			with_index: Literal[False] = ...
-			) -> List[Tuple[str, int]]: ...
-
-	@overload
-	def suggest_from_name(
-			self,
-			name: str,
-			*,
-			with_index: Literal[True],
-			with_score: Literal[True],
-			thresh: int = ...
-			) -> List[Tuple[str, int, int]]: ...
-
-	@overload
-	def suggest_from_name(
-			self,
-			name: str,
-			*,
-			thresh: int = ...,
-			with_index: Literal[False] = ...,
-			with_score: Literal[False] = ...
-			) -> List[str]: ...
-
-	def suggest_from_name(
-			self,
-			name: str,
-			*,
-			thresh: int = 50,
-			with_index: bool = False,
-			with_score: bool = False
-			) -> Union[List[str], List[Tuple[str, int]], List[Tuple[str, int, int]]]:
-		"""
-		Similar to :meth:`sphobjinv.inventory.Inventory.suggest`, but only searches the names of objects and not their types.
+	# this package
+	from searchdocs.search import SearchEngine
 
-		:param name: Object name to search for.
-		:param thresh: Match quality threshold
-		:param with_index: Whether to include the index in the inventory of each match.
-		:param with_score: Whether to include the match quality score for each matched name.
+	with load_index(objects_inv) as index, SearchEngine(index, processes=processes, backend=backend) as engine:
 
-		| If both ``with_index`` and ``with_score`` are :py:obj:`True`, returns a list of 3-element tuples of ``(name, score, index)``.
-		| If ``with_index`` is :py:obj:`True`, returns a list of 2-element tuples of ``(name, index)``.
-		| If ``with_score`` is :py:obj:`True`, returns a list of 2-element tuples of ``(name, score)``.
-		| If neither are :py:obj:`True`, returns a list of strings containing just the names.
-		"""
+		search_terms = iter(search_terms)
+
+		while True:
+			chunk = list(itertools.islice(search_terms, _BATCH_CHUNK_SIZE))
+			if not chunk:
+				break
+
+			urls: Dict[str, Optional[URL]] = {}
+			misses = []
+
+			for search_term in chunk:
+				if search_term in urls:
+					continue
+
+				cached = search_result_cache.get(search_term)
+				if cached is None and search_result_cache.get_not_found(search_term) is None:
+					misses.append(search_term)
+				urls[search_term] = None if cached is None else URL(cached)
+
+			with span("search"):
+				results = engine.best_matches_with_suggestions(misses)
+
+			for search_term, (match, suggestions) in zip(misses, results):
+				if match is not None:
+					url = docs_url / index[match.idx].uri
+					search_result_cache.set(search_term, str(url), match.idx)
+					urls[search_term] = url
+				else:
+					_not_found(search_term, suggestions, search_result_cache)
+
+			for search_term in chunk:
+				yield search_term, urls[search_term]
+
+
+class SearchResult(NamedTuple):
+	"""
+	A match returned by :func:`~.search_sites`.
+
+	.. versionadded:: 0.3.0
+	"""
+
+	#: The name of the object, e.g. ``'pathlib.Path'``.
+	name: str
+
+	#: The domain and role of the object, e.g. ``'py:class'``.
+	role: str
 
-		# Suppress any UserWarning about the speed issue
-		with warnings.catch_warnings():
-			warnings.simplefilter("ignore")
-			# 3rd party
-			from fuzzywuzzy import process as fwp  # type: ignore[import-untyped]
-
-		# Must propagate list index to include in output
-		# Search vals are rst prepended with list index
-		srch_list = [f"{i} {o}" for i, o in enumerate([_.name for _ in self.objects])]
-
-		#
-		# if name in srch_list:
-		# 	if with_index and with_score:
-		# 		return [(name, 100, srch_list.index(name))]
-		# 	elif with_index:
-		# 		return (name, srch_list.index(name))
-		# 	elif with_score:
-		# 		return (name, 100)
-		# 	else:
-		# 		return name
-
-		# Composite each string result extracted by fuzzywuzzy
-		# and its match score into a single string. The match
-		# and score are returned together in a tuple.
-		initial_results = [
-				"{} {}".format(*_)
-				for _ in fwp.extract(name, srch_list, limit=None, scorer=ratio)
-				if _[1] >= thresh
-				]
-
-		# Define regex for splitting the three components, and
-		# use it to convert composite result string to tuple:
-		# result --> (rst, score, index)
-		p_idx = re.compile("^(\\d+)\\s+(.+?)\\s+(\\d+)$")
+	#: The match quality score, between 0 and 100.
+	score: int
+
+	#: The url of the object in the documentation.
+	url: URL
+
+
+def _search_site(
+		docs_url: Union[str, URL],
+		search_term: str,
+		limit: Optional[int],
+		thresh: int,
+		max_age: Optional[float],
+		backend: str,
+		roles: Optional[List[str]],
+		) -> List[SearchResult]:
+	docs_url = _resolve_url(docs_url, max_age)
+	objects_inv = _download_objects_inv(docs_url, max_age)
+
+	# this package
+	from searchdocs.search import SearchEngine
+
+	with load_index(objects_inv) as index, SearchEngine(index, backend=backend) as engine:
 		results = []
 
-		for m in map(p_idx.match, initial_results):
-			assert m is not None
-			results.append((m.group(2), int(m.group(3)), int(m.group(1))))
+		with span("search"):
+			matches = engine.search(search_term, thresh=thresh, limit=limit, roles=roles)
 
-		# Return based on flags
-		if with_score:
-			if with_index:
-				return results
-			else:
-				return [tup[:2] for tup in results]
-		else:
-			if with_index:
-				return [tup[::2] for tup in results]
-			else:
-				return [tup[0] for tup in results]
+		for match in matches:
+			entry = index[match.idx]
+			results.append(SearchResult(entry.name, entry.role, match.score, docs_url / entry.uri))
+
+		return results
+
+
+def search_sites(
+		docs_urls: Iterable[Union[str, URL]],
+		search_term: str,
+		*,
+		limit: Optional[int] = None,
+		thresh: int = 50,
+		max_age: Optional[float] = DEFAULT_MAX_AGE,
+		backend: str = "python",
+		roles: Optional[Iterable[str]] = None,
+		) -> List[SearchResult]:
+	"""
+	Search the documentation for several projects at once.
+
+	Each site's inventory is fetched and searched concurrently, and the results merged into a single ranking.
+
+	:param docs_urls: The base URLs for the documentation, e.g. ``["https://docs.python.org/3/"]``.
+	:param search_term: The object to search for, e.g. ``'TemporaryDirectory'``.
+	:param limit: The maximum number of results to return.
+	:param thresh: Match quality threshold.
+	:param max_age: The number of seconds for which cached redirects and inventories are used
+		without contacting the server. If :py:obj:`None` they are never revalidated.
+	:param backend: The scoring backend to use. One of :py:data:`searchdocs.search.BACKENDS`.
+	:param roles: If given, only objects with these roles are searched, e.g. ``['py:class', 'std:label']``.
+		A domain on its own, e.g. ``'py'``, matches every role in that domain.
+		Objects with other roles are excluded before scoring, so narrower searches are faster.
+
+	:returns: The best matches across all sites, best match first.
+		Matches with the same score are ordered by the position of their site in ``docs_urls``.
+
+	.. versionadded:: 0.3.0
+	"""
+
+	# stdlib
+	from concurrent.futures import ThreadPoolExecutor
+
+	docs_urls = list(docs_urls)
+	role_list = None if roles is None else list(roles)
+
+	with ThreadPoolExecutor(max_workers=max(1, len(docs_urls))) as executor:
+		per_site = list(
+				executor.map(
+						lambda docs_url: _search_site(docs_url, search_term, limit, thresh, max_age, backend, role_list),
+						docs_urls,
+						)
+				)
+
+	# sorted() is stable, so ties keep the order of the sites and then of the inventory.
+	results = sorted(itertools.chain.from_iterable(per_site), key=lambda result: -result.score)
+	return results[:limit]
@@ -2,7 +2,9 @@
 #
 #  __main__.py
 """
-CLI entry point.
+CLI entry points.
+
+``searchdocs`` searches the documentation, and ``searchdocs-cache`` manages the cache and the search server.
 """
 #
 #  Copyright © 2021 Dominic Davis-Foster <dominic@davis-foster.co.uk>
@@ -28,31 +30,259 @@ CLI entry point.
 
 # stdlib
 import sys
+from typing import Any, Callable, Dict, Optional, Sequence, TextIO
 
 # 3rd party
 import click
-from apeye.requests_url import RequestsURL
-from consolekit import click_command
-from consolekit.commands import MarkdownHelpCommand
-from consolekit.options import flag_option
+from apeye.url import URL
+
+__all__ = ["cache", "main", "serve"]
+
+# The URL of the Python documentation, which is searched by default.
+# ``DOCS_PYTHON_ORG`` is only created on first access, as importing requests takes longer than a cached search.
+_DOCS_PYTHON_ORG = "https://docs.python.org/3/"
+
+# The same as consolekit.CONTEXT_SETTINGS.
+# consolekit is only imported when help is shown, as importing it takes longer than a cached search.
+_CONTEXT_SETTINGS: Dict[str, Any] = dict(help_option_names=["-h", "--help"], max_content_width=120)
+
+
+def __getattr__(name: str) -> Any:
+	if name == "DOCS_PYTHON_ORG":
+		# 3rd party
+		from apeye.requests_url import RequestsURL
+
+		globals()["DOCS_PYTHON_ORG"] = RequestsURL(_DOCS_PYTHON_ORG)
+		return globals()["DOCS_PYTHON_ORG"]
+
+	raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def _default_docs_url() -> str:
+	# ``DOCS_PYTHON_ORG`` is only looked up if it has already been created, or replaced.
+	return str(globals().get("DOCS_PYTHON_ORG", _DOCS_PYTHON_ORG))
+
+
+class _MarkdownHelpCommand(click.Command):
+	# Renders the help text as markdown, like consolekit.commands.MarkdownHelpCommand.
+
+	_colour = None
 
-__all__ = ["main"]
+	def format_help_text(self, ctx: click.Context, formatter: click.HelpFormatter) -> None:
+		# 3rd party
+		from consolekit.commands import MarkdownHelpMixin
 
-DOCS_PYTHON_ORG = RequestsURL("https://docs.python.org/3/")
+		MarkdownHelpMixin.format_help_text(self, ctx, formatter)  # type: ignore[arg-type]
 
 
-@flag_option("--browser", help="Open the documentation in the default web browser.")
-@click.argument("search_term", type=click.STRING)
-@click_command(cls=MarkdownHelpCommand)
-def main(search_term: str, browser: bool = False) -> None:
+@click.option(
+		"-i",
+		"--interactive",
+		is_flag=True,
+		default=False,
+		help="Choose from the results interactively, updating them as the search term is typed. "
+		"SEARCH_TERM, if given, is the initial search term.",
+		)
+@click.option(
+		"--role",
+		"roles",
+		type=click.STRING,
+		multiple=True,
+		metavar="ROLE",
+		help="Only search objects with this domain and role, e.g. 'py:class' or 'std:label', "
+		"or with any role in a domain, e.g. 'py'. May be given multiple times.",
+		)
+@click.option(
+		"--scores",
+		is_flag=True,
+		default=False,
+		help="Print the score, name and role of each match before its URL, separated by tabs.",
+		)
+@click.option(
+		"-n",
+		"--limit",
+		type=click.IntRange(min=1),
+		default=None,
+		metavar="N",
+		help="Print the URLs of the best N matches, best match first.",
+		)
+@click.option(
+		"--backend",
+		type=click.Choice(["python", "rapidfuzz"]),
+		default="python",
+		show_default=True,
+		help="The backend used to score matches. 'rapidfuzz' scores many names at once, "
+		"and requires the 'vectorised' extra.",
+		)
+@click.option(
+		"--timings",
+		is_flag=True,
+		default=False,
+		help="Print the time taken by each stage of the search, and cache statistics, to stderr.",
+		)
+@click.option(
+		"--offline",
+		is_flag=True,
+		default=False,
+		help="Use cached data without checking whether it is up to date.",
+		)
+@click.option(
+		"--max-age",
+		type=click.FLOAT,
+		default=None,
+		metavar="SECONDS",
+		help="The number of seconds for which cached data is used without checking whether it is up to date.",
+		)
+@click.option(
+		"--batch",
+		type=click.File('r'),
+		default=None,
+		metavar="FILE",
+		help="Read search terms from FILE, one per line, and print a tab-separated term and URL for each. "
+		"Use '-' to read from stdin.",
+		)
+@click.option(
+		"-u",
+		"--docs-url",
+		"docs_urls",
+		type=click.STRING,
+		multiple=True,
+		metavar="URL",
+		help="The base URL of the documentation to search. "
+		"May be given multiple times to search several sites at once. "
+		"Defaults to the Python documentation.",
+		)
+@click.option("--browser", is_flag=True, default=False, help="Open the documentation in the default web browser.")
+@click.argument("search_term", type=click.STRING, required=False, default=None)
+@click.command(cls=_MarkdownHelpCommand, context_settings=_CONTEXT_SETTINGS)
+def main(
+		search_term: Optional[str] = None,
+		browser: bool = False,
+		docs_urls: Sequence[str] = (),
+		batch: Optional[TextIO] = None,
+		max_age: Optional[float] = None,
+		offline: bool = False,
+		timings: bool = False,
+		backend: str = "python",
+		limit: Optional[int] = None,
+		scores: bool = False,
+		roles: Sequence[str] = (),
+		interactive: bool = False,
+		) -> None:
 	"""
 	Search for ``SEARCH_TERM`` in the Python documentation, and print the URL of the best match.
+
+	Other documentation can be searched with ``--docs-url``.
+	If a server started with ``searchdocs-cache serve`` is running, the search is performed by the server.
+
+	More matches can be shown with ``--limit``, and the search narrowed to objects with certain roles with ``--role``.
+	With ``--interactive`` the results are updated as the search term is typed, and one can be chosen.
 	"""
 
 	# this package
-	from searchdocs import find_url
+	from searchdocs import DEFAULT_MAX_AGE, ObjectNotFoundError, find_url, find_urls, search_sites
+
+	if timings:
+		_report_timings(click.get_current_context())
+
+	if offline:
+		max_age = None
+	elif max_age is None:
+		max_age = DEFAULT_MAX_AGE
+
+	if not docs_urls:
+		docs_urls = (_default_docs_url(), )
+
+	if batch is not None:
+		if search_term is not None:
+			raise click.UsageError("SEARCH_TERM cannot be used with '--batch'.")
+		if len(docs_urls) > 1:
+			raise click.UsageError("Only one '--docs-url' can be used with '--batch'.")
+		if limit is not None or scores or roles or interactive:
+			raise click.UsageError(
+					"'--limit', '--scores', '--role' and '--interactive' cannot be used with '--batch'."
+					)
+
+		search_terms = (line.strip() for line in batch)
+		not_found = False
+
+		for term, url in find_urls(docs_urls[0], filter(None, search_terms), max_age=max_age, backend=backend):
+			if url is None:
+				click.echo(f"Object {term} not found.", err=True)
+				not_found = True
+			else:
+				click.echo(f"{term}\t{url}")
+
+		if not_found:
+			sys.exit(1)
+
+		return
+
+	if interactive:
+		if len(docs_urls) > 1:
+			raise click.UsageError("Only one '--docs-url' can be used with '--interactive'.")
+
+		# this package
+		from searchdocs.interactive import interactive_search
+
+		chosen = interactive_search(
+				docs_urls[0],
+				search_term or '',
+				limit=limit or 10,
+				roles=roles or None,
+				max_age=max_age,
+				backend=backend,
+				)
+		if chosen is None:
+			sys.exit(1)
+
+		_show_url(chosen, browser)
+		return
+
+	if search_term is None:
+		raise click.UsageError("Missing argument 'SEARCH_TERM'.")
+
+	# this package
+	from searchdocs.server import find_url_from_server
+
+	if limit is not None or scores or roles:
+		results = search_sites(
+				docs_urls,
+				search_term,
+				limit=limit or 1,
+				max_age=max_age,
+				backend=backend,
+				roles=roles or None,
+				)
+		if not results:
+			raise ObjectNotFoundError(search_term)
+
+		if not browser:
+			for result in results:
+				if scores:
+					click.echo(f"{result.score}\t{result.name}\t{result.role}\t{result.url}")
+				else:
+					click.echo(result.url)
+			return
+
+		url = results[0].url
+
+	elif len(docs_urls) > 1:
+		results = search_sites(docs_urls, search_term, limit=1, max_age=max_age, backend=backend)
+		if not results:
+			raise ObjectNotFoundError(search_term)
+		url = results[0].url
+
+	else:
+		url = find_url_from_server(docs_urls[0], search_term, max_age=max_age)
+		if url is None:
+			url = find_url(docs_urls[0], search_term, max_age=max_age, backend=backend)
+
+	_show_url(url, browser)
+
 
-	url = find_url(DOCS_PYTHON_ORG, search_term)
+def _show_url(url: URL, browser: bool) -> None:
+	# Print the URL, or open it in the web browser.
 
 	if browser:  # pragma: no cover
 		# stdlib
@@ -64,5 +294,218 @@ def main(search_term: str, browser: bool = False) -> None:
 		click.echo(url)
 
 
+def _report_timings(ctx: click.Context) -> None:
+	# Collect timings until the command finishes, then print them to stderr.
+
+	# stdlib
+	import time
+
+	# this package
+	from searchdocs.instrumentation import Timings, register_hook, unregister_hook
+
+	collector = Timings()
+	start = time.perf_counter()
+	register_hook(collector)
+
+	def report() -> None:
+		unregister_hook(collector)
+		collector.span_ended("total", time.perf_counter() - start)
+		click.echo(collector.report(), err=True)
+
+	ctx.call_on_close(report)
+
+
+@click.group(context_settings=_CONTEXT_SETTINGS)
+def cache() -> None:
+	"""
+	Fill, inspect and clean up the searchdocs cache, and run the search server.
+	"""
+
+
+@click.option(
+		"--import",
+		"import_archive",
+		type=click.Path(exists=True, dir_okay=False),
+		default=None,
+		metavar="ARCHIVE",
+		help="Load a cache archive written with '--export'. "
+		"Documentation is only downloaded if '--docs-url' is also given.",
+		)
+@click.option(
+		"--export",
+		"export_archive",
+		type=click.Path(dir_okay=False, writable=True),
+		default=None,
+		metavar="ARCHIVE",
+		help="Afterwards, write the whole cache to ARCHIVE, a gzip-compressed tar file.",
+		)
+@click.option(
+		"--terms",
+		type=click.File('r'),
+		default=None,
+		metavar="FILE",
+		help="Also cache the results for the search terms in FILE, one per line.",
+		)
+@click.option(
+		"-u",
+		"--docs-url",
+		"docs_urls",
+		type=click.STRING,
+		multiple=True,
+		metavar="URL",
+		help="The base URL of the documentation to download. "
+		"May be given multiple times. Defaults to the Python documentation.",
+		)
+@cache.command(cls=_MarkdownHelpCommand)
+def warm(
+		docs_urls: Sequence[str] = (),
+		terms: Optional[TextIO] = None,
+		export_archive: Optional[str] = None,
+		import_archive: Optional[str] = None,
+		) -> None:
+	"""
+	Download and index documentation ahead of time, so later searches do not need to.
+
+	The cache can be copied to other machines with ``--export`` and ``--import``.
+	"""
+
+	# this package
+	from searchdocs.cache import export_cache, import_cache
+	from searchdocs.cache import warm as warm_cache
+
+	if import_archive is not None:
+		for docs_url in import_cache(import_archive):
+			click.echo(f"Imported {docs_url}", err=True)
+
+	if docs_urls or import_archive is None:
+		search_terms = filter(None, (line.strip() for line in terms)) if terms is not None else ()
+
+		for site in warm_cache(docs_urls or (_default_docs_url(), ), search_terms):
+			click.echo(f"{site.docs_url}\t{site.objects} objects\t{site.results} results")
+
+	if export_archive is not None:
+		click.echo(f"Exported to {export_cache(export_archive)}", err=True)
+
+
+def _format_size(size: float) -> str:
+	for unit in ("B", "KiB", "MiB", "GiB"):
+		if size < 1024 or unit == "GiB":
+			break
+		size /= 1024
+
+	return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+
+
+@cache.command(cls=_MarkdownHelpCommand)
+def stats() -> None:
+	"""
+	Show the space used in the cache by each documentation site, most recently used first.
+	"""
+
+	# stdlib
+	import datetime
+
+	# this package
+	from searchdocs import _cache_dir
+	from searchdocs.cache import site_stats
+
+	sites = site_stats()
+
+	for site in sites:
+		if site.last_used is None:
+			last_used = "never"
+		else:
+			last_used = datetime.datetime.fromtimestamp(site.last_used).strftime("%Y-%m-%d %H:%M")
+		click.echo(f"{site.docs_url}\t{_format_size(site.size)}\t{site.results} results\tlast used {last_used}")
+
+	click.echo(f"Total {_format_size(sum(site.size for site in sites))} in {_cache_dir()}")
+
+
+def _parse_option(parser: str) -> Callable[[click.Context, click.Parameter, Optional[str]], Any]:
+	# Click callback which parses a size or age with the named function from searchdocs.cache,
+	# reporting invalid values as usage errors.
+
+	def callback(ctx: click.Context, param: click.Parameter, value: Optional[str]) -> Any:
+		# this package
+		import searchdocs.cache
+
+		if value is None:
+			return None
+
+		try:
+			return getattr(searchdocs.cache, parser)(value)
+		except ValueError as e:
+			raise click.BadParameter(str(e))
+
+	return callback
+
+
+@click.option(
+		"--max-age",
+		type=click.STRING,
+		default=None,
+		metavar="AGE",
+		callback=_parse_option("parse_age"),
+		help="Remove documentation not used for AGE, e.g. '30d'. "
+		"Defaults to $SEARCHDOCS_CACHE_MAX_AGE.",
+		)
+@click.option(
+		"--max-size",
+		type=click.STRING,
+		default=None,
+		metavar="SIZE",
+		callback=_parse_option("parse_size"),
+		help="Remove the least recently used documentation until the cache is smaller than SIZE, e.g. '500M'. "
+		"Defaults to $SEARCHDOCS_CACHE_MAX_SIZE.",
+		)
+@cache.command(cls=_MarkdownHelpCommand)
+def gc(max_size: Optional[int] = None, max_age: Optional[float] = None) -> None:
+	"""
+	Remove outdated and least recently used files from the cache.
+	"""
+
+	# this package
+	from searchdocs.cache import collect_garbage, limits_from_environment
+
+	default_size, default_age = limits_from_environment()
+
+	result = collect_garbage(
+			max_size=default_size if max_size is None else max_size,
+			max_age=default_age if max_age is None else max_age,
+			)
+
+	for docs_url in result.removed:
+		click.echo(f"Removed {docs_url}")
+
+	click.echo(f"Freed {_format_size(result.freed)}", err=True)
+
+
+@click.option(
+		"-p",
+		"--port",
+		type=click.INT,
+		default=0,
+		help="The port to listen on. By default a free port is chosen.",
+		)
+@cache.command(cls=_MarkdownHelpCommand)
+def serve(port: int = 0) -> None:
+	"""
+	Start a server which keeps inventories in memory to answer searches quickly.
+
+	While the server is running, ``searchdocs SEARCH_TERM`` sends searches to it.
+	"""
+
+	# this package
+	from searchdocs.server import SearchServer
+
+	with SearchServer(port) as server:
+		click.echo(f"Serving on {server.url}", err=True)
+
+		try:
+			server.serve()
+		except KeyboardInterrupt:  # pragma: no cover
+			pass
+
+
 if __name__ == "__main__":
 	sys.exit(main())
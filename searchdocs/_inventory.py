@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+#
+#  _inventory.py
+"""
+Subclass of :class:`sphobjinv.inventory.Inventory` with a name-only search.
+
+.. versionadded:: 0.3.0  Moved from :mod:`searchdocs`, which imports it on first use.
+"""
+#
+#  Copyright © 2021 Dominic Davis-Foster <dominic@davis-foster.co.uk>
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+#  EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+#  MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+#  IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM,
+#  DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+#  OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE
+#  OR OTHER DEALINGS IN THE SOFTWARE.
+#
+
+# stdlib
+from typing import List, Optional, Tuple, Union, overload
+
+# 3rd party
+import sphobjinv  # type: ignore[import-untyped]
+from typing_extensions import Literal
+
+# this package
+from searchdocs.search import _suggest
+
+__all__ = ["Inventory"]
+
+
+class Inventory(sphobjinv.inventory.Inventory):
+	"""
+	Subclass of :class:`sphobjinv.inventory.Inventory` whose :meth:`~.suggest_from_name` matches names only.
+	"""
+
+	# Based on https://github.com/bskinn/sphobjinv
+	# Copyright (c) 2016-2021 Brian Skinn
+	# MIT Licensed
+
+	@overload
+	def suggest_from_name(
+			self,
+			name: str,
+			*,
+			with_index: Literal[True],
+			thresh: int = ...,
+			limit: Optional[int] = ...,
+			with_score: Literal[False] = ...,
+			backend: str = ...,
+			) -> List[Tuple[str, int]]: ...
+
+	@overload
+	def suggest_from_name(
+			self,
+			name: str,
+			*,
+			with_score: Literal[True],
+			thresh: int = ...,
+			limit: Optional[int] = ...,
+			with_index: Literal[False] = ...,
+			backend: str = ...,
+			) -> List[Tuple[str, int]]: ...
+
+	@overload
+	def suggest_from_name(
+			self,
+			name: str,
+			*,
+			with_index: Literal[True],
+			with_score: Literal[True],
+			thresh: int = ...,
+			limit: Optional[int] = ...,
+			backend: str = ...,
+			) -> List[Tuple[str, int, int]]: ...
+
+	@overload
+	def suggest_from_name(
+			self,
+			name: str,
+			*,
+			thresh: int = ...,
+			limit: Optional[int] = ...,
+			with_index: Literal[False] = ...,
+			with_score: Literal[False] = ...,
+			backend: str = ...,
+			) -> List[str]: ...
+
+	def suggest_from_name(
+			self,
+			name: str,
+			*,
+			thresh: int = 50,
+			limit: Optional[int] = None,
+			with_index: bool = False,
+			with_score: bool = False,
+			backend: str = "python",
+			) -> Union[List[str], List[Tuple[str, int]], List[Tuple[str, int, int]]]:
+		"""
+		Similar to :meth:`sphobjinv.inventory.Inventory.suggest`, but only searches the names of objects and not their types.
+
+		:param name: Object name to search for.
+		:param thresh: Match quality threshold
+		:param limit: The maximum number of results to return.
+			If given, only the best ``limit`` matches are kept rather than sorting every match.
+		:param with_index: Whether to include the index in the inventory of each match.
+		:param with_score: Whether to include the match quality score for each matched name.
+		:param backend: The scoring backend to use. One of :py:data:`searchdocs.search.BACKENDS`.
+
+		| If both ``with_index`` and ``with_score`` are :py:obj:`True`, returns a list of 3-element tuples of ``(name, score, index)``.
+		| If ``with_index`` is :py:obj:`True`, returns a list of 2-element tuples of ``(name, index)``.
+		| If ``with_score`` is :py:obj:`True`, returns a list of 2-element tuples of ``(name, score)``.
+		| If neither are :py:obj:`True`, returns a list of strings containing just the names.
+
+		.. versionchanged:: 0.3.0  Added the ``limit`` and ``backend`` arguments.
+		"""
+
+		return _suggest(
+				[obj.name for obj in self.objects],
+				name,
+				thresh=thresh,
+				limit=limit,
+				with_index=with_index,
+				with_score=with_score,
+				backend=backend,
+				)
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+#
+#  _locking.py
+"""
+Locks shared between processes.
+
+They serialise updates to the cache, and stop files which are being read from being removed.
+
+.. versionadded:: 0.3.0
+"""
+#
+#  Copyright © 2021 Dominic Davis-Foster <dominic@davis-foster.co.uk>
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+#  EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+#  MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+#  IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM,
+#  DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+#  OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE
+#  OR OTHER DEALINGS IN THE SOFTWARE.
+#
+
+
+# stdlib
+import os
+import sys
+import time
+from typing import Optional
+
+# 3rd party
+from domdf_python_tools.paths import PathPlus
+from domdf_python_tools.typing import PathLike
+
+__all__ = ["FileLock"]
+
+if sys.platform == "win32":  # pragma: no cover (!Windows)
+	# stdlib
+	import msvcrt
+
+	def _lock(fd: int, blocking: bool, shared: bool) -> bool:
+		if shared:
+			# msvcrt has no shared locks. Windows does not allow files which are open to be removed anyway.
+			return True
+
+		# msvcrt.locking only retries for 10 seconds, so poll instead.
+		while True:
+			try:
+				msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+				return True
+			except OSError:
+				if not blocking:
+					return False
+				time.sleep(0.05)
+
+	def _unlock(fd: int, shared: bool) -> None:
+		if not shared:
+			os.lseek(fd, 0, os.SEEK_SET)
+			msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+
+else:  # pragma: no cover (Windows)
+	# stdlib
+	import fcntl
+
+	def _lock(fd: int, blocking: bool, shared: bool) -> bool:
+		operation = fcntl.LOCK_SH if shared else fcntl.LOCK_EX
+
+		try:
+			fcntl.flock(fd, operation if blocking else operation | fcntl.LOCK_NB)
+		except BlockingIOError:
+			return False
+		return True
+
+	def _unlock(fd: int, shared: bool) -> None:
+		fcntl.flock(fd, fcntl.LOCK_UN)
+
+
+class FileLock:
+	"""
+	An exclusive lock on ``filename``, which is shared between processes and between threads.
+
+	The file is created if it does not exist, and is left in place when the lock is released,
+	as removing it would allow another process to lock a new file of the same name.
+
+	:param filename:
+	:param shared: If :py:obj:`True` the lock may be held by any number of holders at once,
+		but not at the same time as an exclusive lock on the same file.
+		Shared locks are not supported on Windows, where acquiring one always succeeds immediately.
+	"""
+
+	def __init__(self, filename: PathLike, shared: bool = False):
+		self.filename = PathPlus(filename)
+		self.shared = shared
+		self._fd: Optional[int] = None
+
+	def acquire(self, blocking: bool = True) -> bool:
+		"""
+		Acquire the lock, waiting for any other holder to release it.
+
+		:param blocking: If :py:obj:`False`, return immediately if the lock is held elsewhere.
+
+		:returns: Whether the lock was acquired.
+		"""
+
+		self.filename.parent.maybe_make(parents=True)
+		fd = os.open(self.filename, os.O_RDWR | os.O_CREAT, 0o644)
+
+		try:
+			locked = _lock(fd, blocking, self.shared)
+		except BaseException:
+			os.close(fd)
+			raise
+
+		if not locked:
+			os.close(fd)
+			return False
+
+		self._fd = fd
+		return True
+
+	def release(self) -> None:
+		"""
+		Release the lock.
+		"""
+
+		fd, self._fd = self._fd, None
+
+		if fd is not None:
+			try:
+				_unlock(fd, self.shared)
+			finally:
+				os.close(fd)
+
+	def __enter__(self) -> "FileLock":
+		self.acquire()
+		return self
+
+	def __exit__(self, *args) -> None:
+		self.release()
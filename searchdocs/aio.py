@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+#
+#  aio.py
+"""
+:mod:`asyncio` counterparts of the functions in :mod:`searchdocs`.
+
+HTTP requests are made with :mod:`aiohttp`, and searching the inventory is run in an executor,
+so many lookups can be in progress at once without blocking the event loop.
+
+Each function accepts an optional :class:`aiohttp.ClientSession`.
+If no session is given, a session shared by every call in the event loop is used,
+so connections are reused between lookups.
+It is created when first needed, and closed when the event loop is shut down by :func:`asyncio.run`
+or by calling :func:`~.close_session`.
+
+The cache is shared with the synchronous functions in :mod:`searchdocs`.
+
+.. versionadded:: 0.3.0
+
+.. extras-require:: async
+	:pyproject:
+"""
+#
+#  Copyright © 2021 Dominic Davis-Foster <dominic@davis-foster.co.uk>
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+#  EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+#  MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+#  IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM,
+#  DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+#  OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE
+#  OR OTHER DEALINGS IN THE SOFTWARE.
+#
+
+# stdlib
+import asyncio
+import time
+import weakref
+from concurrent.futures import Executor
+from contextlib import asynccontextmanager
+from typing import AsyncGenerator, AsyncIterator, Dict, MutableMapping, Optional, Tuple, Union
+
+# 3rd party
+import aiohttp
+from apeye.url import URL
+from domdf_python_tools.paths import PathPlus
+
+# this package
+import searchdocs
+from searchdocs._locking import FileLock
+from searchdocs.instrumentation import span
+
+__all__ = ["close_session", "download_objects_inv", "find_url", "resolve_url"]
+
+# The number of seconds between attempts to acquire the lock for a site's cache directory.
+_LOCK_POLL_INTERVAL = 0.05
+
+# Downloads in progress for each event loop, keyed by the resolved docs URL,
+# so concurrent lookups for the same site share a single download.
+_PendingDownloads = Dict[str, "asyncio.Future[PathPlus]"]
+_pending_downloads: MutableMapping[asyncio.AbstractEventLoop, _PendingDownloads] = weakref.WeakKeyDictionary()
+
+
+# The session shared by calls which are not given a session, for each event loop,
+# and the asynchronous generator which closes it when the event loop shuts down.
+_SharedSession = Tuple[aiohttp.ClientSession, AsyncGenerator[None, None]]
+_shared_sessions: MutableMapping[asyncio.AbstractEventLoop, _SharedSession] = weakref.WeakKeyDictionary()
+
+
+@asynccontextmanager
+async def _client_session(session: Optional[aiohttp.ClientSession]) -> AsyncIterator[aiohttp.ClientSession]:
+	# Use the given session, or the event loop's shared session.
+
+	if session is not None:
+		yield session
+	else:
+		yield await _shared_session()
+
+
+async def _shared_session() -> aiohttp.ClientSession:
+	loop = asyncio.get_running_loop()
+	shared = _shared_sessions.get(loop)
+
+	if shared is None or shared[0].closed:
+		session = aiohttp.ClientSession()
+
+		# The event loop closes unfinished asynchronous generators when it shuts down, closing the session.
+		closer = _close_on_shutdown(session)
+		await closer.__anext__()
+
+		shared = _shared_sessions[loop] = (session, closer)
+
+	return shared[0]
+
+
+async def _close_on_shutdown(session: aiohttp.ClientSession) -> AsyncGenerator[None, None]:
+	try:
+		yield
+	finally:
+		await session.close()
+
+
+async def close_session() -> None:
+	"""
+	Close the session shared by calls in the running event loop which are not given a session.
+
+	This is done automatically by :func:`asyncio.run`,
+	but must be awaited before closing an event loop which is managed in another way.
+	"""
+
+	shared = _shared_sessions.pop(asyncio.get_running_loop(), None)
+
+	if shared is not None:
+		await shared[1].aclose()
+
+
+async def _acquire(lock: FileLock) -> None:
+	# Wait for the lock without blocking the event loop.
+	# Polling, rather than waiting in an executor, means a cancelled task never acquires the lock.
+
+	while not lock.acquire(blocking=False):
+		await asyncio.sleep(_LOCK_POLL_INTERVAL)
+
+
+async def resolve_url(
+		url: Union[str, URL],
+		*,
+		max_age: Optional[float] = searchdocs.DEFAULT_MAX_AGE,
+		session: Optional[aiohttp.ClientSession] = None,
+		) -> URL:
+	"""
+	Resolve any redirects in the given URL.
+
+	:param url:
+	:param max_age: The number of seconds for which a previously resolved redirect is used
+		without contacting the server. If :py:obj:`None` it is never revalidated.
+	:param session: The session to make requests with.
+	"""
+
+	# The cached redirects are read and written in an executor, as writing them waits for other processes.
+	loop = asyncio.get_running_loop()
+	resolved = await loop.run_in_executor(None, searchdocs._cached_redirect, str(url), max_age)
+
+	if resolved is None:
+		async with _client_session(session) as client:
+			async with client.head(str(url), allow_redirects=True) as response:
+				resolved = str(response.url)
+
+		await loop.run_in_executor(None, searchdocs._store_redirect, str(url), resolved)
+
+	return URL(resolved)
+
+
+async def download_objects_inv(
+		docs_url: Union[str, URL],
+		*,
+		max_age: Optional[float] = searchdocs.DEFAULT_MAX_AGE,
+		session: Optional[aiohttp.ClientSession] = None,
+		) -> PathPlus:
+	"""
+	Download the Sphinx ``objects.inv`` file for the documentation available at the given URL.
+
+	Concurrent calls for the same documentation share a single download.
+
+	:param docs_url: The base URL for the documentation, e.g. ``"https://docs.python.org/3/"``.
+	:param max_age: The number of seconds for which a previously downloaded file is used
+		without checking whether it has changed on the server.
+		If :py:obj:`None` a cached file is never revalidated.
+		If ``0`` the server is always checked.
+	:param session: The session to make requests with.
+
+	:returns: The filename of the cached file.
+	"""
+
+	async with _client_session(session) as client:
+		docs_url = await resolve_url(docs_url, max_age=max_age, session=client)
+		return await _download_objects_inv(docs_url, max_age, client)
+
+
+async def _download_objects_inv(
+		docs_url: URL,
+		max_age: Optional[float],
+		client: aiohttp.ClientSession,
+		) -> PathPlus:
+	# Like download_objects_inv, for a URL which has already been resolved.
+
+	objects_inv_file = await asyncio.get_running_loop().run_in_executor(
+			None,
+			searchdocs._fresh_objects_inv,
+			searchdocs.cache_dir_for_url(docs_url),
+			max_age,
+			)
+	if objects_inv_file is not None:
+		return objects_inv_file
+
+	pending = _pending_downloads.setdefault(asyncio.get_running_loop(), {})
+	key = str(docs_url)
+
+	if key not in pending:
+		pending[key] = asyncio.ensure_future(_fetch_objects_inv(docs_url, max_age, client))
+		pending[key].add_done_callback(lambda future: pending.pop(key, None))
+
+	return await asyncio.shield(pending[key])
+
+
+async def _fetch_objects_inv(docs_url: URL, max_age: Optional[float], client: aiohttp.ClientSession) -> PathPlus:
+	# Reading and writing the cache, and parsing and indexing the inventory, are run in an executor
+	# so they do not block the event loop.
+
+	docs_cache_dir = searchdocs.cache_dir_for_url(docs_url)
+	loop = asyncio.get_running_loop()
+
+	# Wait for any other process downloading the inventory without blocking the event loop.
+	started = time.time()
+	lock = searchdocs._site_lock(docs_cache_dir)
+	await _acquire(lock)
+
+	try:
+		objects_inv_file = await loop.run_in_executor(
+				None,
+				searchdocs._fresh_objects_inv,
+				docs_cache_dir,
+				searchdocs._validated_since(started, max_age),
+				)
+		if objects_inv_file is not None:
+			return objects_inv_file
+
+		headers = await loop.run_in_executor(None, searchdocs._conditional_headers, docs_cache_dir)
+
+		with span("download_objects_inv.request"):
+			async with client.get(str(docs_url / "objects.inv"), headers=headers) as response:
+				if response.status == 304:
+					return await loop.run_in_executor(None, searchdocs._touch_objects_inv, docs_cache_dir)
+
+				response.raise_for_status()
+
+				# Each chunk is written and parsed as it arrives, as by the synchronous download,
+				# so only one chunk at a time is held in memory.
+				download = await loop.run_in_executor(None, searchdocs._InventoryDownload, docs_cache_dir)
+
+				try:
+					async for chunk in response.content.iter_chunked(searchdocs._DOWNLOAD_CHUNK_SIZE):
+						await loop.run_in_executor(None, download.write, chunk)
+				except BaseException as e:
+					# The temporary file is removed.
+					await loop.run_in_executor(None, download.__exit__, type(e), e, e.__traceback__)
+					raise
+
+				await loop.run_in_executor(None, download.__exit__, None, None, None)
+
+		return await loop.run_in_executor(None, download.finish, response.headers)
+
+	finally:
+		lock.release()
+
+
+async def find_url(
+		docs_url: Union[str, URL],
+		search_term: str,
+		*,
+		max_age: Optional[float] = searchdocs.DEFAULT_MAX_AGE,
+		session: Optional[aiohttp.ClientSession] = None,
+		executor: Optional[Executor] = None,
+		) -> URL:
+	"""
+	Find the complete documentation URL for the given function, class, method etc.
+
+	:param docs_url: The base URL for the documentation, e.g. ``"https://docs.python.org/3/"``.
+	:param search_term: The object to search for, e.g. ``'TemporaryDirectory'``.
+	:param max_age: The number of seconds for which cached redirects and inventories are used
+		without contacting the server. If :py:obj:`None` they are never revalidated.
+	:param session: The session to make requests with.
+	:param executor: The executor to search the inventory in.
+		Defaults to the event loop's default executor.
+
+	:returns: The url of the object in the documentation.
+
+	:raises ~searchdocs.ObjectNotFoundError: If the object could not be found.
+	"""
+
+	async with _client_session(session) as client:
+		docs_url = await resolve_url(docs_url, max_age=max_age, session=client)
+		objects_inv = await _download_objects_inv(docs_url, max_age, client)
+
+	return await asyncio.get_running_loop().run_in_executor(
+			executor,
+			searchdocs._find_url_in_inventory,
+			docs_url,
+			objects_inv,
+			search_term,
+			)
@@ -0,0 +1,571 @@
+#!/usr/bin/env python3
+#
+#  cache.py
+"""
+Manage the cache of downloaded inventories, their indexes, and previous search results.
+
+The cache can be filled ahead of time with :func:`~.warm`, and copied between machines
+with :func:`~.export_cache` and :func:`~.import_cache`, for example to bake it into a container image.
+
+The size of the cache can be limited with :func:`~.collect_garbage`, which removes the
+least recently used documentation sites. If the :envvar:`SEARCHDOCS_CACHE_MAX_SIZE`
+or :envvar:`SEARCHDOCS_CACHE_MAX_AGE` environment variables are set,
+this is done automatically whenever an inventory is downloaded.
+
+.. versionadded:: 0.3.0
+"""
+#
+#  Copyright © 2021 Dominic Davis-Foster <dominic@davis-foster.co.uk>
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+#  EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+#  MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+#  IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM,
+#  DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+#  OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE
+#  OR OTHER DEALINGS IN THE SOFTWARE.
+#
+
+
+# stdlib
+import os
+import re
+import shutil
+import sqlite3
+import tarfile
+import threading
+import time
+from base64 import urlsafe_b64decode
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import PurePosixPath
+from typing import Collection, Dict, Iterable, List, NamedTuple, Optional, Sequence, Set, Tuple, Union
+
+# 3rd party
+from apeye.url import URL
+from domdf_python_tools.paths import PathPlus
+from domdf_python_tools.typing import PathLike
+
+# this package
+import searchdocs
+from searchdocs.index import index_filename, load_index
+from searchdocs.results import close_all_result_caches, close_result_cache
+
+__all__ = [
+		"GarbageCollection",
+		"SiteStats",
+		"WarmedSite",
+		"collect_garbage",
+		"export_cache",
+		"import_cache",
+		"limits_from_environment",
+		"parse_age",
+		"parse_size",
+		"site_stats",
+		"warm",
+		]
+
+
+class WarmedSite(NamedTuple):
+	"""
+	A documentation site which has been cached by :func:`~.warm`.
+	"""
+
+	#: The base URL of the documentation, after resolving any redirects.
+	docs_url: URL
+
+	#: The number of objects in the site's inventory.
+	objects: int
+
+	#: The number of search terms whose results were cached.
+	results: int
+
+
+def warm(
+		docs_urls: Iterable[Union[str, URL]],
+		search_terms: Iterable[str] = (),
+		*,
+		max_age: Optional[float] = searchdocs.DEFAULT_MAX_AGE,
+		backend: str = "python",
+		) -> List[WarmedSite]:
+	"""
+	Download and index the inventories for the given documentation, so later searches do not need to.
+
+	The sites are fetched concurrently.
+
+	:param docs_urls: The base URLs for the documentation, e.g. ``["https://docs.python.org/3/"]``.
+	:param search_terms: Search terms to look up on every site, so their results are cached too.
+	:param max_age: The number of seconds for which cached redirects and inventories are used
+		without contacting the server. If :py:obj:`None` they are never revalidated.
+	:param backend: The scoring backend to use for ``search_terms``.
+		One of :py:data:`searchdocs.search.BACKENDS`.
+
+	:returns: The cached sites, in the same order as ``docs_urls``.
+	"""
+
+	docs_urls = list(docs_urls)
+	search_terms = list(search_terms)
+
+	with ThreadPoolExecutor(max_workers=max(1, len(docs_urls))) as executor:
+		return list(
+				executor.map(
+						lambda docs_url: _warm_site(docs_url, search_terms, max_age, backend),
+						docs_urls,
+						)
+				)
+
+
+def _warm_site(
+		docs_url: Union[str, URL],
+		search_terms: Sequence[str],
+		max_age: Optional[float],
+		backend: str,
+		) -> WarmedSite:
+	resolved_url = searchdocs._resolve_url(docs_url, max_age)
+	objects_inv = searchdocs._download_objects_inv(resolved_url, max_age)
+
+	with load_index(objects_inv) as index:
+		objects = len(index)
+
+	# The redirect and inventory were validated above, so are not checked again.
+	# This runs in a worker thread, where forking a pool of worker processes could deadlock,
+	# so the search terms are scored in this thread.
+	found = searchdocs.find_urls(docs_url, search_terms, max_age=None, processes=1, backend=backend)
+	results = sum(url is not None for search_term, url in found)
+
+	return WarmedSite(resolved_url, objects, results)
+
+
+def export_cache(filename: PathLike) -> PathPlus:
+	"""
+	Write the cached documentation sites and redirects to a gzip-compressed tar archive.
+
+	Open search result caches are closed first, so their databases are complete.
+	They are reopened when next used.
+
+	:param filename: The filename of the archive.
+
+	:returns: The filename of the archive.
+	"""
+
+	filename = PathPlus(filename).abspath()
+	cache_dir = searchdocs._cache_dir()
+
+	close_all_result_caches()
+
+	redirects_file = cache_dir / "redirects.json"
+
+	with tarfile.open(filename, "w:gz") as archive:
+		if redirects_file.is_file():
+			archive.add(redirects_file, arcname=redirects_file.name, recursive=False)
+
+		for docs_url, docs_cache_dir in _site_dirs():
+			for path in sorted(docs_cache_dir.rglob('*')):
+				if path.is_file() and path.abspath() != filename and not path.name.endswith((".tmp", ".lock")):
+					archive.add(path, arcname=path.relative_to(cache_dir).as_posix(), recursive=False)
+
+	return filename
+
+
+def import_cache(filename: PathLike) -> List[URL]:
+	"""
+	Load the contents of an archive written by :func:`~.export_cache` into the cache.
+
+	The cache directory for each documentation site in the archive replaces any existing directory for that site.
+	Cached redirects are merged, keeping the most recently checked.
+
+	:param filename: The filename of the archive.
+
+	:returns: The base URLs of the documentation sites which were imported.
+
+	:raises ValueError: If the archive contains anything other than ``redirects.json``
+		and files within the cache directories for documentation sites.
+	"""
+
+	cache_dir = searchdocs._cache_dir()
+	imported: Dict[str, URL] = {}
+
+	with tarfile.open(filename, "r:*") as archive:
+		members = archive.getmembers()
+
+		for member in members:
+			parts = PurePosixPath(member.name).parts
+			if not member.isfile() or not parts or parts[0] == '/' or ".." in parts:
+				raise ValueError(f"Unexpected entry {member.name!r} in cache archive.")
+			if len(parts) == 1 and parts != ("redirects.json", ):
+				# Other files, such as server.json, belong to this machine.
+				raise ValueError(f"Unexpected entry {member.name!r} in cache archive.")
+			if len(parts) > 1 and _url_for_cache_dir(parts[0]) is None:
+				raise ValueError(f"Unexpected entry {member.name!r} in cache archive.")
+
+		for member in members:
+			parts = PurePosixPath(member.name).parts
+			fp = archive.extractfile(member)
+			assert fp is not None
+
+			with fp:
+				data = fp.read()
+
+			if parts == ("redirects.json", ):
+				_merge_redirects(data)
+				continue
+
+			if len(parts) > 1 and parts[0] not in imported:
+				imported[parts[0]] = _url_for_cache_dir(parts[0])  # type: ignore[assignment]
+				docs_cache_dir = cache_dir / parts[0]
+				if docs_cache_dir.exists():
+					with searchdocs._site_lock(docs_cache_dir):
+						close_result_cache(docs_cache_dir)
+						shutil.rmtree(docs_cache_dir)
+
+			target = cache_dir.joinpath(*parts)
+			target.parent.maybe_make(parents=True)
+			tmp_target = target.with_name(f".{target.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+			tmp_target.write_bytes(data)
+			os.replace(tmp_target, target)
+
+	return list(imported.values())
+
+
+def _url_for_cache_dir(name: str) -> Optional[URL]:
+	# The inverse of searchdocs.cache_dir_for_url, or None if the name was not produced by it.
+
+	try:
+		return URL(urlsafe_b64decode(name.encode("ascii")).decode("UTF-8"))
+	except ValueError:
+		return None
+
+
+def _merge_redirects(data: bytes) -> None:
+	# stdlib
+	import json
+
+	redirects_file = searchdocs._cache_dir() / "redirects.json"
+
+	with searchdocs._redirects_lock, searchdocs._redirects_file_lock():
+		redirects = redirects_file.load_json() if redirects_file.is_file() else {}
+
+		for url, (resolved, checked) in json.loads(data).items():
+			if url not in redirects or redirects[url][1] < checked:
+				redirects[url] = [resolved, checked]
+
+		searchdocs._dump_json(redirects_file, redirects)
+
+
+class SiteStats(NamedTuple):
+	"""
+	The space used in the cache by one documentation site.
+	"""
+
+	#: The base URL of the documentation.
+	docs_url: URL
+
+	#: The total size of the site's cached files, in bytes.
+	size: int
+
+	#: The number of search results cached on disk.
+	results: int
+
+	#: The time the site was last used, in seconds since the epoch,
+	#: or :py:obj:`None` if its inventory has not been downloaded.
+	last_used: Optional[float]
+
+
+def _site_dirs() -> Iterable[Tuple[URL, PathPlus]]:
+	cache_dir = searchdocs._cache_dir()
+
+	if cache_dir.is_dir():
+		for site_dir in sorted(cache_dir.iterdir()):
+			docs_url = _url_for_cache_dir(site_dir.name)
+			if docs_url is not None and site_dir.is_dir():
+				yield docs_url, site_dir
+
+
+def _current_objects_inv(site_dir: PathPlus) -> Optional[PathPlus]:
+	# The current objects.inv file for the site, or None if there isn't one.
+
+	try:
+		objects_inv_file = searchdocs._objects_inv_file(site_dir, (site_dir / "inventory.json").load_json()["etag"])
+	except (OSError, ValueError, KeyError):
+		return None
+
+	return objects_inv_file if objects_inv_file.is_file() else None
+
+
+def _last_used(site_dir: PathPlus) -> Optional[float]:
+	objects_inv_file = _current_objects_inv(site_dir)
+	if objects_inv_file is None:
+		return None
+
+	try:
+		return objects_inv_file.stat().st_mtime
+	except FileNotFoundError:
+		# Replaced by another process since it was found.
+		return None
+
+
+def _directory_size(directory: PathPlus) -> int:
+	size = 0
+
+	for path in directory.rglob('*'):
+		# Files may be removed by other processes while the directory is walked.
+		try:
+			if path.is_file():
+				size += path.stat().st_size
+		except FileNotFoundError:
+			continue
+
+	return size
+
+
+def _cached_results(site_dir: PathPlus) -> int:
+	# The number of results in the site's result cache.
+	# The database is opened read-only, as opening it with diskcache would write to it.
+
+	database = site_dir / "cache.db"
+	if not database.is_file():
+		return 0
+
+	connection = sqlite3.connect(f"{database.as_uri()}?mode=ro", uri=True)
+	try:
+		return connection.execute("SELECT COUNT(*) FROM Cache").fetchone()[0]
+	except sqlite3.Error:
+		return 0
+	finally:
+		connection.close()
+
+
+def site_stats() -> List[SiteStats]:
+	"""
+	Returns the space used by each documentation site in the cache, most recently used first.
+	"""
+
+	stats = [
+			SiteStats(docs_url, _directory_size(site_dir), _cached_results(site_dir), _last_used(site_dir))
+			for docs_url, site_dir in _site_dirs()
+			]
+
+	return sorted(stats, key=lambda site: -(site.last_used or 0))
+
+
+class GarbageCollection(NamedTuple):
+	"""
+	The outcome of :func:`~.collect_garbage`.
+	"""
+
+	#: The base URLs of the documentation sites removed from the cache.
+	removed: List[URL]
+
+	#: The number of bytes freed.
+	freed: int
+
+
+# Temporary files older than this, in seconds, were left by an interrupted download or write.
+_STALE_TMP_AGE = 3600
+
+# Superseded inventories which have not been used for this long, in seconds,
+# are no longer being read by other processes.
+_SUPERSEDED_AGE = 600
+
+
+def collect_garbage(
+		*,
+		max_size: Optional[int] = None,
+		max_age: Optional[float] = None,
+		keep: Collection[PathLike] = (),
+		) -> GarbageCollection:
+	"""
+	Remove unused files from the cache.
+
+	Outdated inventories and indexes, and files left by interrupted downloads, are always removed.
+	Then whole documentation sites are removed, least recently used first,
+	if they have not been used for ``max_age`` seconds or while the cache is larger than ``max_size``.
+	Sites which other processes are using are never removed.
+
+	:param max_size: The maximum total size of the cache, in bytes.
+	:param max_age: The number of seconds after which an unused site is removed.
+	:param keep: Cache directories of sites which must not be removed, for example because they are in use.
+	"""
+
+	cache_dir = searchdocs._cache_dir()
+	keep = {PathPlus(directory) for directory in keep}
+	removed: List[URL] = []
+	freed = 0
+	now = time.time()
+
+	if not cache_dir.is_dir():
+		return GarbageCollection(removed, freed)
+
+	for path in cache_dir.rglob(".*.tmp"):
+		# Temporary files are renamed into place or removed by other processes at any time.
+		try:
+			stat = path.stat()
+			if now - stat.st_mtime > _STALE_TMP_AGE:
+				path.unlink()
+				freed += stat.st_size
+		except FileNotFoundError:
+			continue
+
+	# (last used, url, directory, size)
+	sites: List[Tuple[float, URL, PathPlus, int]] = []
+
+	for docs_url, site_dir in _site_dirs():
+		objects_inv_file = _current_objects_inv(site_dir)
+
+		if objects_inv_file is None:
+			last_used = 0.0
+		else:
+			try:
+				last_used = objects_inv_file.stat().st_mtime
+			except FileNotFoundError:
+				# Replaced by another process since it was found, so the site is in use.
+				continue
+
+			freed += _remove_outdated(site_dir, {objects_inv_file.name, index_filename(objects_inv_file).name})
+
+		sites.append((last_used, docs_url, site_dir, _directory_size(site_dir)))
+
+	sites.sort(key=lambda site: site[0])
+	total_size = sum(site[3] for site in sites)
+
+	for last_used, docs_url, site_dir, size in sites:
+		if site_dir in keep:
+			continue
+
+		expired = max_age is not None and now - last_used > max_age
+		if expired or (max_size is not None and total_size > max_size):
+			# Sites which another process is downloading are skipped.
+			lock = searchdocs._site_lock(site_dir)
+			if not lock.acquire(blocking=False):
+				continue
+
+			try:
+				close_result_cache(site_dir)
+
+				with searchdocs._unused_site(site_dir) as unused:
+					# Sites which another process has open, such as a running server, are skipped.
+					if not unused:
+						continue
+
+					shutil.rmtree(site_dir, ignore_errors=True)
+			finally:
+				lock.release()
+
+			removed.append(docs_url)
+			freed += size
+			total_size -= size
+
+	if max_age is not None:
+		_remove_old_redirects(now - max_age)
+
+	return GarbageCollection(removed, freed)
+
+
+def _remove_outdated(site_dir: PathPlus, current: Set[str]) -> int:
+	# Remove inventories and indexes which have been superseded, and return the number of bytes freed.
+	# Inventories used recently may still be read by other processes, so are kept for a while.
+
+	freed = 0
+	now = time.time()
+
+	for path in site_dir.iterdir():
+		if path.is_file() and path.name not in current and path.name != "inventory.json":
+			if path.name.startswith(("cache.db", '.')):
+				continue
+
+			# An index is removed along with its inventory.
+			objects_inv_file = site_dir / path.name[:-len(".idx")] if path.name.endswith(".idx") else path
+
+			try:
+				last_used = objects_inv_file.stat().st_mtime
+			except FileNotFoundError:
+				last_used = 0.0
+
+			if now - last_used > _SUPERSEDED_AGE:
+				try:
+					size = path.stat().st_size
+					path.unlink()
+				except OSError:
+					# Removed by another process, or still open elsewhere on Windows.
+					continue
+				freed += size
+
+	return freed
+
+
+def _remove_old_redirects(checked_before: float) -> None:
+	redirects_file = searchdocs._cache_dir() / "redirects.json"
+
+	with searchdocs._redirects_lock, searchdocs._redirects_file_lock():
+		if redirects_file.is_file():
+			redirects = redirects_file.load_json()
+			redirects = {url: value for url, value in redirects.items() if value[1] >= checked_before}
+			searchdocs._dump_json(redirects_file, redirects)
+
+
+_SIZE_UNITS = {'': 1, 'K': 1 << 10, 'M': 1 << 20, 'G': 1 << 30, 'T': 1 << 40}
+_AGE_UNITS = {'': 1, 's': 1, 'm': 60, 'h': 3600, 'd': 86400, 'w': 604800}
+
+
+def parse_size(value: str) -> int:
+	"""
+	Parse a size such as ``'500M'`` or ``'2G'`` into a number of bytes.
+
+	:param value: A number, optionally followed by ``K``, ``M``, ``G`` or ``T`` (powers of 1024).
+	"""
+
+	match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([KMGT]?)(?:i?B)?\s*", value, flags=re.IGNORECASE)
+	if match is None:
+		raise ValueError(f"Invalid size {value!r}.")
+
+	return int(float(match.group(1)) * _SIZE_UNITS[match.group(2).upper()])
+
+
+def parse_age(value: str) -> float:
+	"""
+	Parse an age such as ``'30d'`` or ``'12h'`` into a number of seconds.
+
+	:param value: A number, optionally followed by ``s``, ``m``, ``h``, ``d`` or ``w``.
+	"""
+
+	match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([smhdw]?)\s*", value)
+	if match is None:
+		raise ValueError(f"Invalid age {value!r}.")
+
+	return float(match.group(1)) * _AGE_UNITS[match.group(2)]
+
+
+def limits_from_environment() -> Tuple[Optional[int], Optional[float]]:
+	"""
+	Returns the maximum size and age of the cache, from the environment.
+
+	These are set by the :envvar:`SEARCHDOCS_CACHE_MAX_SIZE` and :envvar:`SEARCHDOCS_CACHE_MAX_AGE` variables.
+
+	Each is :py:obj:`None` if the variable is not set.
+	"""
+
+	max_size = os.environ.get("SEARCHDOCS_CACHE_MAX_SIZE")
+	max_age = os.environ.get("SEARCHDOCS_CACHE_MAX_AGE")
+
+	return (
+			parse_size(max_size) if max_size else None,
+			parse_age(max_age) if max_age else None,
+			)
+
+
+def _collect_garbage_if_limited(keep: PathPlus) -> None:
+	# Called after an inventory is downloaded, which is when the cache grows the most.
+
+	max_size, max_age = limits_from_environment()
+
+	if max_size is not None or max_age is not None:
+		collect_garbage(max_size=max_size, max_age=max_age, keep=[keep])
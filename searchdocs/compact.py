@@ -0,0 +1,428 @@
+#!/usr/bin/env python3
+#
+#  compact.py
+"""
+Memory-efficient representation of a Sphinx ``objects.inv`` file.
+
+Inventories are parsed incrementally by :class:`~.InventoryParser`,
+so a file can be parsed while it is being downloaded without holding all of it in memory.
+
+.. versionadded:: 0.3.0
+"""
+#
+#  Copyright © 2021 Dominic Davis-Foster <dominic@davis-foster.co.uk>
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+#  EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+#  MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+#  IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM,
+#  DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+#  OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE
+#  OR OTHER DEALINGS IN THE SOFTWARE.
+#
+
+
+# stdlib
+import re
+import zlib
+from array import array
+from typing import Dict, Iterator, List, Optional, Tuple, Union, overload
+
+# 3rd party
+from domdf_python_tools.paths import PathPlus
+from domdf_python_tools.typing import PathLike
+from typing_extensions import Literal
+
+# this package
+from searchdocs.index import IndexEntry, _expand_uri
+
+__all__ = ["CompactInventory", "InventoryParser"]
+
+# The same patterns as used by sphobjinv, so inventories are parsed identically.
+_OBJECT = re.compile(rb"^(.+?)\s+([^\s:]+):(\S+)\s+(-?\d+)\s+?(\S*)\s+(.+?)\r?$", re.MULTILINE)
+_PROJECT = re.compile(rb"^#\s+Project:\s+(.+?)\r?$")
+_VERSION = re.compile(rb"^#\s+Version:\s+(.+?)\r?$")
+
+# The number of bytes read from a file at once.
+_CHUNK_SIZE = 1 << 16
+
+
+class CompactInventory:
+	"""
+	A Sphinx inventory which stores its objects in columns.
+
+	:class:`sphobjinv.inventory.Inventory` creates a Python object, with six string attributes,
+	for every documented object. This instead stores the names in a list, the domains and roles
+	as indices into a table of the distinct ``domain:role`` strings, the priorities in an array,
+	and the URIs packed into a single byte string. Display names are only stored where they differ
+	from the object's name, and URIs are stored abbreviated, with the ``$`` expanded when they are accessed.
+
+	:param filename: The filename of the ``objects.inv`` file. If :py:obj:`None` the inventory is empty.
+
+	:raises ValueError: If the file is not a version 2 Sphinx inventory.
+	"""
+
+	def __init__(self, filename: Optional[PathLike] = None):
+
+		#: The name of the project the inventory documents.
+		self.project: str = ''
+
+		#: The version of the project the inventory documents.
+		self.version: str = ''
+
+		self._names: List[str] = []
+		self._roles: List[str] = []
+		self._role_ids: Dict[bytes, int] = {}
+		self._role_column = array('I')
+		self._priorities = array('i')
+		self._uri_data = bytearray()
+		self._uri_offsets = array('I', [0])
+		self._dispnames: Dict[int, str] = {}
+
+		if filename is not None:
+			parser = InventoryParser(self)
+
+			with PathPlus(filename).open("rb") as fp:
+				for chunk in iter(lambda: fp.read(_CHUNK_SIZE), b''):
+					parser.feed(chunk)
+
+			parser.close()
+
+	@classmethod
+	def from_bytes(cls, data: bytes) -> "CompactInventory":
+		"""
+		Parse an inventory from the contents of an ``objects.inv`` file.
+
+		:param data:
+
+		:raises ValueError: If the data is not a version 2 Sphinx inventory.
+		"""
+
+		parser = InventoryParser(cls())
+		parser.feed(data)
+		return parser.close()
+
+	def _read_header(self, lines: List[bytes]) -> None:
+		project = _PROJECT.match(lines[1])
+		if project is not None:
+			self.project = project.group(1).decode("UTF-8")
+
+		version = _VERSION.match(lines[2])
+		if version is not None:
+			self.version = version.group(1).decode("UTF-8")
+
+	def _parse(self, text: bytes) -> None:
+		# Append the objects in the given complete (decompressed) lines of the inventory.
+
+		for match in _OBJECT.finditer(text):
+			self._append(*match.groups())
+
+	def _append(self, name: bytes, domain: bytes, role: bytes, priority: bytes, uri: bytes, dispname: bytes) -> None:
+		idx = len(self._names)
+		self._names.append(name.decode("UTF-8"))
+
+		role_key = domain + b':' + role
+		role_id = self._role_ids.get(role_key)
+		if role_id is None:
+			role_id = self._role_ids[role_key] = len(self._roles)
+			self._roles.append(role_key.decode("UTF-8"))
+
+		self._role_column.append(role_id)
+		self._priorities.append(int(priority))
+
+		self._uri_data += uri
+		self._uri_offsets.append(len(self._uri_data))
+
+		if dispname != b'-':
+			self._dispnames[idx] = dispname.decode("UTF-8")
+
+	def __len__(self) -> int:
+		return len(self._names)
+
+	@property
+	def names(self) -> List[str]:
+		"""
+		The names of the objects in the inventory, in inventory order.
+
+		This list must not be modified.
+		"""
+
+		return self._names
+
+	@property
+	def roles(self) -> List[str]:
+		"""
+		The distinct domains and roles of the objects in the inventory, e.g. ``['py:module', 'py:class']``.
+		"""
+
+		return list(self._roles)
+
+	def name(self, idx: int) -> str:
+		"""
+		Returns the name of the object at the given index.
+
+		:param idx:
+		"""
+
+		return self._names[idx]
+
+	def role(self, idx: int) -> str:
+		"""
+		Returns the domain and role of the object at the given index, e.g. ``'py:class'``.
+
+		:param idx:
+		"""
+
+		return self._roles[self._role_column[idx]]
+
+	def priority(self, idx: int) -> int:
+		"""
+		Returns the search priority of the object at the given index.
+
+		:param idx:
+		"""
+
+		return self._priorities[idx]
+
+	def uri(self, idx: int) -> str:
+		"""
+		Returns the URI of the object at the given index, as given in the inventory.
+
+		The URI may end with a ``$``, which stands for the name of the object.
+
+		:param idx:
+		"""
+
+		if idx < 0:
+			idx += len(self)
+
+		return self._uri_data[self._uri_offsets[idx]:self._uri_offsets[idx + 1]].decode("UTF-8")
+
+	def uri_expanded(self, idx: int) -> str:
+		"""
+		Returns the URI of the object at the given index, with any ``$`` expanded.
+
+		:param idx:
+		"""
+
+		return _expand_uri(self.uri(idx), self._names[idx])
+
+	def dispname_expanded(self, idx: int) -> str:
+		"""
+		Returns the display name of the object at the given index.
+
+		:param idx:
+		"""
+
+		if idx < 0:
+			idx += len(self)
+
+		return self._dispnames.get(idx, self._names[idx])
+
+	def __getitem__(self, idx: int) -> IndexEntry:
+		if not -len(self) <= idx < len(self):
+			raise IndexError("index out of range")
+
+		return IndexEntry(self.name(idx), self.role(idx), self.uri_expanded(idx))
+
+	def __iter__(self) -> Iterator[IndexEntry]:
+		for idx in range(len(self)):
+			yield self[idx]
+
+	@overload
+	def suggest_from_name(
+			self,
+			name: str,
+			*,
+			with_index: Literal[True],
+			thresh: int = ...,
+			limit: Optional[int] = ...,
+			with_score: Literal[False] = ...,
+			backend: str = ...,
+			) -> List[Tuple[str, int]]: ...
+
+	@overload
+	def suggest_from_name(
+			self,
+			name: str,
+			*,
+			with_score: Literal[True],
+			thresh: int = ...,
+			limit: Optional[int] = ...,
+			with_index: Literal[False] = ...,
+			backend: str = ...,
+			) -> List[Tuple[str, int]]: ...
+
+	@overload
+	def suggest_from_name(
+			self,
+			name: str,
+			*,
+			with_index: Literal[True],
+			with_score: Literal[True],
+			thresh: int = ...,
+			limit: Optional[int] = ...,
+			backend: str = ...,
+			) -> List[Tuple[str, int, int]]: ...
+
+	@overload
+	def suggest_from_name(
+			self,
+			name: str,
+			*,
+			thresh: int = ...,
+			limit: Optional[int] = ...,
+			with_index: Literal[False] = ...,
+			with_score: Literal[False] = ...,
+			backend: str = ...,
+			) -> List[str]: ...
+
+	def suggest_from_name(
+			self,
+			name: str,
+			*,
+			thresh: int = 50,
+			limit: Optional[int] = None,
+			with_index: bool = False,
+			with_score: bool = False,
+			backend: str = "python",
+			) -> Union[List[str], List[Tuple[str, int]], List[Tuple[str, int, int]]]:
+		"""
+		Search the names of the objects in the inventory.
+
+		This returns the same results as :meth:`searchdocs.Inventory.suggest_from_name`.
+
+		:param name: Object name to search for.
+		:param thresh: Match quality threshold
+		:param limit: The maximum number of results to return.
+		:param with_index: Whether to include the index in the inventory of each match.
+		:param with_score: Whether to include the match quality score for each matched name.
+		:param backend: The scoring backend to use. One of :py:data:`searchdocs.search.BACKENDS`.
+		"""
+
+		# this package
+		from searchdocs.search import _suggest
+
+		return _suggest(
+				self._names,
+				name,
+				thresh=thresh,
+				limit=limit,
+				with_index=with_index,
+				with_score=with_score,
+				backend=backend,
+				)
+
+
+class InventoryParser:
+	"""
+	Incremental parser for Sphinx ``objects.inv`` files.
+
+	The file is passed to :meth:`~.feed` in chunks of any size, for example as it is downloaded.
+	The zlib-compressed body is decompressed as it arrives, and each complete line is parsed
+	into the inventory straight away, so the whole file is never held in memory.
+
+	.. code-block:: python
+
+		parser = InventoryParser()
+		for chunk in response.iter_content(65536):
+			parser.feed(chunk)
+		inventory = parser.close()
+
+	:param inventory: The inventory to add the objects to. By default a new, empty, inventory is used.
+	"""
+
+	def __init__(self, inventory: Optional[CompactInventory] = None):
+		#: The inventory the objects are added to.
+		self.inventory: CompactInventory = CompactInventory() if inventory is None else inventory
+
+		self._header: List[bytes] = []
+		self._pending = b''
+		self._decompressor: Optional["zlib._Decompress"] = None
+
+	def feed(self, data: bytes) -> None:
+		"""
+		Parse the next chunk of the file.
+
+		:param data:
+
+		:raises ValueError: If the data is not a version 2 Sphinx inventory, or could not be decompressed.
+		"""
+
+		if len(self._header) < 4:
+			data = self._read_header(data)
+			if len(self._header) < 4:
+				return
+
+		if self._decompressor is not None:
+			try:
+				data = self._decompressor.decompress(data)
+			except zlib.error as e:
+				raise ValueError(f"Could not decompress the inventory: {e}") from None
+
+		self._parse_lines(data)
+
+	def _read_header(self, data: bytes) -> bytes:
+		# Consume the four header lines, and return the start of the body.
+
+		data = self._pending + data
+		self._pending = b''
+
+		while len(self._header) < 4:
+			line, newline, data = data.partition(b'\n')
+
+			if not newline:
+				self._pending = line
+				return b''
+
+			if not self._header and not line.rstrip().endswith(b"version 2"):
+				raise ValueError("Not a version 2 Sphinx inventory.")
+
+			self._header.append(line)
+
+		self.inventory._read_header(self._header)
+
+		if b"zlib" in self._header[3]:
+			self._decompressor = zlib.decompressobj()
+
+		return data
+
+	def _parse_lines(self, data: bytes) -> None:
+		# Parse the complete lines, and keep any partial line until the rest of it arrives.
+
+		data = self._pending + data
+		end = data.rfind(b'\n') + 1
+
+		self.inventory._parse(data[:end])
+		self._pending = data[end:]
+
+	def close(self) -> CompactInventory:
+		"""
+		Parse the end of the file, and return the inventory.
+
+		:raises ValueError: If the file was incomplete.
+		"""
+
+		if len(self._header) < 4:
+			raise ValueError("Not a version 2 Sphinx inventory.")
+
+		if self._decompressor is not None:
+			if not self._decompressor.eof:
+				raise ValueError("Could not decompress the inventory: the data is incomplete.")
+
+			self._pending += self._decompressor.flush()
+
+		self.inventory._parse(self._pending)
+		self._pending = b''
+
+		return self.inventory
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+#
+#  diff.py
+"""
+Compare two versions of an inventory, and keep the cached search results which the changes do not affect.
+
+When documentation is rebuilt only a few objects usually change,
+so most previous search results would be found again in the new inventory.
+Rather than discarding them all, each result is checked against the added and removed objects.
+
+.. versionadded:: 0.3.0
+"""
+#
+#  Copyright © 2021 Dominic Davis-Foster <dominic@davis-foster.co.uk>
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+#  EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+#  MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+#  IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM,
+#  DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+#  OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE
+#  OR OTHER DEALINGS IN THE SOFTWARE.
+#
+
+
+# stdlib
+from collections import Counter
+from typing import Dict, List, NamedTuple, Set, Tuple
+
+# 3rd party
+from domdf_python_tools.paths import PathPlus
+from domdf_python_tools.typing import PathLike
+from fuzzywuzzy.fuzz import ratio  # type: ignore[import-untyped]
+
+# this package
+from searchdocs.index import InventoryIndex, _suffixes, load_index, process_name
+from searchdocs.instrumentation import count
+from searchdocs.results import get_result_cache
+
+__all__ = ["InventoryDiff", "carry_over_results", "diff_indexes"]
+
+# If more objects than this have changed, checking every result against them
+# takes longer than searching again, so the results are discarded.
+_MAX_CHANGES = 1000
+
+
+class InventoryDiff(NamedTuple):
+	"""
+	The differences between two versions of an inventory.
+
+	An object whose URI or role changed is both removed and added.
+	"""
+
+	#: The indices in the new inventory of the objects which were added.
+	added: List[int]
+
+	#: The indices in the old inventory of the objects which were removed.
+	removed: List[int]
+
+	#: Mapping of indices in the old inventory to the indices of the same objects in the new inventory.
+	moved: Dict[int, int]
+
+
+def _unmatched(rows: List[Tuple[str, str, str]], other: "Counter[Tuple[str, str, str]]") -> List[int]:
+	# The indices of the rows which are not in ``other``, taking duplicates into account.
+
+	remaining = Counter(rows)
+	remaining.subtract(other)
+
+	unmatched = []
+	for idx, row in enumerate(rows):
+		if remaining[row] > 0:
+			unmatched.append(idx)
+			remaining[row] -= 1
+
+	return unmatched
+
+
+def diff_indexes(old: InventoryIndex, new: InventoryIndex) -> InventoryDiff:
+	"""
+	Compare two versions of an inventory.
+
+	:param old: The index of the previous version.
+	:param new: The index of the current version.
+	"""
+
+	old_rows = old.rows()
+	new_rows = new.rows()
+
+	if old_rows == new_rows:
+		return InventoryDiff([], [], {idx: idx for idx in range(len(old_rows))})
+
+	added = _unmatched(new_rows, Counter(old_rows))
+	removed = _unmatched(old_rows, Counter(new_rows))
+
+	positions: Dict[Tuple[str, str, str], List[int]] = {}
+	for idx in reversed(range(len(new_rows))):
+		positions.setdefault(new_rows[idx], []).append(idx)
+
+	removed_set = set(removed)
+	moved = {}
+	for idx, row in enumerate(old_rows):
+		if idx not in removed_set:
+			moved[idx] = positions[row].pop()
+
+	return InventoryDiff(added, removed, moved)
+
+
+def carry_over_results(old_objects_inv: PathLike, new_objects_inv: PathLike) -> int:
+	"""
+	Keep the cached search results for the previous version of an inventory which are still valid.
+
+	A result is discarded if the object it found was removed or changed,
+	or if an added object could be a better match for the search term.
+
+	:param old_objects_inv: The filename of the previous ``objects.inv`` file.
+	:param new_objects_inv: The filename of the current ``objects.inv`` file. Its index must already be built.
+
+	:returns: The number of results kept.
+	"""
+
+	new_objects_inv = PathPlus(new_objects_inv)
+	if not (new_objects_inv.parent / "cache.db").is_file():
+		return 0
+
+	result_cache = get_result_cache(new_objects_inv.parent, new_objects_inv)
+
+	previous = result_cache.results_for(old_objects_inv)
+	if not previous:
+		return 0
+
+	try:
+		old_index = load_index(old_objects_inv)
+	except (OSError, ValueError):
+		return 0
+
+	with old_index, load_index(new_objects_inv) as new_index:
+		diff = diff_indexes(old_index, new_index)
+
+		if len(diff.added) + len(diff.removed) > _MAX_CHANGES:
+			count("result_cache.discarded", len(previous))
+			return 0
+
+		added = [(process_name(name), _suffixes(name)) for name in map(new_index.name, diff.added)]
+		kept = 0
+
+		for search_term, (url, old_idx) in previous.items():
+			if old_idx is None or old_idx not in diff.moved:
+				continue
+
+			if not _better_match_added(search_term, old_index.name(old_idx), added):
+				result_cache.set(search_term, url, diff.moved[old_idx])
+				kept += 1
+
+	count("result_cache.carried_over", kept)
+	count("result_cache.discarded", len(previous) - kept)
+
+	return kept
+
+
+def _better_match_added(search_term: str, name: str, added: List[Tuple[str, Set[str]]]) -> bool:
+	# Whether any of the added objects could be found for search_term instead of the object called name.
+
+	query = process_name(search_term)
+	score = ratio(query, process_name(name))
+
+	for processed_name, suffixes in added:
+		if ratio(query, processed_name) >= score:
+			return True
+
+		# Dotted-suffix matches are found before fuzzy matches.
+		if score < 100 and query in suffixes:
+			return True
+
+	return False
@@ -0,0 +1,491 @@
+#!/usr/bin/env python3
+#
+#  index.py
+"""
+Compact, memory-mappable index of the objects in a Sphinx ``objects.inv`` file.
+
+The index is built once per downloaded inventory and stored alongside it in the cache.
+Subsequent lookups memory-map the index rather than decompressing and parsing ``objects.inv`` again.
+
+.. versionadded:: 0.3.0
+"""
+#
+#  Copyright © 2021 Dominic Davis-Foster <dominic@davis-foster.co.uk>
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+#  EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+#  MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+#  IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM,
+#  DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+#  OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE
+#  OR OTHER DEALINGS IN THE SOFTWARE.
+#
+
+# stdlib
+import mmap
+import os
+import re
+import struct
+import sys
+import threading
+import zlib
+from array import array
+from typing import TYPE_CHECKING, Dict, Iterable, List, NamedTuple, Optional, Sequence, Set, Tuple
+
+# 3rd party
+from domdf_python_tools.paths import PathPlus
+from domdf_python_tools.typing import PathLike
+
+# this package
+from searchdocs.instrumentation import span
+
+if TYPE_CHECKING:
+	# this package
+	from searchdocs.compact import CompactInventory
+
+__all__ = [
+		"IndexEntry",
+		"InventoryIndex",
+		"build_index",
+		"index_filename",
+		"load_index",
+		"ngrams",
+		"process_name",
+		"write_index",
+		]
+
+# Layout of the file:
+#
+# * header: magic, format version, byte order, number of sections, number of objects
+# * section table: ``(offset, length)`` for each section, in bytes from the start of the file
+# * sections, in the order given by ``_SECTIONS``:
+#
+#   * for each string column, an array of ``count + 1`` unsigned 32-bit offsets
+#     followed by the UTF-8 encoded values, each terminated by a newline.
+#     URIs are stored as in the inventory, with ``$`` expanded when they are read.
+#   * the n-gram inverted index: an array of ``n_buckets + 1`` unsigned 32-bit offsets
+#     followed by the concatenated, ascending object indices for each bucket.
+#   * the exact-name and dotted-suffix hash tables, in the same format as the n-gram index,
+#     keyed by the processed name and by each processed suffix after a ``.`` respectively.
+#   * the role partition, in the same format, keyed by each object's role (e.g. ``py:class``)
+#     and by its domain (e.g. ``py``).
+#
+# Arrays are stored in native byte order; the index lives in the local cache and
+# is rebuilt if it was written by a machine with a different byte order.
+
+_MAGIC = b"SDIX"
+_VERSION = 5
+_HEADER = struct.Struct("<4sHBBI")
+_SECTION = struct.Struct("<II")
+_BYTEORDER = 0 if sys.byteorder == "little" else 1
+
+# The string columns, in the order they are stored.
+_COLUMNS = ("name", "role", "uri")
+
+_SECTIONS = (
+		*(f"{column}_{part}" for column in _COLUMNS for part in ("offsets", "data")),
+		"gram_offsets",
+		"gram_ids",
+		"exact_offsets",
+		"exact_ids",
+		"suffix_offsets",
+		"suffix_ids",
+		"partition_offsets",
+		"partition_ids",
+		)
+
+_NON_WORD = re.compile(r"(?ui)\W")
+
+
+def process_name(name: str) -> str:
+	"""
+	Normalise a name for fuzzy matching.
+
+	Non-alphanumeric characters are replaced with spaces, and the result is lowercased and stripped.
+	This matches the default processing performed by :mod:`fuzzywuzzy`.
+
+	:param name:
+	"""
+
+	return _NON_WORD.sub(' ', name).lower().strip()
+
+
+def ngrams(processed_name: str) -> Set[str]:
+	"""
+	Returns the set of trigrams in the given name.
+
+	:param processed_name: A name which has been normalised with :func:`~.process_name`.
+	"""
+
+	padded = f"  {processed_name} "
+	return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _n_buckets(count: int) -> int:
+	# A power of two between 2**8 and 2**16, roughly matching the number of objects.
+	return 1 << max(8, min(16, count.bit_length()))
+
+
+def _bucket(key: str, n_buckets: int) -> int:
+	return zlib.crc32(key.encode("UTF-8")) & (n_buckets - 1)
+
+
+def _expand_uri(uri: str, name: str) -> str:
+	# A URI ending in ``$`` is abbreviated, and the ``$`` stands for the object's name.
+
+	if uri.endswith('$'):
+		return uri[:-1] + name
+	return uri
+
+
+def _suffixes(name: str) -> Set[str]:
+	# The processed forms of the parts of a dotted name after each dot,
+	# e.g. ``'path join'`` and ``'join'`` for ``'os.path.join'``.
+
+	parts = name.split('.')
+	return {process_name('.'.join(parts[idx:])) for idx in range(1, len(parts))} - {''}
+
+
+def _domain(role: str) -> str:
+	# The domain part of a role, e.g. ``'py'`` for ``'py:class'``.
+	return role.split(':', 1)[0]
+
+
+class IndexEntry(NamedTuple):
+	"""
+	An object in an :class:`~.InventoryIndex`.
+	"""
+
+	#: The name of the object, e.g. ``'pathlib.Path'``.
+	name: str
+
+	#: The domain and role of the object, e.g. ``'py:class'``.
+	role: str
+
+	#: The URI of the object relative to the documentation root, with any ``$`` expanded.
+	uri: str
+
+
+def index_filename(objects_inv: PathLike) -> PathPlus:
+	"""
+	Returns the filename of the index for the given ``objects.inv`` file.
+
+	:param objects_inv: The filename of the cached ``objects.inv`` file.
+	"""
+
+	objects_inv = PathPlus(objects_inv)
+	return objects_inv.parent / f"{objects_inv.name}.idx"
+
+
+def _pack_column(values: Sequence[str]) -> Tuple[bytes, bytes]:
+	offsets = array('I', [0])
+	encoded = []
+	position = 0
+
+	for value in values:
+		data = value.encode("UTF-8") + b'\n'
+		encoded.append(data)
+		position += len(data)
+		offsets.append(position)
+
+	return offsets.tobytes(), b''.join(encoded)
+
+
+def _pack_buckets(keys: Sequence[Iterable[str]]) -> Tuple[bytes, bytes]:
+	# Hash table mapping each key to the (ascending) indices of the objects it was given for.
+
+	n_buckets = _n_buckets(len(keys))
+	buckets: List[array] = [array('I') for _ in range(n_buckets)]
+
+	for idx, object_keys in enumerate(keys):
+		for bucket in {_bucket(key, n_buckets) for key in object_keys}:
+			buckets[bucket].append(idx)
+
+	offsets = array('I', [0])
+	ids = array('I')
+	for bucket_ids in buckets:
+		ids.extend(bucket_ids)
+		offsets.append(len(ids))
+
+	return offsets.tobytes(), ids.tobytes()
+
+
+def _write_index(filename: PathLike, entries: Iterable[Tuple[str, str, str]]) -> None:
+	columns: Tuple[List[str], ...] = tuple([] for _ in _COLUMNS)
+
+	for entry in entries:
+		for column, value in zip(columns, entry):
+			column.append(value)
+
+	sections: List[bytes] = []
+	for column in columns:
+		sections.extend(_pack_column(column))
+
+	processed_names = [process_name(name) for name in columns[0]]
+	sections.extend(_pack_buckets([ngrams(name) for name in processed_names]))
+	sections.extend(_pack_buckets([(name, ) for name in processed_names]))
+	sections.extend(_pack_buckets([_suffixes(name) for name in columns[0]]))
+	sections.extend(_pack_buckets([(role, _domain(role)) for role in columns[1]]))
+
+	header = _HEADER.pack(_MAGIC, _VERSION, _BYTEORDER, len(sections), len(columns[0]))
+	position = _HEADER.size + _SECTION.size * len(sections)
+	table = []
+	for section in sections:
+		table.append(_SECTION.pack(position, len(section)))
+		position += len(section)
+
+	filename = PathPlus(filename)
+	tmp_filename = filename.parent / f".{filename.name}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+	with tmp_filename.open("wb") as fp:
+		fp.write(header)
+		fp.writelines(table)
+		fp.writelines(sections)
+
+	os.replace(tmp_filename, filename)
+
+
+def build_index(objects_inv: PathLike, filename: Optional[PathLike] = None) -> PathPlus:
+	"""
+	Parse the given ``objects.inv`` file and write its index to disk.
+
+	:param objects_inv: The filename of the cached ``objects.inv`` file.
+	:param filename: The filename to write the index to.
+		Defaults to the value returned by :func:`~.index_filename`.
+
+	:returns: The filename of the index.
+	"""
+
+	# this package
+	from searchdocs.compact import CompactInventory
+
+	if filename is None:
+		filename = index_filename(objects_inv)
+
+	with span("inventory.parse"):
+		inventory = CompactInventory(objects_inv)
+
+	return write_index(inventory, filename)
+
+
+def write_index(inventory: "CompactInventory", filename: PathLike) -> PathPlus:
+	"""
+	Write the index for an inventory which has already been parsed.
+
+	:param inventory:
+	:param filename: The filename to write the index to.
+
+	:returns: The filename of the index.
+	"""
+
+	_write_index(
+			filename,
+			((inventory.name(idx), inventory.role(idx), inventory.uri(idx)) for idx in range(len(inventory))),
+			)
+
+	return PathPlus(filename)
+
+
+class InventoryIndex:
+	"""
+	Read-only view of an index built by :func:`~.build_index`.
+
+	The file is memory-mapped, and values are only decoded when they are accessed.
+
+	:param filename: The filename of the index.
+
+	:raises ValueError: If the file is not a valid index, or was written by an incompatible version.
+	"""
+
+	def __init__(self, filename: PathLike):
+		self.filename = PathPlus(filename)
+
+		with self.filename.open("rb") as fp:
+			self._mmap = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+
+		try:
+			magic, version, byteorder, n_sections, count = _HEADER.unpack_from(self._mmap)
+		except struct.error:
+			self._mmap.close()
+			raise ValueError(f"{self.filename} is not a searchdocs index.") from None
+
+		if magic != _MAGIC or version != _VERSION or byteorder != _BYTEORDER or n_sections != len(_SECTIONS):
+			self._mmap.close()
+			raise ValueError(f"{self.filename} is not a compatible searchdocs index.")
+
+		self._count: int = count
+		self._view = memoryview(self._mmap)
+		self._sections: Dict[str, memoryview] = {}
+
+		for idx, section in enumerate(_SECTIONS):
+			start, length = _SECTION.unpack_from(self._mmap, _HEADER.size + _SECTION.size * idx)
+			view = self._view[start:start + length]
+			self._sections[section] = view.cast('I') if section.endswith(("_offsets", "_ids")) else view
+
+		self._n_buckets = len(self._sections["gram_offsets"]) - 1
+		self._names: Optional[List[str]] = None
+
+	def __len__(self) -> int:
+		return self._count
+
+	def _value(self, column: str, idx: int) -> str:
+		offsets = self._sections[f"{column}_offsets"]
+		return bytes(self._sections[f"{column}_data"][offsets[idx]:offsets[idx + 1] - 1]).decode("UTF-8")
+
+	def __getitem__(self, idx: int) -> IndexEntry:
+		if idx < 0:
+			idx += self._count
+		if not 0 <= idx < self._count:
+			raise IndexError("index out of range")
+
+		name, role, uri = (self._value(column, idx) for column in _COLUMNS)
+		return IndexEntry(name, role, _expand_uri(uri, name))
+
+	@property
+	def names(self) -> List[str]:
+		"""
+		The names of the objects in the inventory, in inventory order.
+		"""
+
+		if self._names is None:
+			self._names = self._column("name")
+
+		return self._names
+
+	def _column(self, column: str) -> List[str]:
+		return bytes(self._sections[f"{column}_data"]).decode("UTF-8").split('\n')[:-1]
+
+	def rows(self) -> List[Tuple[str, str, str]]:
+		"""
+		Returns the name, role and URI of every object, in inventory order.
+
+		The URIs are abbreviated as in ``objects.inv``, with the object's name replaced by ``$``.
+		This is faster than indexing each object, for example when comparing two versions of an inventory.
+
+		.. versionadded:: 0.3.0
+		"""
+
+		return list(zip(*(self._column(column) for column in _COLUMNS)))
+
+	def name(self, idx: int) -> str:
+		"""
+		Returns the name of the object at the given index.
+
+		Unlike :attr:`~.names`, this does not decode the names of every object.
+
+		:param idx:
+
+		.. versionadded:: 0.3.0
+		"""
+
+		return self._value("name", idx)
+
+	def _bucket_ids(self, table: str, key: str) -> memoryview:
+		bucket = _bucket(key, self._n_buckets)
+		offsets = self._sections[f"{table}_offsets"]
+		return self._sections[f"{table}_ids"][offsets[bucket]:offsets[bucket + 1]]
+
+	def postings(self, gram: str) -> memoryview:
+		"""
+		Returns the indices of the objects whose names may contain the given trigram.
+
+		The result can include some objects which do not contain the trigram,
+		but never omits one which does.
+
+		:param gram: A trigram, as returned by :func:`~.ngrams`.
+		"""
+
+		return self._bucket_ids("gram", gram)
+
+	def exact_matches(self, processed_name: str) -> List[int]:
+		"""
+		Returns the indices of the objects whose names are the same as the given name once processed.
+
+		This finds case-insensitive matches, and ignores differences in punctuation.
+
+		:param processed_name: A name which has been normalised with :func:`~.process_name`.
+
+		.. versionadded:: 0.3.0
+		"""
+
+		return [idx for idx in self._bucket_ids("exact", processed_name) if process_name(self.name(idx)) == processed_name]
+
+	def suffix_matches(self, processed_name: str) -> List[int]:
+		"""
+		Returns the indices of the objects whose names end with the given name after a dot.
+
+		For example, ``'path'`` matches ``'pathlib.Path'``, and ``'path join'`` matches ``'os.path.join'``.
+
+		:param processed_name: A name which has been normalised with :func:`~.process_name`.
+
+		.. versionadded:: 0.3.0
+		"""
+
+		return [idx for idx in self._bucket_ids("suffix", processed_name) if processed_name in _suffixes(self.name(idx))]
+
+	def role_matches(self, role: str) -> List[int]:
+		"""
+		Returns the indices of the objects with the given role, in inventory order.
+
+		:param role: A domain and role, e.g. ``'py:class'`` or ``'std:label'``,
+			or a domain alone, e.g. ``'py'``, to match every role in that domain.
+
+		.. versionadded:: 0.3.0
+		"""
+
+		if ':' in role:
+			return [idx for idx in self._bucket_ids("partition", role) if self._value("role", idx) == role]
+		else:
+			return [idx for idx in self._bucket_ids("partition", role) if _domain(self._value("role", idx)) == role]
+
+	def close(self) -> None:
+		"""
+		Close the underlying memory map.
+		"""
+
+		if self._mmap.closed:
+			return
+
+		self._names = None
+		for view in (*self._sections.values(), self._view):
+			view.release()
+		self._sections = {}
+		self._mmap.close()
+
+	def __enter__(self) -> "InventoryIndex":
+		return self
+
+	def __exit__(self, *args) -> None:
+		self.close()
+
+
+def load_index(objects_inv: PathLike) -> InventoryIndex:
+	"""
+	Load the index for the given ``objects.inv`` file, building it first if required.
+
+	:param objects_inv: The filename of the cached ``objects.inv`` file.
+	"""
+
+	filename = index_filename(objects_inv)
+
+	with span("index.load"):
+		if filename.is_file():
+			try:
+				return InventoryIndex(filename)
+			except ValueError:
+				pass
+
+		with span("index.build"):
+			build_index(objects_inv, filename)
+
+		return InventoryIndex(filename)
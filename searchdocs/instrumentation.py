@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+#
+#  instrumentation.py
+"""
+Timings and counters for the stages of a lookup.
+
+Each stage of :func:`~searchdocs.find_url`, :func:`~searchdocs.download_objects_inv` etc.
+is timed as a named span, and events such as cache hits and misses are counted.
+These are reported to any registered :class:`~.Hook`.
+When no hooks are registered the overhead is negligible.
+
+.. code-block:: python
+
+	with Timings() as timings:
+		find_url("https://docs.python.org/3/", "pathlib.Path")
+
+	print(timings.report())
+
+.. versionadded:: 0.3.0
+"""
+#
+#  Copyright © 2021 Dominic Davis-Foster <dominic@davis-foster.co.uk>
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+#  EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+#  MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+#  IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM,
+#  DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+#  OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE
+#  OR OTHER DEALINGS IN THE SOFTWARE.
+#
+
+# stdlib
+import threading
+import time
+from contextlib import contextmanager
+from typing import ContextManager, Dict, Iterator, List, Tuple
+
+__all__ = ["Hook", "Timings", "count", "register_hook", "span", "unregister_hook"]
+
+
+class Hook:
+	"""
+	Base class for objects which receive timings and counters.
+
+	Subclasses should override :meth:`~.span_ended` and :meth:`~.counted`.
+	Hooks may be called from several threads at once.
+	"""
+
+	def span_ended(self, name: str, duration: float) -> None:
+		"""
+		Called when a span ends.
+
+		:param name: The name of the span, e.g. ``'download_objects_inv'``.
+		:param duration: The duration of the span, in seconds.
+		"""
+
+	def counted(self, name: str, value: int) -> None:
+		"""
+		Called when a counter is incremented.
+
+		:param name: The name of the counter, e.g. ``'result_cache.memory_hit'`` or ``'result_cache.disk_hit'``.
+		:param value: The amount the counter was incremented by.
+		"""
+
+
+# Replaced rather than modified, so it can be iterated over without a lock.
+_hooks: Tuple[Hook, ...] = ()
+_hooks_lock = threading.Lock()
+
+
+def register_hook(hook: Hook) -> None:
+	"""
+	Start sending timings and counters to ``hook``.
+
+	:param hook:
+	"""
+
+	global _hooks
+
+	with _hooks_lock:
+		_hooks = (*_hooks, hook)
+
+
+def unregister_hook(hook: Hook) -> None:
+	"""
+	Stop sending timings and counters to ``hook``.
+
+	:param hook:
+	"""
+
+	global _hooks
+
+	with _hooks_lock:
+		_hooks = tuple(registered for registered in _hooks if registered is not hook)
+
+
+class _NullSpan:
+	# Returned by span() when no hooks are registered.
+
+	def __enter__(self) -> None:
+		pass
+
+	def __exit__(self, *args) -> None:
+		pass
+
+
+_null_span = _NullSpan()
+
+
+@contextmanager
+def _timed_span(name: str) -> Iterator[None]:
+	start = time.perf_counter()
+
+	try:
+		yield
+	finally:
+		duration = time.perf_counter() - start
+		for hook in _hooks:
+			hook.span_ended(name, duration)
+
+
+def span(name: str) -> ContextManager[None]:
+	"""
+	Time the body of the ``with`` block and report it to the registered hooks.
+
+	:param name:
+	"""
+
+	if not _hooks:
+		return _null_span
+
+	return _timed_span(name)
+
+
+def count(name: str, value: int = 1) -> None:
+	"""
+	Increment a counter and report it to the registered hooks.
+
+	:param name:
+	:param value:
+	"""
+
+	for hook in _hooks:
+		hook.counted(name, value)
+
+
+class Timings(Hook):
+	"""
+	Hook which accumulates timings and counters.
+
+	When used as a context manager it is registered for the duration of the ``with`` block.
+	"""
+
+	def __init__(self):
+		#: Mapping of span names to ``(number of times, total duration)``, in the order they first ended.
+		self.spans: Dict[str, Tuple[int, float]] = {}
+
+		#: Mapping of counter names to their values.
+		self.counters: Dict[str, int] = {}
+
+		self._lock = threading.Lock()
+
+	def span_ended(self, name: str, duration: float) -> None:  # noqa: D102
+		with self._lock:
+			calls, total = self.spans.get(name, (0, 0.0))
+			self.spans[name] = (calls + 1, total + duration)
+
+	def counted(self, name: str, value: int) -> None:  # noqa: D102
+		with self._lock:
+			self.counters[name] = self.counters.get(name, 0) + value
+
+	def report(self) -> str:
+		"""
+		Returns a table of the spans and counters.
+		"""
+
+		lines: List[str] = []
+
+		if self.spans:
+			width = max(map(len, self.spans))
+			for name, (calls, total) in self.spans.items():
+				lines.append(f"{name:<{width}}  {total * 1000:9.3f} ms  ({calls}x)")
+
+		if self.counters:
+			width = max(map(len, self.counters))
+			for name, value in self.counters.items():
+				lines.append(f"{name:<{width}}  {value}")
+
+		return '\n'.join(lines)
+
+	def __enter__(self) -> "Timings":
+		register_hook(self)
+		return self
+
+	def __exit__(self, *args) -> None:
+		unregister_hook(self)
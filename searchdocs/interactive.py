@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+#
+#  interactive.py
+"""
+Interactive search, where the results are updated as each character of the query is typed.
+
+The inventory and its search index are loaded once, and each keystroke only updates the results
+for the characters which changed, so the results can be redrawn after every keystroke.
+
+.. versionadded:: 0.3.0
+"""
+#
+#  Copyright © 2021 Dominic Davis-Foster <dominic@davis-foster.co.uk>
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+#  EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+#  MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+#  IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM,
+#  DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+#  OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE
+#  OR OTHER DEALINGS IN THE SOFTWARE.
+#
+
+
+# stdlib
+import heapq
+from collections import Counter, OrderedDict
+from operator import itemgetter
+from typing import Callable, Iterable, List, Optional, Set, Union
+
+# 3rd party
+import click
+from apeye.url import URL
+
+# this package
+import searchdocs
+from searchdocs.index import load_index, ngrams, process_name
+from searchdocs.search import Match, SearchEngine
+
+__all__ = ["IncrementalSearch", "interactive_search"]
+
+# Keys, as returned by click.getchar() on POSIX and Windows terminals.
+_ENTER = {'\r', '\n'}
+_BACKSPACE = {'\x7f', '\x08'}
+_CLEAR = {'\x15'}  # Ctrl+U
+_UP = {"\x1b[A", "\x1bOA", "\xe0H", "\x00H", '\x10'}  # Ctrl+P
+_DOWN = {"\x1b[B", "\x1bOB", "\xe0P", "\x00P", '\x0e'}  # Ctrl+N
+_ESCAPE = '\x1b'
+
+
+class IncrementalSearch:
+	"""
+	Search which is updated one keystroke at a time.
+
+	Like :meth:`SearchEngine.search() <searchdocs.search.SearchEngine.search>`,
+	the objects sharing the most trigrams with the query are scored.
+	Rather than counting the shared trigrams from scratch for each query, the counts for the previous query
+	are kept, and only the trigrams added or removed by the keystroke are applied.
+	Objects whose names are the same as the query, or end with it after a dot, are always scored.
+
+	The results for recent queries are kept, so deleting characters does not search again.
+	With the ``'rapidfuzz'`` backend every object is scored for each query instead.
+
+	:param engine: The search engine for the inventory.
+	:param limit: The maximum number of results to return for each query.
+	:param thresh: Match quality threshold.
+	:param roles: If given, only objects with these roles are searched, e.g. ``['py:class', 'py:exception']``.
+	"""
+
+	#: The number of previous queries whose results are kept.
+	history_size: int = 256
+
+	def __init__(
+			self,
+			engine: SearchEngine,
+			*,
+			limit: int = 10,
+			thresh: int = 0,
+			roles: Optional[Iterable[str]] = None,
+			):
+		self.engine = engine
+		self.limit = limit
+		self.thresh = thresh
+		self._within: Optional[Set[int]] = None if roles is None else set(engine.role_indices(roles))
+		self._grams: Set[str] = set()
+		self._overlap: Counter = Counter()
+		self._history: "OrderedDict[str, List[Match]]" = OrderedDict()
+
+	def update(self, query: str) -> List[Match]:
+		"""
+		Returns the best matches for the query, after a character has been typed or deleted.
+
+		:param query: The whole query, as typed so far.
+
+		:returns: The best matches, best match first.
+		"""
+
+		processed_query = process_name(query)
+
+		# Kept up to date even when the results are reused, as the next keystroke is applied to them.
+		self._update_overlap(ngrams(processed_query) if processed_query else set())
+
+		matches = self._history.get(processed_query)
+		if matches is not None:
+			self._history.move_to_end(processed_query)
+			return matches
+
+		matches = self._rank(processed_query)
+
+		self._history[processed_query] = matches
+		while len(self._history) > self.history_size:
+			self._history.popitem(last=False)
+
+		return matches
+
+	def _update_overlap(self, grams: Set[str]) -> None:
+		index = self.engine.index
+
+		for gram in grams - self._grams:
+			self._overlap.update(index.postings(gram))
+
+		for gram in self._grams - grams:
+			postings = index.postings(gram)
+			self._overlap.subtract(postings)
+			for idx in postings:
+				if self._overlap[idx] <= 0:
+					del self._overlap[idx]
+
+		self._grams = grams
+
+	def candidate_indices(self) -> List[int]:
+		"""
+		Returns the indices of the objects sharing the most trigrams with the current query.
+		"""
+
+		overlap: Iterable = self._overlap.items()
+		if self._within is not None:
+			overlap = ((idx, count) for idx, count in overlap if idx in self._within)
+
+		return [idx for idx, count in heapq.nlargest(self.engine.candidates, overlap, key=itemgetter(1))]
+
+	def _rank(self, processed_query: str) -> List[Match]:
+		if not processed_query:
+			return []
+
+		if self.engine.backend == "rapidfuzz":
+			# Fast enough to score every object on each keystroke.
+			indices = None if self._within is None else sorted(self._within)
+			return self.engine.score(processed_query, indices, thresh=self.thresh, limit=self.limit)
+
+		index = self.engine.index
+		candidates = set(self.candidate_indices())
+		lookups = [*index.exact_matches(processed_query), *index.suffix_matches(processed_query)]
+
+		if self._within is not None:
+			candidates.update(idx for idx in lookups if idx in self._within)
+		else:
+			candidates.update(lookups)
+
+		return self.engine.score(processed_query, sorted(candidates), thresh=self.thresh, limit=self.limit)
+
+
+def _render(query: str, matches: List[Match], selected: int, roles: List[str]) -> str:
+	lines = [f"> {query}"]
+
+	for position, match in enumerate(matches):
+		line = f"{match.score:>4}  {match.name}  ({roles[position]})"
+		if position == selected:
+			lines.append(click.style(f'>{line}', bold=True, reverse=True))
+		else:
+			lines.append(f' {line}')
+
+	lines.append(click.style("Enter: open  Up/Down: select  Esc: quit", dim=True))
+
+	# Clear the screen and move the cursor to the top left first.
+	return "\x1b[2J\x1b[H" + '\n'.join(lines)
+
+
+def interactive_search(
+		docs_url: Union[str, URL],
+		query: str = '',
+		*,
+		limit: int = 10,
+		roles: Optional[Iterable[str]] = None,
+		max_age: Optional[float] = searchdocs.DEFAULT_MAX_AGE,
+		backend: str = "python",
+		getchar: Callable[[], str] = click.getchar,
+		) -> Optional[URL]:
+	"""
+	Search the documentation interactively in the terminal, and return the URL of the chosen object.
+
+	The results are shown on stderr, and redrawn after each keystroke.
+
+	:param docs_url: The base URL for the documentation, e.g. ``"https://docs.python.org/3/"``.
+	:param query: The initial query.
+	:param limit: The maximum number of results to show.
+	:param roles: If given, only objects with these roles are searched, e.g. ``['py:class', 'py:exception']``.
+	:param max_age: The number of seconds for which cached redirects and inventories are used
+		without contacting the server. If :py:obj:`None` they are never revalidated.
+	:param backend: The scoring backend to use. One of :py:data:`searchdocs.search.BACKENDS`.
+	:param getchar: The function which reads a keystroke from the terminal.
+
+	:returns: The URL of the chosen object, or :py:obj:`None` if the search was cancelled.
+	"""
+
+	docs_url = searchdocs._resolve_url(docs_url, max_age)
+	objects_inv = searchdocs._download_objects_inv(docs_url, max_age)
+
+	with load_index(objects_inv) as index, SearchEngine(index, backend=backend) as engine:
+		search = IncrementalSearch(engine, limit=limit, roles=roles)
+		selected = 0
+
+		while True:
+			matches = search.update(query)
+			selected = min(selected, max(len(matches) - 1, 0))
+			match_roles = [index[match.idx].role for match in matches]
+			click.echo(_render(query, matches, selected, match_roles), err=True)
+
+			try:
+				key = getchar()
+			except (KeyboardInterrupt, EOFError):
+				return None
+
+			if key in _ENTER:
+				if matches:
+					return docs_url / index[matches[selected].idx].uri
+			elif key == _ESCAPE:
+				return None
+			elif key in _BACKSPACE:
+				query = query[:-1]
+				selected = 0
+			elif key in _CLEAR:
+				query = ''
+				selected = 0
+			elif key in _UP:
+				selected = max(selected - 1, 0)
+			elif key in _DOWN:
+				selected += 1
+			elif key.isprintable():
+				query += key
+				selected = 0
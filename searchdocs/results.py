@@ -0,0 +1,379 @@
+#!/usr/bin/env python3
+#
+#  results.py
+"""
+Caches of previous search results, which are kept open for the lifetime of the process.
+
+Each documentation site has a :class:`~.ResultCache`, which keeps recently used results
+in memory in front of the on-disk :class:`diskcache.Cache`.
+Search terms which were not found are cached too, for a limited time.
+
+The size of the caches, and how long search terms which were not found are remembered,
+can be set with the :envvar:`SEARCHDOCS_RESULTS_MEMORY_SIZE`, :envvar:`SEARCHDOCS_RESULTS_MAX_SIZE`
+and :envvar:`SEARCHDOCS_RESULTS_NOT_FOUND_TTL` environment variables.
+
+.. versionadded:: 0.3.0
+"""
+#
+#  Copyright © 2021 Dominic Davis-Foster <dominic@davis-foster.co.uk>
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+#  EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+#  MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+#  IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM,
+#  DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+#  OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE
+#  OR OTHER DEALINGS IN THE SOFTWARE.
+#
+
+# stdlib
+import atexit
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+# 3rd party
+import diskcache  # type: ignore[import-untyped]
+from domdf_python_tools.paths import PathPlus
+from domdf_python_tools.typing import PathLike
+
+# this package
+from searchdocs.instrumentation import count
+
+__all__ = [
+		"DEFAULT_MEMORY_SIZE",
+		"DEFAULT_NOT_FOUND_TTL",
+		"DEFAULT_SIZE_LIMIT",
+		"ResultCache",
+		"close_all_result_caches",
+		"close_result_cache",
+		"get_result_cache",
+		"options_from_environment",
+		]
+
+#: The default maximum size, in bytes, of the results stored on disk for each documentation site.
+DEFAULT_SIZE_LIMIT: int = 16 * 1024 * 1024
+
+#: The default number of seconds for which a search term which was not found is remembered.
+DEFAULT_NOT_FOUND_TTL: float = 24 * 60 * 60
+
+#: The default number of results for each documentation site which are held in memory.
+DEFAULT_MEMORY_SIZE: int = 1024
+
+
+class ResultCache:
+	"""
+	Cache of the URLs found for previous searches of one documentation site.
+
+	The most recently used results are held in memory, so repeated searches do not access the database.
+	When the database exceeds ``size_limit`` the results which were stored longest ago are evicted from it.
+	Evicting the least recently stored, rather than least recently used, results means reading
+	from the database never writes to it; the results in memory already track which were used recently.
+
+	Each result is stored with the name of the inventory it was found in,
+	and results from other inventories are ignored.
+	This allows processes using different versions of the inventory to share the database.
+	When the inventory changes, results which are still valid are carried over
+	by :func:`searchdocs.diff.carry_over_results`.
+
+	Search terms which were not found are stored with the suggestions given for them,
+	so repeating the search does not score the inventory again.
+	They expire after ``not_found_ttl`` seconds, and are never carried over to a new inventory.
+
+	:param directory: The cache directory for the documentation site.
+	:param objects_inv: The filename of the ``objects.inv`` file the results were found in.
+	:param memory_size: The maximum number of results to hold in memory.
+	:param size_limit: The maximum size of the database, in bytes.
+	:param not_found_ttl: The number of seconds for which a search term which was not found is remembered.
+	"""
+
+	def __init__(
+			self,
+			directory: PathLike,
+			objects_inv: PathLike,
+			memory_size: int = DEFAULT_MEMORY_SIZE,
+			size_limit: int = DEFAULT_SIZE_LIMIT,
+			not_found_ttl: float = DEFAULT_NOT_FOUND_TTL,
+			):
+		self.directory = PathPlus(directory)
+		self.objects_inv = PathPlus(objects_inv)
+		self.memory_size = memory_size
+		self.not_found_ttl = not_found_ttl
+		self._disk = diskcache.Cache(
+				directory=str(self.directory),
+				size_limit=size_limit,
+				eviction_policy="least-recently-stored",
+				)
+		self._memory: "OrderedDict[str, str]" = OrderedDict()
+
+		# Mapping of search terms which were not found to their expiry time and suggestions.
+		self._not_found: "OrderedDict[str, Tuple[float, Tuple[str, ...]]]" = OrderedDict()
+
+		self._lock = threading.Lock()
+
+	def get(self, search_term: str) -> Optional[str]:
+		"""
+		Returns the cached URL for ``search_term``, or :py:obj:`None` if it has not been searched for.
+
+		:param search_term:
+		"""
+
+		with self._lock:
+			url = self._memory.get(search_term)
+			if url is not None:
+				self._memory.move_to_end(search_term)
+
+		if url is not None:
+			count("result_cache.memory_hit")
+			return url
+
+		value, expire_time = self._disk.get(search_term, expire_time=True)
+		url = None
+
+		if isinstance(value, tuple) and value[0] == self.objects_inv.name:
+			url = value[1]
+
+			if url is None:
+				# Remembered so get_not_found() does not read the database again.
+				self._remember_not_found(search_term, expire_time, value[2])
+
+		if url is not None:
+			count("result_cache.disk_hit")
+			self._remember(search_term, url)
+		else:
+			count("result_cache.miss")
+
+		return url
+
+	def get_not_found(self, search_term: str) -> Optional[List[str]]:
+		"""
+		Returns the suggestions given when ``search_term`` was not found.
+
+		If it is not cached as not found, :py:obj:`None` is returned.
+
+		:param search_term:
+		"""
+
+		with self._lock:
+			entry = self._not_found.get(search_term)
+			if entry is not None:
+				if entry[0] > time.time():
+					self._not_found.move_to_end(search_term)
+				else:
+					del self._not_found[search_term]
+					entry = None
+
+		if entry is None:
+			value, expire_time = self._disk.get(search_term, expire_time=True)
+			if isinstance(value, tuple) and value[0] == self.objects_inv.name and value[1] is None:
+				entry = (expire_time, value[2])
+				self._remember_not_found(search_term, *entry)
+
+		if entry is None:
+			return None
+
+		count("result_cache.not_found_hit")
+		return list(entry[1])
+
+	def set(  # noqa: A003  # pylint: disable=redefined-builtin
+			self,
+			search_term: str,
+			url: str,
+			idx: Optional[int] = None,
+			) -> None:
+		"""
+		Cache the URL found for ``search_term``.
+
+		:param search_term:
+		:param url:
+		:param idx: The index of the matching object in the inventory.
+			Without it the result is discarded when the inventory changes.
+		"""
+
+		self._disk.set(search_term, (self.objects_inv.name, url, idx))
+		self._remember(search_term, url)
+
+	def set_not_found(self, search_term: str, suggestions: Sequence[str] = ()) -> None:
+		"""
+		Cache that ``search_term`` was not found, for :attr:`~.not_found_ttl` seconds.
+
+		:param search_term:
+		:param suggestions: The names of the objects most similar to ``search_term``.
+		"""
+
+		suggestions = tuple(suggestions)
+		self._disk.set(search_term, (self.objects_inv.name, None, suggestions), expire=self.not_found_ttl)
+		self._remember_not_found(search_term, time.time() + self.not_found_ttl, suggestions)
+
+	def results_for(self, objects_inv: PathLike) -> Dict[str, Tuple[str, Optional[int]]]:
+		"""
+		Returns the results in the database which were found in another version of the inventory.
+
+		:param objects_inv: The filename of the other ``objects.inv`` file.
+
+		:returns: A mapping of search terms to the URL found and the index of the matching object.
+		"""
+
+		name = PathPlus(objects_inv).name
+		results = {}
+
+		for search_term in list(self._disk):
+			value = self._disk.get(search_term)
+			if isinstance(value, tuple) and value[0] == name and value[1] is not None:
+				results[search_term] = (value[1], value[2])
+
+		return results
+
+	def _remember(self, search_term: str, url: str) -> None:
+		with self._lock:
+			self._not_found.pop(search_term, None)
+			self._memory[search_term] = url
+			self._memory.move_to_end(search_term)
+
+			while len(self._memory) > self.memory_size:
+				self._memory.popitem(last=False)
+
+	def _remember_not_found(self, search_term: str, expire_time: float, suggestions: Tuple[str, ...]) -> None:
+		with self._lock:
+			self._memory.pop(search_term, None)
+			self._not_found[search_term] = (expire_time, suggestions)
+			self._not_found.move_to_end(search_term)
+
+			while len(self._not_found) > self.memory_size:
+				self._not_found.popitem(last=False)
+
+	def close(self) -> None:
+		"""
+		Close the database and discard the results held in memory.
+		"""
+
+		with self._lock:
+			self._memory.clear()
+			self._not_found.clear()
+
+		self._disk.close()
+
+
+_result_caches: Dict[PathPlus, ResultCache] = {}
+_registry_lock = threading.Lock()
+
+
+def options_from_environment() -> Dict[str, Any]:
+	"""
+	Returns the keyword arguments for :class:`~.ResultCache` set in the environment.
+
+	These are set by the :envvar:`SEARCHDOCS_RESULTS_MEMORY_SIZE`, :envvar:`SEARCHDOCS_RESULTS_MAX_SIZE`
+	and :envvar:`SEARCHDOCS_RESULTS_NOT_FOUND_TTL` variables.
+
+	Variables which are not set are omitted, so the defaults are used.
+	"""
+
+	# this package
+	from searchdocs.cache import parse_age, parse_size
+
+	options: Dict[str, Any] = {}
+
+	memory_size = os.environ.get("SEARCHDOCS_RESULTS_MEMORY_SIZE")
+	if memory_size:
+		options["memory_size"] = int(memory_size)
+
+	size_limit = os.environ.get("SEARCHDOCS_RESULTS_MAX_SIZE")
+	if size_limit:
+		options["size_limit"] = parse_size(size_limit)
+
+	not_found_ttl = os.environ.get("SEARCHDOCS_RESULTS_NOT_FOUND_TTL")
+	if not_found_ttl:
+		options["not_found_ttl"] = parse_age(not_found_ttl)
+
+	return options
+
+
+def get_result_cache(
+		directory: PathLike,
+		objects_inv: PathLike,
+		*,
+		memory_size: Optional[int] = None,
+		size_limit: Optional[int] = None,
+		not_found_ttl: Optional[float] = None,
+		) -> ResultCache:
+	"""
+	Returns the open :class:`~.ResultCache` for the given cache directory.
+
+	If the inventory has changed since the cache was opened the old cache is closed and a new one opened.
+
+	The remaining arguments are passed to :class:`~.ResultCache` when a new cache is opened.
+	If they are :py:obj:`None` they are taken from the environment, as by :func:`~.options_from_environment`,
+	or else the defaults are used.
+
+	:param directory: The cache directory for the documentation site.
+	:param objects_inv: The filename of the current ``objects.inv`` file.
+	:param memory_size: The maximum number of results to hold in memory.
+	:param size_limit: The maximum size of the database, in bytes.
+	:param not_found_ttl: The number of seconds for which a search term which was not found is remembered.
+	"""
+
+	directory = PathPlus(directory)
+	objects_inv = PathPlus(objects_inv)
+
+	options = options_from_environment()
+	if memory_size is not None:
+		options["memory_size"] = memory_size
+	if size_limit is not None:
+		options["size_limit"] = size_limit
+	if not_found_ttl is not None:
+		options["not_found_ttl"] = not_found_ttl
+
+	with _registry_lock:
+		result_cache = _result_caches.get(directory)
+
+		if result_cache is None or result_cache.objects_inv != objects_inv:
+			if result_cache is not None:
+				result_cache.close()
+
+			result_cache = _result_caches[directory] = ResultCache(directory, objects_inv, **options)
+
+		return result_cache
+
+
+def close_result_cache(directory: PathLike) -> None:
+	"""
+	Close the :class:`~.ResultCache` for the given cache directory, if it is open.
+
+	This must be done before the directory is removed.
+
+	:param directory: The cache directory for the documentation site.
+	"""
+
+	with _registry_lock:
+		result_cache = _result_caches.pop(PathPlus(directory), None)
+
+	if result_cache is not None:
+		result_cache.close()
+
+
+@atexit.register
+def close_all_result_caches() -> None:
+	"""
+	Close every open :class:`~.ResultCache`.
+
+	This is called automatically when the interpreter exits.
+	"""
+
+	with _registry_lock:
+		result_caches = list(_result_caches.values())
+		_result_caches.clear()
+
+	for result_cache in result_caches:
+		result_cache.close()
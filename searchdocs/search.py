@@ -0,0 +1,723 @@
+#!/usr/bin/env python3
+#
+#  search.py
+"""
+Fuzzy search over an :class:`~searchdocs.index.InventoryIndex`.
+
+When searching for the single best match, rather than scoring every object in the inventory,
+the query's trigrams are looked up in the index's inverted index, and only the objects
+sharing the most trigrams with the query are scored.
+
+Scores are computed with :func:`fuzzywuzzy.fuzz.ratio` by default.
+Passing ``backend="rapidfuzz"`` instead scores many names at once with :mod:`searchdocs.vectorised`,
+giving the same scores and ranking.
+
+.. versionadded:: 0.3.0
+"""
+#
+#  Copyright © 2021 Dominic Davis-Foster <dominic@davis-foster.co.uk>
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+#  EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+#  MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+#  IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM,
+#  DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+#  OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE
+#  OR OTHER DEALINGS IN THE SOFTWARE.
+#
+
+# stdlib
+import heapq
+import itertools
+import os
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import (
+		Any,
+		Callable,
+		Collection,
+		Dict,
+		Iterable,
+		Iterator,
+		List,
+		Mapping,
+		NamedTuple,
+		Optional,
+		Sequence,
+		Set,
+		Tuple,
+		TypeVar,
+		Union
+		)
+
+# 3rd party
+from fuzzywuzzy.fuzz import ratio  # type: ignore[import-untyped]
+
+# this package
+from searchdocs.index import InventoryIndex, ngrams, process_name
+
+__all__ = ["BACKENDS", "Match", "SearchEngine", "rank_names"]
+
+_T = TypeVar("_T")
+
+#: The scoring backends which may be selected.
+#:
+#: * ``'python'`` -- one call to :func:`fuzzywuzzy.fuzz.ratio` per name (the default).
+#: * ``'rapidfuzz'`` -- bulk scoring with :mod:`searchdocs.vectorised`. Requires the ``vectorised`` extra.
+BACKENDS = ("python", "rapidfuzz")
+
+
+def _check_backend(backend: str) -> None:
+	if backend not in BACKENDS:
+		raise ValueError(f"Unknown scoring backend {backend!r}. Choose from {', '.join(map(repr, BACKENDS))}.")
+
+
+class Match(NamedTuple):
+	"""
+	A search result.
+	"""
+
+	#: The name of the matching object.
+	name: str
+
+	#: The match quality score, between 0 and 100.
+	score: int
+
+	#: The index of the object in the inventory.
+	idx: int
+
+
+def rank_names(
+		query: str,
+		names: Sequence[str],
+		indices: Optional[Iterable[int]] = None,
+		*,
+		thresh: int = 50,
+		limit: Optional[int] = None,
+		backend: str = "python",
+		processed_names: Optional[Sequence[str]] = None,
+		) -> List[Match]:
+	"""
+	Score the query against the given names, and return the best matches.
+
+	:param query: The processed search query, as returned by :func:`~searchdocs.index.process_name`.
+	:param names: The unprocessed names to search.
+	:param indices: The indices of the names to score. By default all names are scored.
+	:param thresh: Match quality threshold.
+	:param limit: The maximum number of results to return.
+		If given, only the best ``limit`` matches are kept rather than sorting every match.
+	:param backend: The scoring backend to use. One of :py:data:`~.BACKENDS`.
+	:param processed_names: The names, already processed with :func:`~searchdocs.index.process_name`.
+		By default each name is processed as it is scored.
+
+	:returns: The matches scoring at least ``thresh``, best match first.
+		Matches with the same score are ordered by their position in ``names``.
+	"""
+
+	_check_backend(backend)
+
+	if backend == "rapidfuzz":
+		# this package
+		from searchdocs import vectorised
+
+		choices: Union[Sequence[str], Mapping[int, str]]
+		if processed_names is not None:
+			choices = processed_names
+		elif indices is None:
+			choices = [process_name(name) for name in names]
+		else:
+			indices = list(indices)
+			choices = {idx: process_name(names[idx]) for idx in indices}
+
+		top = vectorised.rank(query, choices, indices, thresh=thresh, limit=limit)
+		return [Match(names[idx], score, idx) for score, idx in top]
+
+	if indices is None:
+		indices = range(len(names))
+
+	def processed(idx: int) -> str:
+		if processed_names is None:
+			return process_name(names[idx])
+		return processed_names[idx]
+
+	def ranked() -> Iterator[Tuple[int, int]]:
+		# Negate the score so the best match sorts first, with ties broken by index.
+		for idx in indices:
+			score = ratio(query, processed(idx))
+			if score >= thresh:
+				yield -score, idx
+
+	if limit is None:
+		top = sorted(ranked())
+	else:
+		top = heapq.nsmallest(limit, ranked())
+
+	return [Match(names[idx], -score, idx) for score, idx in top]
+
+
+def _suggest(
+		names: Sequence[str],
+		name: str,
+		*,
+		thresh: int,
+		limit: Optional[int],
+		with_index: bool,
+		with_score: bool,
+		backend: str,
+		) -> Union[List[str], List[Tuple[str, int]], List[Tuple[str, int, int]]]:
+	# The implementation of ``suggest_from_name`` for the inventory classes.
+
+	processed_name = process_name(name)
+
+	# An exact match always scores 100, so the best match can be found without fuzzy scoring.
+	results: Sequence[Tuple[str, int, int]]
+	exact = None
+	if limit == 1:
+		exact = next((idx for idx, obj_name in enumerate(names) if process_name(obj_name) == processed_name), None)
+
+	if exact is not None:
+		results = [Match(names[exact], 100, exact)]
+	else:
+		results = rank_names(processed_name, names, thresh=thresh, limit=limit, backend=backend)
+
+	# Return based on flags
+	if with_score:
+		if with_index:
+			return list(results)
+		else:
+			return [tup[:2] for tup in results]
+	else:
+		if with_index:
+			return [tup[::2] for tup in results]
+		else:
+			return [tup[0] for tup in results]
+
+
+class SearchEngine:
+	"""
+	Fuzzy search engine for the objects in an inventory.
+
+	:param index:
+	:param candidates: The maximum number of objects to score for each query.
+		The objects sharing the most trigrams with the query are chosen.
+	:param exhaustive_below: If none of the candidates scores at least this much,
+		every object in the inventory is scored instead.
+		Poor matches share few trigrams with the query, so may not be among the candidates.
+	:param processes: The number of worker processes :meth:`~.best_matches` may use for large batches,
+		and :meth:`~.score` may use to score very many objects for one query.
+		By default every search is performed in the current process.
+		If :py:obj:`None` the number of CPUs is used.
+	:param backend: The scoring backend to use. One of :py:data:`~.BACKENDS`.
+		The ``'rapidfuzz'`` backend is fast enough to score every object for each query,
+		so ``candidates`` and ``exhaustive_below`` are not used, and batches are scored
+		as a single matrix of queries × names rather than in worker processes.
+
+	.. versionchanged:: 0.3.0  Added the ``processes`` and ``backend`` arguments.
+	"""
+
+	#: The minimum number of queries passed to :meth:`~.best_matches` for them to be searched in parallel.
+	parallel_threshold: int = 200
+
+	#: The minimum number of objects scored by :meth:`~.score` for one query for them to be scored in parallel.
+	parallel_score_threshold: int = 100_000
+
+	def __init__(
+			self,
+			index: InventoryIndex,
+			*,
+			candidates: int = 500,
+			exhaustive_below: int = 75,
+			processes: Optional[int] = 1,
+			backend: str = "python",
+			):
+		_check_backend(backend)
+
+		self.index = index
+		self.candidates = candidates
+		self.exhaustive_below = exhaustive_below
+		self.processes = processes or os.cpu_count() or 1
+		self.backend = backend
+		self._pool: Optional[ProcessPoolExecutor] = None
+		self._processed_names: Optional[List[str]] = None
+		self._processed_name_cache = _ProcessedNameCache(index)
+
+	@property
+	def processed_names(self) -> List[str]:
+		"""
+		The names of every object in the index, processed with :func:`~searchdocs.index.process_name`.
+
+		These are computed the first time they are needed, and reused for every subsequent query.
+		"""
+
+		if self._processed_names is None:
+			self._processed_names = [process_name(name) for name in self.index.names]
+
+		return self._processed_names
+
+	def candidate_indices(self, query: str, within: Optional[Collection[int]] = None) -> List[int]:
+		"""
+		Returns the indices of the objects which should be scored for the given query.
+
+		:param query: The processed search query, as returned by :func:`~searchdocs.index.process_name`.
+		:param within: If given, only these objects are considered.
+
+		.. versionchanged:: 0.3.0  Added the ``within`` argument.
+		"""
+
+		overlap: Counter = Counter()
+		for gram in ngrams(query):
+			overlap.update(self.index.postings(gram))
+
+		if within is not None:
+			overlap = Counter({idx: count for idx, count in overlap.items() if idx in within})
+
+		return [idx for idx, count in overlap.most_common(self.candidates)]
+
+	def role_indices(self, roles: Iterable[str]) -> List[int]:
+		"""
+		Returns the indices of the objects with any of the given roles, in inventory order.
+
+		:param roles: Domains and roles, e.g. ``'py:class'`` or ``'std:label'``,
+			or domains alone, e.g. ``'py'``. See :meth:`InventoryIndex.role_matches() <.role_matches>`.
+
+		.. versionadded:: 0.3.0
+		"""
+
+		indices: Set[int] = set()
+		for role in roles:
+			indices.update(self.index.role_matches(role))
+
+		return sorted(indices)
+
+	def score(
+			self,
+			query: str,
+			indices: Optional[Iterable[int]] = None,
+			*,
+			thresh: int = 50,
+			limit: Optional[int] = None,
+			) -> List[Match]:
+		"""
+		Score the given objects against the query.
+
+		With the ``'python'`` backend, when at least :attr:`~.parallel_score_threshold` objects are to be scored
+		they are divided into shards which are scored concurrently by a pool of worker processes.
+		Each worker memory-maps the same index file, so only the query and the range of indices
+		in each shard are sent to it, and the best matches from each shard are merged.
+		The ``'rapidfuzz'`` backend already scores the names on every CPU.
+
+		:param query: The processed search query, as returned by :func:`~searchdocs.index.process_name`.
+		:param indices: The indices of the objects to score. By default every object is scored.
+		:param thresh: Match quality threshold.
+		:param limit: The maximum number of results to return.
+
+		:returns: The matches scoring at least ``thresh``, best match first.
+			Matches with the same score are ordered by their position in the inventory.
+		"""
+
+		if self.backend == "rapidfuzz":
+			# this package
+			from searchdocs import vectorised
+
+			top = vectorised.rank(query, self.processed_names, indices, thresh=thresh, limit=limit)
+			return [Match(self.index.name(idx), score, idx) for score, idx in top]
+
+		if self.processes > 1:
+			if indices is None:
+				indices = range(len(self.index))
+			elif not isinstance(indices, Sequence):
+				indices = list(indices)
+
+			if len(indices) >= self.parallel_score_threshold:
+				return self._parallel_score(query, indices, thresh, limit)
+
+		return rank_names(
+				query,
+				self.index.names,
+				indices,
+				thresh=thresh,
+				limit=limit,
+				processed_names=self._processed_names or self._processed_name_cache,
+				)
+
+	def _parallel_score(
+			self,
+			query: str,
+			indices: Sequence[int],
+			thresh: int,
+			limit: Optional[int],
+			) -> List[Match]:
+		# Slicing a range gives a range, so the shards of the whole inventory are cheap to send to the workers.
+		shard_size = -(-len(indices) // self.processes)
+		shards = [indices[start:start + shard_size] for start in range(0, len(indices), shard_size)]
+
+		shard_matches = self._worker_pool().map(
+				_worker_score,
+				itertools.repeat(query),
+				shards,
+				itertools.repeat(thresh),
+				itertools.repeat(limit),
+				)
+
+		# Each shard is ranked best match first, with ties broken by index.
+		merged = heapq.merge(*shard_matches, key=lambda match: (-match.score, match.idx))
+		return list(itertools.islice(merged, limit))
+
+	def lookup(
+			self,
+			query: str,
+			*,
+			thresh: int = 50,
+			within: Optional[Collection[int]] = None,
+			) -> Optional[Match]:
+		"""
+		Look up the query in the exact-name and dotted-suffix indexes, without fuzzy scoring.
+
+		An object whose name is the same as the query, ignoring case and punctuation, is returned first.
+		Otherwise the best scoring object whose name ends with the query after a dot is returned,
+		e.g. ``pathlib.Path`` for ``Path``.
+
+		:param query: The processed search query, as returned by :func:`~searchdocs.index.process_name`.
+		:param thresh: Match quality threshold.
+		:param within: If given, only these objects are considered.
+
+		:returns: The match, or :py:obj:`None` if neither index contains the query.
+
+		.. versionadded:: 0.3.0
+		"""
+
+		exact = self.index.exact_matches(query)
+		if within is not None:
+			exact = [idx for idx in exact if idx in within]
+
+		if exact:
+			return Match(self.index.name(exact[0]), 100, exact[0])
+
+		suffix_matches = self.index.suffix_matches(query)
+		if within is not None:
+			suffix_matches = [idx for idx in suffix_matches if idx in within]
+
+		matches = rank_names(
+				query,
+				_NameLookup(self.index),
+				suffix_matches,
+				thresh=thresh,
+				limit=1,
+				)
+
+		return matches[0] if matches else None
+
+	def search(
+			self,
+			query: str,
+			*,
+			thresh: int = 50,
+			limit: Optional[int] = None,
+			roles: Optional[Iterable[str]] = None,
+			) -> List[Match]:
+		"""
+		Search for objects with names similar to ``query``.
+
+		:param query: Object name to search for.
+		:param thresh: Match quality threshold.
+		:param limit: The maximum number of results to return.
+		:param roles: If given, only objects with these roles are searched,
+			e.g. ``['py:class', 'py:exception']``. See :meth:`~.role_indices`.
+
+		:returns: The best matches, best match first.
+
+		When ``limit`` is ``1`` only the objects sharing the most trigrams with the query are scored,
+		unless none of them scores at least ``exhaustive_below``.
+		Otherwise every object (with one of the given ``roles``) is scored, so the ranking is complete.
+
+		.. versionchanged:: 0.3.0
+
+			* When ``limit`` is ``1`` exact and dotted-suffix matches are found with :meth:`~.lookup`
+			  before falling back to fuzzy scoring.
+			* Added the ``roles`` argument.
+		"""
+
+		processed_query = process_name(query)
+
+		# Objects with other roles are excluded before scoring, so they are never scored.
+		indices: Optional[List[int]] = None
+		within: Optional[Set[int]] = None
+		if roles is not None:
+			indices = self.role_indices(roles)
+			within = set(indices)
+
+		if limit != 1:
+			return self.score(processed_query, indices, thresh=thresh, limit=limit)
+
+		match = self.lookup(processed_query, thresh=thresh, within=within)
+		if match is not None:
+			return [match]
+
+		return self._best_first(processed_query, indices, within, thresh=thresh, limit=limit)
+
+	def _best_first(
+			self,
+			processed_query: str,
+			indices: Optional[List[int]],
+			within: Optional[Set[int]],
+			*,
+			thresh: int,
+			limit: int,
+			) -> List[Match]:
+		# Score the candidates, or every object if none of them is a good match.
+		# Only the first match is certain to be the best: objects which are not candidates
+		# may score more than the later ones.
+
+		if self.backend != "rapidfuzz":
+			candidates = self.candidate_indices(processed_query, within)
+			matches = self.score(processed_query, candidates, thresh=thresh, limit=limit)
+
+			if matches and matches[0].score >= self.exhaustive_below:
+				return matches
+
+		return self.score(processed_query, indices, thresh=thresh, limit=limit)
+
+	def best_match(
+			self,
+			query: str,
+			*,
+			thresh: int = 50,
+			suggestions: int = 5,
+			suggestion_thresh: int = 30,
+			) -> Tuple[Optional[Match], List[Match]]:
+		"""
+		Returns the best match for the query, or suggestions if there is no good match.
+
+		If nothing scores at least ``thresh`` the objects most similar to the query are returned as suggestions.
+
+		The best match is the same as the one returned by :meth:`~.search` with ``limit=1``.
+		The suggestions are found by the same search, so a query which is not found is only searched once.
+
+		:param query: Object name to search for.
+		:param thresh: Match quality threshold.
+		:param suggestions: The maximum number of suggestions to return.
+		:param suggestion_thresh: The score suggestions must reach.
+
+		:returns: A tuple of the best match, or :py:obj:`None`, and the suggestions, best first.
+		"""
+
+		processed_query = process_name(query)
+
+		match = self.lookup(processed_query, thresh=thresh)
+		if match is not None:
+			return match, []
+
+		matches = self._best_first(
+				processed_query,
+				None,
+				None,
+				thresh=min(thresh, suggestion_thresh),
+				limit=max(suggestions, 1),
+				)
+		if matches and matches[0].score >= thresh:
+			return matches[0], []
+
+		# Nothing scored at least ``thresh`` so, unless that is above ``exhaustive_below``, every object was scored.
+		return None, matches[:suggestions]
+
+	def best_matches(self, queries: Sequence[str], *, thresh: int = 50) -> List[Optional[Match]]:
+		"""
+		Returns the best match for each of the given queries.
+
+		Large batches are divided between a pool of worker processes,
+		each of which memory-maps the same index file.
+
+		:param queries: The object names to search for.
+		:param thresh: Match quality threshold.
+
+		:returns: A list containing the best match for each query,
+			or :py:obj:`None` where nothing scored at least ``thresh``.
+		"""
+
+		if self.backend == "rapidfuzz":
+			return self._vectorised_best_matches(queries, thresh)
+
+		return self._map(_best_match, queries, thresh)
+
+	def best_matches_with_suggestions(
+			self,
+			queries: Sequence[str],
+			*,
+			thresh: int = 50,
+			suggestions: int = 5,
+			suggestion_thresh: int = 30,
+			) -> List[Tuple[Optional[Match], List[Match]]]:
+		"""
+		Returns the result of :meth:`~.best_match` for each of the given queries.
+
+		Large batches are divided between a pool of worker processes, as by :meth:`~.best_matches`.
+
+		:param queries: The object names to search for.
+		:param thresh: Match quality threshold.
+		:param suggestions: The maximum number of suggestions to return for each query which is not found.
+		:param suggestion_thresh: The score suggestions must reach.
+		"""
+
+		if self.backend == "rapidfuzz":
+			results: List[Tuple[Optional[Match], List[Match]]] = []
+
+			for query, match in zip(queries, self._vectorised_best_matches(queries, thresh)):
+				if match is not None:
+					results.append((match, []))
+				else:
+					# Scored in bulk, so these are cheap compared to the pool's overhead.
+					results.append((None, self.search(query, thresh=suggestion_thresh, limit=suggestions)))
+
+			return results
+
+		return self._map(_best_match_with_suggestions, queries, thresh, suggestions, suggestion_thresh)
+
+	def _map(self, func: Callable[..., _T], queries: Sequence[str], *args: Any) -> List[_T]:
+		# Returns func(engine, query, *args) for each query, in worker processes for large batches.
+
+		if self.processes == 1 or len(queries) < self.parallel_threshold:
+			return [func(self, query, *args) for query in queries]
+
+		chunksize = max(1, len(queries) // (self.processes * 4))
+		return list(
+				self._worker_pool().map(
+						_call_in_worker,
+						itertools.repeat(func),
+						queries,
+						*map(itertools.repeat, args),
+						chunksize=chunksize,
+						)
+				)
+
+	def _worker_pool(self) -> ProcessPoolExecutor:
+		# The pool is started the first time it is needed, and shared by best_matches and score.
+
+		if self._pool is None:
+			self._pool = ProcessPoolExecutor(
+					max_workers=self.processes,
+					initializer=_init_worker,
+					initargs=(str(self.index.filename), self.candidates, self.exhaustive_below),
+					)
+
+		return self._pool
+
+	def _vectorised_best_matches(self, queries: Sequence[str], thresh: int) -> List[Optional[Match]]:
+		# this package
+		from searchdocs import vectorised
+
+		results: List[Optional[Match]] = []
+		unmatched: Dict[int, str] = {}
+
+		for position, query in enumerate(queries):
+			processed_query = process_name(query)
+			results.append(self.lookup(processed_query, thresh=thresh))
+			if results[-1] is None:
+				unmatched[position] = processed_query
+
+		if unmatched:
+			best = vectorised.best_matches(list(unmatched.values()), self.processed_names, thresh=thresh)
+
+			for position, match in zip(unmatched, best):
+				if match is not None:
+					score, idx = match
+					results[position] = Match(self.index.name(idx), score, idx)
+
+		return results
+
+	def close(self) -> None:
+		"""
+		Shut down any worker processes started by :meth:`~.best_matches` or :meth:`~.score`.
+
+		The index is not closed.
+		"""
+
+		if self._pool is not None:
+			self._pool.shutdown()
+			self._pool = None
+
+	def __enter__(self) -> "SearchEngine":
+		return self
+
+	def __exit__(self, *args) -> None:
+		self.close()
+
+
+class _NameLookup(Sequence[str]):
+	# Decodes only the names which are looked up, rather than every name in the index.
+
+	def __init__(self, index: InventoryIndex):
+		self._index = index
+
+	def __getitem__(self, idx):
+		return self._index.name(idx)
+
+	def __len__(self) -> int:
+		return len(self._index)
+
+
+class _ProcessedNameCache(Sequence[str]):
+	# Processes only the names which are scored, and remembers them for subsequent queries.
+
+	def __init__(self, index: InventoryIndex):
+		self._index = index
+		self._processed: Dict[int, str] = {}
+
+	def __getitem__(self, idx):
+		try:
+			return self._processed[idx]
+		except KeyError:
+			processed = self._processed[idx] = process_name(self._index.name(idx))
+			return processed
+
+	def __len__(self) -> int:
+		return len(self._index)
+
+
+def _best_match(engine: SearchEngine, query: str, thresh: int) -> Optional[Match]:
+	matches = engine.search(query, thresh=thresh, limit=1)
+	return matches[0] if matches else None
+
+
+# The search engine for the index being searched by a worker process.
+_worker_engine: Optional[SearchEngine] = None
+
+
+def _init_worker(filename: str, candidates: int, exhaustive_below: int) -> None:
+	global _worker_engine
+
+	_worker_engine = SearchEngine(
+			InventoryIndex(filename),
+			candidates=candidates,
+			exhaustive_below=exhaustive_below,
+			processes=1,
+			)
+
+
+def _best_match_with_suggestions(
+		engine: SearchEngine,
+		query: str,
+		thresh: int,
+		suggestions: int,
+		suggestion_thresh: int,
+		) -> Tuple[Optional[Match], List[Match]]:
+	return engine.best_match(query, thresh=thresh, suggestions=suggestions, suggestion_thresh=suggestion_thresh)
+
+
+def _call_in_worker(func: Callable[..., _T], query: str, *args: Any) -> _T:
+	assert _worker_engine is not None
+	return func(_worker_engine, query, *args)
+
+
+def _worker_score(query: str, indices: Sequence[int], thresh: int, limit: Optional[int]) -> List[Match]:
+	assert _worker_engine is not None
+	return _worker_engine.score(query, indices, thresh=thresh, limit=limit)
@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+#
+#  server.py
+"""
+Long-running search server which keeps inventories and their search indexes in memory.
+
+The server listens for HTTP requests on the loopback interface.
+While it is running, the ``searchdocs`` command sends searches to it rather than
+loading the inventory itself.
+
+.. versionadded:: 0.3.0
+"""
+#
+#  Copyright © 2021 Dominic Davis-Foster <dominic@davis-foster.co.uk>
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+#  EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+#  MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+#  IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM,
+#  DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+#  OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE
+#  OR OTHER DEALINGS IN THE SOFTWARE.
+#
+
+# stdlib
+import http.client
+import json
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional, Tuple, Union
+from urllib.parse import parse_qs, urlencode, urlsplit
+
+# 3rd party
+from apeye.url import URL
+from domdf_python_tools.paths import PathPlus
+
+# this package
+import searchdocs
+from searchdocs.index import load_index
+from searchdocs.instrumentation import span
+from searchdocs.results import get_result_cache
+
+__all__ = ["SearchServer", "find_url_from_server", "server_file"]
+
+
+def server_file() -> PathPlus:
+	"""
+	Returns the path to the file recording the address of the running server.
+	"""
+
+	return searchdocs.cache_dir / "server.json"
+
+
+class _Site:
+	# The resident state for one documentation site.
+
+	def __init__(self, docs_url: URL, objects_inv: PathPlus):
+		# this package
+		from searchdocs.search import SearchEngine
+
+		self.docs_url = docs_url
+		self.objects_inv = objects_inv
+		self.index = load_index(objects_inv)
+		self.engine = SearchEngine(self.index)
+		self.search_result_cache = get_result_cache(searchdocs.cache_dir_for_url(docs_url), objects_inv)
+
+	def find_url(self, search_term: str) -> URL:
+		cached = self.search_result_cache.get(search_term)
+		if cached is not None:
+			return URL(cached)
+
+		suggestions = self.search_result_cache.get_not_found(search_term)
+		if suggestions is not None:
+			raise searchdocs.ObjectNotFoundError(search_term, suggestions)
+
+		match, near_matches = self.engine.best_match(search_term)
+		if match is None:
+			raise searchdocs._not_found(search_term, near_matches, self.search_result_cache)
+
+		url = self.docs_url / self.index[match.idx].uri
+		self.search_result_cache.set(search_term, str(url), match.idx)
+		return url
+
+	def close(self) -> None:
+		self.engine.close()
+		self.index.close()
+
+
+class SearchServer(ThreadingHTTPServer):
+	"""
+	HTTP server which answers searches using inventories held in memory.
+
+	The server answers ``GET`` requests to ``/find_url``, with the query parameters
+	``docs_url``, ``search_term`` and optionally ``max_age``.
+	The response is a JSON object with either a ``url`` or an ``error`` key.
+
+	:param port: The port to listen on. By default a free port is chosen.
+	"""
+
+	daemon_threads = True
+
+	def __init__(self, port: int = 0):
+		super().__init__(("127.0.0.1", port), _RequestHandler)
+		self._sites: Dict[str, _Site] = {}
+		self._lock = threading.Lock()
+
+	@property
+	def url(self) -> str:
+		"""
+		The URL the server is listening on.
+		"""
+
+		host, port = self.socket.getsockname()[:2]
+		return f"http://{host}:{port}/"
+
+	def find_url(
+			self,
+			docs_url: str,
+			search_term: str,
+			max_age: Optional[float] = searchdocs.DEFAULT_MAX_AGE,
+			) -> URL:
+		"""
+		Find the complete documentation URL for the given function, class, method etc.
+
+		The inventory for ``docs_url`` is loaded the first time it is searched, and reloaded if it changes.
+
+		:param docs_url: The base URL for the documentation, e.g. ``"https://docs.python.org/3/"``.
+		:param search_term: The object to search for, e.g. ``'TemporaryDirectory'``.
+		:param max_age: The number of seconds for which cached redirects and inventories are used
+			without contacting the server. If :py:obj:`None` they are never revalidated.
+		"""
+
+		resolved_url = searchdocs._resolve_url(docs_url, max_age)
+		objects_inv = searchdocs._download_objects_inv(resolved_url, max_age)
+
+		with self._lock:
+			site = self._sites.get(str(resolved_url))
+
+			if site is None or site.objects_inv != objects_inv:
+				# The previous site may still be in use by another request,
+				# so it is left to be closed when garbage collected.
+				site = self._sites[str(resolved_url)] = _Site(resolved_url, objects_inv)
+
+		return site.find_url(search_term)
+
+	def serve(self) -> None:
+		"""
+		Record the server's address in :func:`~.server_file` and handle requests until interrupted.
+		"""
+
+		host, port = self.socket.getsockname()[:2]
+
+		searchdocs._dump_json(server_file(), {"host": host, "port": port, "pid": os.getpid()})
+
+		try:
+			self.serve_forever()
+		finally:
+			if server_file().is_file() and server_file().load_json().get("pid") == os.getpid():
+				server_file().unlink()
+
+	def server_close(self) -> None:  # noqa: D102
+		super().server_close()
+
+		with self._lock:
+			for site in self._sites.values():
+				site.close()
+			self._sites.clear()
+
+
+class _RequestHandler(BaseHTTPRequestHandler):
+
+	server: SearchServer
+
+	def log_message(self, format: str, *args: Any) -> None:  # noqa: A002  # pylint: disable=redefined-builtin
+		pass
+
+	def _send_json(self, status: int, data: Dict[str, Any]) -> None:
+		body = json.dumps(data).encode("UTF-8")
+		self.send_response(status)
+		self.send_header("Content-Type", "application/json")
+		self.send_header("Content-Length", str(len(body)))
+		self.end_headers()
+		self.wfile.write(body)
+
+	def do_GET(self) -> None:
+		url = urlsplit(self.path)
+		params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+
+		if url.path != "/find_url" or "docs_url" not in params or "search_term" not in params:
+			self._send_json(400, {"error": "Expected a 'docs_url' and 'search_term'."})
+			return
+
+		max_age: Optional[float]
+		if "max_age" not in params:
+			max_age = searchdocs.DEFAULT_MAX_AGE
+		elif params["max_age"] == "none":
+			max_age = None
+		else:
+			try:
+				max_age = float(params["max_age"])
+			except ValueError:
+				self._send_json(400, {"error": "Expected 'max_age' to be a number or 'none'."})
+				return
+
+		try:
+			result = self.server.find_url(params["docs_url"], params["search_term"], max_age)
+		except searchdocs.ObjectNotFoundError as e:
+			self._send_json(404, {"error": str(e), "search_term": e.search_term, "suggestions": e.suggestions})
+		except Exception as e:  # pylint: disable=broad-except
+			self._send_json(500, {"error": f"{type(e).__name__}: {e}"})
+		else:
+			self._send_json(200, {"url": str(result)})
+
+
+def _server_address() -> Optional[Tuple[str, int]]:
+	try:
+		data = server_file().load_json()
+		return data["host"], data["port"]
+	except (OSError, ValueError, KeyError):
+		return None
+
+
+def find_url_from_server(
+		docs_url: Union[str, URL],
+		search_term: str,
+		*,
+		max_age: Optional[float] = searchdocs.DEFAULT_MAX_AGE,
+		timeout: float = 5,
+		) -> Optional[URL]:
+	"""
+	Ask the running :class:`~.SearchServer`, if any, for the documentation URL of the given object.
+
+	:param docs_url: The base URL for the documentation, e.g. ``"https://docs.python.org/3/"``.
+	:param search_term: The object to search for, e.g. ``'TemporaryDirectory'``.
+	:param max_age: The number of seconds for which cached redirects and inventories are used
+		without contacting the documentation server. If :py:obj:`None` they are never revalidated.
+	:param timeout: The number of seconds to wait for the search server to respond.
+
+	:returns: The url of the object in the documentation,
+		or :py:obj:`None` if no server is running, it could not be contacted, or it failed to search.
+
+	:raises ~searchdocs.ObjectNotFoundError: If the object could not be found.
+	"""
+
+	address = _server_address()
+	if address is None:
+		return None
+
+	params = {
+			"docs_url": str(docs_url),
+			"search_term": search_term,
+			"max_age": "none" if max_age is None else str(max_age),
+			}
+
+	connection = http.client.HTTPConnection(*address, timeout=timeout)
+
+	try:
+		with span("server.find_url"):
+			connection.request("GET", f"/find_url?{urlencode(params)}")
+			response = connection.getresponse()
+			data = json.loads(response.read())
+	except (OSError, ValueError, http.client.HTTPException):
+		return None
+	finally:
+		connection.close()
+
+	if response.status == 404 and isinstance(data, dict):
+		raise searchdocs.ObjectNotFoundError(data.get("search_term", search_term), data.get("suggestions", ()))
+	elif response.status != 200:
+		return None
+
+	return URL(data["url"])
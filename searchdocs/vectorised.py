@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+#
+#  vectorised.py
+"""
+Scoring backend which computes the similarity of many queries and names at once.
+
+The scores are the same as those given by :func:`fuzzywuzzy.fuzz.ratio`,
+but are computed for a whole matrix of queries × names with :func:`rapidfuzz.process.cdist`,
+rather than with one Python function call per pair.
+
+This backend is selected with ``backend="rapidfuzz"``.
+
+.. versionadded:: 0.3.0
+
+.. extras-require:: vectorised
+	:pyproject:
+"""
+#
+#  Copyright © 2021 Dominic Davis-Foster <dominic@davis-foster.co.uk>
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+#  EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+#  MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+#  IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM,
+#  DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+#  OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE
+#  OR OTHER DEALINGS IN THE SOFTWARE.
+#
+
+
+# stdlib
+from typing import Iterable, List, Mapping, Optional, Sequence, Tuple, Union, cast
+
+# 3rd party
+import numpy
+from rapidfuzz.distance import Indel
+from rapidfuzz.process import cdist
+
+__all__ = ["best_matches", "rank", "score_matrix"]
+
+# The maximum number of scores computed at once by best_matches, to bound its memory usage.
+_MAX_CELLS = 1 << 22
+
+
+def score_matrix(queries: Sequence[str], names: Sequence[str]) -> numpy.ndarray:
+	"""
+	Score every query against every name.
+
+	:param queries: The processed search queries, as returned by :func:`~searchdocs.index.process_name`.
+	:param names: The processed names to score.
+
+	:returns: An array of shape ``(len(queries), len(names))`` containing the match quality scores,
+		between 0 and 100.
+	"""
+
+	distances = cdist(queries, names, scorer=Indel.distance, dtype=numpy.int32, workers=-1)
+
+	query_lengths = numpy.fromiter(map(len, queries), dtype=numpy.int64, count=len(queries))
+	name_lengths = numpy.fromiter(map(len, names), dtype=numpy.int64, count=len(names))
+	total_lengths = query_lengths[:, None] + name_lengths[None, :]
+
+	# The same arithmetic, and rounding half to even, as fuzzywuzzy, so the scores are identical.
+	with numpy.errstate(divide="ignore", invalid="ignore"):
+		scores = numpy.rint(100.0 * (1.0 - distances / total_lengths))
+
+	# fuzzywuzzy scores an empty string as 0, unless both strings are empty.
+	empty_queries = (query_lengths == 0)[:, None]
+	empty_names = (name_lengths == 0)[None, :]
+	scores[empty_queries | empty_names] = 0
+	scores[empty_queries & empty_names] = 100
+
+	return scores.astype(numpy.int32)
+
+
+def _ranked(scores: numpy.ndarray, indices: numpy.ndarray, thresh: int) -> numpy.ndarray:
+	# Positions in ``scores`` scoring at least ``thresh``, best first with ties broken by index.
+
+	above = numpy.flatnonzero(scores >= thresh)
+	return above[numpy.lexsort((indices[above], -scores[above]))]
+
+
+def rank(
+		query: str,
+		names: Union[Sequence[str], Mapping[int, str]],
+		indices: Optional[Iterable[int]] = None,
+		*,
+		thresh: int = 50,
+		limit: Optional[int] = None,
+		) -> List[Tuple[int, int]]:
+	"""
+	Score the query against the given names, and return the best matches.
+
+	The matches are ranked in the same way as by :func:`searchdocs.search.rank_names`.
+
+	:param query: The processed search query, as returned by :func:`~searchdocs.index.process_name`.
+	:param names: The processed names to search.
+		If ``indices`` is given this may instead be a mapping of indices to names.
+	:param indices: The indices of the names to score. By default all names are scored.
+	:param thresh: Match quality threshold.
+	:param limit: The maximum number of results to return.
+
+	:returns: A list of ``(score, index)`` tuples for the matches scoring at least ``thresh``, best match first.
+	"""
+
+	if indices is None:
+		index_array = numpy.arange(len(names))
+		choices = cast(Sequence[str], names)
+	else:
+		index_array = numpy.fromiter(indices, dtype=numpy.int64)
+		choices = [names[idx] for idx in index_array.tolist()]
+
+	if not len(index_array):
+		return []
+
+	scores = score_matrix([query], choices)[0]
+	order = _ranked(scores, index_array, thresh)[:limit]
+
+	return list(zip(scores[order].tolist(), index_array[order].tolist()))
+
+
+def best_matches(
+		queries: Sequence[str],
+		names: Sequence[str],
+		*,
+		thresh: int = 50,
+		) -> List[Optional[Tuple[int, int]]]:
+	"""
+	Returns the best match among ``names`` for each of the given queries.
+
+	The queries are scored against the names in blocks, to bound the size of the score matrix.
+
+	:param queries: The processed search queries, as returned by :func:`~searchdocs.index.process_name`.
+	:param names: The processed names to search.
+	:param thresh: Match quality threshold.
+
+	:returns: A list containing a ``(score, index)`` tuple for the best match for each query,
+		or :py:obj:`None` where nothing scored at least ``thresh``.
+	"""
+
+	results: List[Optional[Tuple[int, int]]] = []
+
+	if not names:
+		return [None] * len(queries)
+
+	block_size = max(1, _MAX_CELLS // len(names))
+
+	for start in range(0, len(queries), block_size):
+		scores = score_matrix(queries[start:start + block_size], names)
+
+		# argmax returns the first, i.e. lowest index, of the best scoring names.
+		best = scores.argmax(axis=1)
+		best_scores = scores[numpy.arange(len(best)), best]
+
+		for score, idx in zip(best_scores.tolist(), best.tolist()):
+			results.append((score, idx) if score >= thresh else None)
+
+	return results
@@ -1,5 +1,69 @@
+# stdlib
+from typing import Iterator
+
+# 3rd party
+import pytest
+from apeye.url import URL
+from domdf_python_tools.paths import PathPlus
+
 # this package
+import searchdocs
+from benchmarks.fixtures import DocsServer, write_objects_inv
 from searchdocs import cache_dir_for_url
 from searchdocs.__main__ import DOCS_PYTHON_ORG
+from searchdocs.results import close_all_result_caches
+
+pytest_plugins = ("coincidence", )
 
 (cache_dir_for_url(DOCS_PYTHON_ORG) / "cache.db").unlink(missing_ok=True)
+
+# name, domain, role, uri
+OBJECTS = [
+		("pathlib", "py", "module", "library/pathlib.html#module-$"),
+		("pathlib.Path", "py", "class", "library/pathlib.html#$"),
+		("zipfile.Path", "py", "class", "library/zipfile.html#$"),
+		("dict", "py", "class", "library/stdtypes.html#$"),
+		("dict.clear", "py", "method", "library/stdtypes.html#$"),
+		("typing.Dict", "py", "data", "library/typing.html#$"),
+		("list", "py", "class", "library/stdtypes.html#$"),
+		("set", "py", "class", "library/stdtypes.html#$"),
+		("decimal", "py", "module", "library/decimal.html#module-$"),
+		("decimal.Decimal", "py", "class", "library/decimal.html#$"),
+		("difflib.get_close_matches", "py", "function", "library/difflib.html#$"),
+		("ValueError", "py", "exception", "library/exceptions.html#$"),
+		("KeyError", "py", "exception", "library/exceptions.html#$"),
+		("sum", "py", "function", "library/functions.html#$"),
+		("sorting-howto", "std", "label", "howto/sorting.html#$"),
+		]
+
+
+def make_objects_inv(filename: PathPlus, objects=OBJECTS) -> PathPlus:
+	return write_objects_inv(filename, objects, project="Demo")
+
+
+def cached_objects_inv(docs_url: URL, etag: str = "abc123") -> PathPlus:
+	# The filename of the cached objects.inv file for the site, when the server sent the given ETag.
+	return searchdocs._objects_inv_file(cache_dir_for_url(docs_url), etag)
+
+
+@pytest.fixture()
+def objects_inv(tmp_pathplus: PathPlus) -> PathPlus:
+	return make_objects_inv(tmp_pathplus / "objects.inv")
+
+
+@pytest.fixture()
+def tmp_cache_dir(tmp_pathplus: PathPlus, monkeypatch) -> Iterator[PathPlus]:
+	cache_dir = tmp_pathplus / "cache"
+	cache_dir.maybe_make()
+	monkeypatch.setattr(searchdocs, "cache_dir", cache_dir)
+	cache_dir_for_url.cache_clear()
+	yield cache_dir
+	close_all_result_caches()
+	searchdocs._stop_using_sites()
+	cache_dir_for_url.cache_clear()
+
+
+@pytest.fixture()
+def docs_server(objects_inv: PathPlus, tmp_cache_dir: PathPlus) -> Iterator[DocsServer]:
+	with DocsServer(objects_inv) as server:
+		yield server
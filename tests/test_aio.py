@@ -0,0 +1,173 @@
+# stdlib
+import asyncio
+import threading
+
+# 3rd party
+import aiohttp
+import pytest
+
+# this package
+import searchdocs
+from searchdocs import aio
+from searchdocs._locking import FileLock
+from tests.conftest import DocsServer, cached_objects_inv
+
+
+def test_resolve_url(docs_server: DocsServer):
+
+	async def main():
+		async with aiohttp.ClientSession() as session:
+			assert await aio.resolve_url(docs_server.url, session=session) == docs_server.docs_url
+			assert await aio.resolve_url(docs_server.url, session=session) == docs_server.docs_url
+
+	asyncio.run(main())
+	assert docs_server.requests == [("HEAD", '/'), ("HEAD", "/3/")]
+
+
+def test_download_objects_inv(docs_server: DocsServer):
+
+	async def main():
+		async with aiohttp.ClientSession() as session:
+			return await asyncio.gather(
+					*(aio.download_objects_inv(docs_server.url, session=session) for _ in range(5))
+					)
+
+	filenames = asyncio.run(main())
+	assert filenames == [cached_objects_inv(docs_server.docs_url)] * 5
+	assert filenames[0].read_bytes() == docs_server.objects_inv.read_bytes()
+
+	# The concurrent calls share a single download.
+	assert docs_server.requests.count(("GET", "/3/objects.inv")) == 1
+
+	docs_server.etag = '"def456"'
+	assert asyncio.run(aio.download_objects_inv(docs_server.url, max_age=0)) == cached_objects_inv(
+			docs_server.docs_url,
+			"def456",
+			)
+
+
+def test_download_objects_inv_off_loop(docs_server: DocsServer, monkeypatch):
+	# Parsing, indexing and cache I/O, including the cached redirects, are run in an executor
+	# rather than on the event loop.
+	threads = []
+
+	def record(func):
+
+		def wrapper(*args, **kwargs):
+			threads.append(threading.get_ident())
+			return func(*args, **kwargs)
+
+		return wrapper
+
+	monkeypatch.setattr(searchdocs, "_cached_redirect", record(searchdocs._cached_redirect))
+	monkeypatch.setattr(searchdocs, "_store_redirect", record(searchdocs._store_redirect))
+	monkeypatch.setattr(searchdocs, "_fresh_objects_inv", record(searchdocs._fresh_objects_inv))
+	monkeypatch.setattr(searchdocs, "_touch_objects_inv", record(searchdocs._touch_objects_inv))
+	monkeypatch.setattr(searchdocs._InventoryDownload, "write", record(searchdocs._InventoryDownload.write))
+	monkeypatch.setattr(searchdocs._InventoryDownload, "finish", record(searchdocs._InventoryDownload.finish))
+
+	asyncio.run(aio.download_objects_inv(docs_server.url))
+	asyncio.run(aio.download_objects_inv(docs_server.url, max_age=0))
+
+	assert len(threads) >= 10
+	assert threading.get_ident() not in threads
+
+
+def test_download_objects_inv_streamed(docs_server: DocsServer, monkeypatch):
+	# Each chunk is written to the inventory download as it arrives, rather than the whole file being read first.
+	events = []
+	iter_chunked = aiohttp.StreamReader.iter_chunked
+	write = searchdocs._InventoryDownload.write
+
+	async def recording_iter_chunked(self, n):
+		async for chunk in iter_chunked(self, n):
+			events.append("read")
+			yield chunk
+
+	def recording_write(self, chunk):
+		events.append("write")
+		write(self, chunk)
+
+	monkeypatch.setattr(searchdocs, "_DOWNLOAD_CHUNK_SIZE", 64)
+	monkeypatch.setattr(aiohttp.StreamReader, "iter_chunked", recording_iter_chunked)
+	monkeypatch.setattr(searchdocs._InventoryDownload, "write", recording_write)
+
+	filename = asyncio.run(aio.download_objects_inv(docs_server.url))
+	assert filename.read_bytes() == docs_server.objects_inv.read_bytes()
+
+	# At most one chunk is held in memory at a time.
+	assert len(events) > 4
+	assert events == ["read", "write"] * (len(events) // 2)
+
+
+def test_find_url(docs_server: DocsServer):
+	search_terms = ["pathlib.Path", "decimal.Decimal", "dict.clear", "ValueError"]
+
+	async def main():
+		async with aiohttp.ClientSession() as session:
+			return await asyncio.gather(*(aio.find_url(docs_server.url, term, session=session) for term in search_terms))
+
+	urls = asyncio.run(main())
+	assert urls == [
+			docs_server.docs_url / "library/pathlib.html#pathlib.Path",
+			docs_server.docs_url / "library/decimal.html#decimal.Decimal",
+			docs_server.docs_url / "library/stdtypes.html#dict.clear",
+			docs_server.docs_url / "library/exceptions.html#ValueError",
+			]
+
+	with pytest.raises(ValueError, match="Object zzzzzzzz not found."):
+		asyncio.run(aio.find_url(docs_server.url, "zzzzzzzz"))
+
+
+def test_shared_session(docs_server: DocsServer):
+
+	async def main():
+		await aio.find_url(docs_server.url, "dict")
+		session = aio._shared_sessions[asyncio.get_running_loop()][0]
+
+		await aio.find_url(docs_server.url, "list")
+		assert aio._shared_sessions[asyncio.get_running_loop()][0] is session
+		return session
+
+	# The session is closed when the event loop shuts down.
+	session = asyncio.run(main())
+	assert session.closed
+
+	async def close():
+		await aio.find_url(docs_server.url, "set")
+		session = aio._shared_sessions[asyncio.get_running_loop()][0]
+
+		await aio.close_session()
+		assert session.closed
+
+		# A new session is created when next needed.
+		await aio.find_url(docs_server.url, "sum")
+		assert aio._shared_sessions[asyncio.get_running_loop()][0] is not session
+
+	asyncio.run(close())
+
+
+def test_download_cancelled_waiting_for_lock(docs_server: DocsServer):
+	docs_url = docs_server.docs_url
+	lock = searchdocs._site_lock(searchdocs.cache_dir_for_url(docs_url))
+
+	async def main():
+		lock.acquire()
+
+		async with aiohttp.ClientSession() as session:
+			task = asyncio.ensure_future(aio._fetch_objects_inv(docs_url, 0, session))
+			await asyncio.sleep(0.2)
+			task.cancel()
+
+			with pytest.raises(asyncio.CancelledError):
+				await task
+
+		lock.release()
+		await asyncio.sleep(0.2)
+
+	asyncio.run(main())
+
+	# The cancelled task does not take the lock after it is released.
+	other = FileLock(lock.filename)
+	assert other.acquire(blocking=False)
+	other.release()
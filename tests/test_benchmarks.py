@@ -0,0 +1,46 @@
+# stdlib
+import json
+
+# this package
+from benchmarks.fixtures import synthetic_objects
+from benchmarks.suite import run_benchmarks
+
+
+def test_synthetic_objects():
+	objects = synthetic_objects(500)
+	assert len(objects) == 500
+	assert len({name for name, *_ in objects}) == 500
+	assert synthetic_objects(500) == objects
+
+
+def test_run_benchmarks():
+	results = run_benchmarks(sizes=[200], repeat=1)
+	json.dumps(results)
+
+	benchmarks = {record["benchmark"] for record in results["results"]}
+	assert benchmarks == {
+			"parse.sphobjinv",
+			"memory.sphobjinv",
+			"parse.compact",
+			"memory.compact",
+			"index.build",
+			"index.load",
+			"memory.index",
+			"suggest_from_name",
+			"search_engine.search",
+			"interactive.keystroke",
+			"search_engine.score.serial",
+			"search_engine.score.parallel",
+			"search_engine.best_matches.python",
+			"search_engine.best_matches.rapidfuzz",
+			"find_url.cold",
+			"find_url.warm_inventory",
+			"find_url.warm",
+			"download_objects_inv.revalidate",
+			"result_cache.memory_hit",
+			"result_cache.disk_hit",
+			}
+
+	for record in results["results"]:
+		assert record["size"] == 200
+		assert record["unit"] in {'s', "bytes", "queries/s"}
@@ -0,0 +1,162 @@
+# stdlib
+import os
+import time
+
+# 3rd party
+import pytest
+import requests
+from domdf_python_tools.paths import PathPlus
+
+# this package
+import searchdocs
+from searchdocs import cache_dir_for_url, download_objects_inv, find_url, resolve_url
+from searchdocs.index import IndexEntry, InventoryIndex, index_filename
+from tests.conftest import DocsServer, cached_objects_inv
+
+
+def test_resolve_url_cached(docs_server: DocsServer):
+	assert resolve_url(docs_server.url) == docs_server.docs_url
+	assert resolve_url(docs_server.url) == docs_server.docs_url
+	assert docs_server.requests == [("HEAD", '/'), ("HEAD", "/3/")]
+
+	assert resolve_url(docs_server.url, max_age=0) == docs_server.docs_url
+	assert len(docs_server.requests) == 4
+
+
+def test_resolve_url_offline(docs_server: DocsServer, tmp_cache_dir: PathPlus):
+	resolve_url(docs_server.url)
+
+	# Make the cached redirect very old.
+	redirects = (tmp_cache_dir / "redirects.json").load_json()
+	redirects[docs_server.url][1] -= 1e6
+	(tmp_cache_dir / "redirects.json").dump_json(redirects)
+
+	assert resolve_url(docs_server.url, max_age=None) == docs_server.docs_url
+	assert len(docs_server.requests) == 2
+
+	assert resolve_url(docs_server.url) == docs_server.docs_url
+	assert len(docs_server.requests) == 4
+
+
+def test_download_objects_inv_fresh(docs_server: DocsServer):
+	filename = download_objects_inv(docs_server.url)
+	assert filename == cached_objects_inv(docs_server.docs_url)
+	assert filename.read_bytes() == docs_server.objects_inv.read_bytes()
+	assert docs_server.requests[-1] == ("GET", "/3/objects.inv")
+
+	count = len(docs_server.requests)
+	assert download_objects_inv(docs_server.url) == filename
+	assert len(docs_server.requests) == count
+
+	assert download_objects_inv(docs_server.url, max_age=0) == filename
+	assert docs_server.requests[count:] == [("HEAD", '/'), ("HEAD", "/3/"), ("GET", "/3/objects.inv")]
+
+
+def test_download_objects_inv_not_modified(docs_server: DocsServer):
+	filename = download_objects_inv(docs_server.url)
+	metadata_file = cache_dir_for_url(docs_server.docs_url) / "inventory.json"
+	checked = metadata_file.load_json()["checked"]
+
+	# The server answers the conditional request with 304 Not Modified, which has no body.
+	filename.write_bytes(b"cached")
+	assert download_objects_inv(docs_server.url, max_age=0) == filename
+	assert filename.read_bytes() == b"cached"
+	assert metadata_file.load_json()["checked"] > checked
+
+
+def test_download_objects_inv_changed(docs_server: DocsServer):
+	download_objects_inv(docs_server.url)
+	docs_server.etag = '"def456"'
+
+	assert download_objects_inv(docs_server.url) == cached_objects_inv(docs_server.docs_url, "abc123")
+	assert download_objects_inv(docs_server.url, max_age=0) == cached_objects_inv(docs_server.docs_url, "def456")
+
+	# The previous inventory is kept for other processes which may still be reading it,
+	# until it has not been used for a while.
+	docs_cache_dir = cache_dir_for_url(docs_server.docs_url)
+	assert cached_objects_inv(docs_server.docs_url, "abc123").is_file()
+
+	old = time.time() - 3600
+	os.utime(cached_objects_inv(docs_server.docs_url, "abc123"), (old, old))
+	docs_server.etag = '"ghi789"'
+	assert download_objects_inv(docs_server.url, max_age=0) == cached_objects_inv(docs_server.docs_url, "ghi789")
+	assert sorted(path.name for path in docs_cache_dir.iterdir()) == sorted([
+			cached_objects_inv(docs_server.docs_url, "def456").name,
+			index_filename(cached_objects_inv(docs_server.docs_url, "def456")).name,
+			cached_objects_inv(docs_server.docs_url, "ghi789").name,
+			index_filename(cached_objects_inv(docs_server.docs_url, "ghi789")).name,
+			"inventory.json",
+			])
+
+
+@pytest.mark.parametrize("etag", ['"/tmp/searchdocs-etag"', '"../../escaped"', 'W/"../escaped"', '"a/b"'])
+def test_download_objects_inv_hostile_etag(docs_server: DocsServer, tmp_cache_dir: PathPlus, etag: str):
+	# The ETag is chosen by the server, so must not be able to place files outside the cache.
+	docs_server.etag = etag
+	docs_cache_dir = cache_dir_for_url(docs_server.docs_url)
+
+	filename = download_objects_inv(docs_server.url)
+	assert filename.parent == docs_cache_dir
+	assert filename.name.endswith(".inv")
+	assert not PathPlus("/tmp/searchdocs-etag").exists()
+	assert sorted(path.name for path in docs_cache_dir.iterdir()) == sorted([
+			filename.name,
+			index_filename(filename).name,
+			"inventory.json",
+			])
+	assert not list(tmp_cache_dir.parent.rglob("*escaped*"))
+
+	# The cached file is found again from the ETag stored in inventory.json.
+	assert download_objects_inv(docs_server.url) == filename
+	assert docs_server.requests.count(("GET", "/3/objects.inv")) == 1
+
+
+def test_find_url_no_network(docs_server: DocsServer, monkeypatch):
+	url = find_url(docs_server.url, "pathlib.Path")
+	assert url == docs_server.docs_url / "library/pathlib.html#pathlib.Path"
+
+	def fail(*args, **kwargs):
+		raise AssertionError("Unexpected network access")
+
+	monkeypatch.setattr(requests.Session, "request", fail)
+	monkeypatch.setattr(time, "time", lambda: 1e12)
+
+	assert find_url(docs_server.url, "pathlib.Path", max_age=None) == url
+	assert str(find_url(docs_server.url, "decimal.Decimal", max_age=None)).endswith("#decimal.Decimal")
+
+
+def test_download_objects_inv_builds_index(docs_server: DocsServer):
+	filename = download_objects_inv(docs_server.url)
+
+	# The inventory was parsed as it was downloaded.
+	with InventoryIndex(index_filename(filename)) as index:
+		assert len(index) == 15
+		assert index[1] == IndexEntry("pathlib.Path", "py:class", "library/pathlib.html#pathlib.Path")
+
+	# The temporary file was moved into place.
+	assert not list(cache_dir_for_url(docs_server.docs_url).parent.glob(".*.tmp"))
+
+
+def test_download_objects_inv_not_an_inventory(docs_server: DocsServer):
+	docs_server.objects_inv.write_bytes(b"<html>Not Found</html>")
+
+	filename = download_objects_inv(docs_server.url)
+	assert filename.read_bytes() == b"<html>Not Found</html>"
+	assert not index_filename(filename).exists()
+
+	with pytest.raises(ValueError, match="Not a version 2 Sphinx inventory."):
+		find_url(docs_server.url, "pathlib.Path")
+
+
+def test_download_objects_inv_interrupted(docs_server: DocsServer, monkeypatch):
+
+	def iter_content(self, chunk_size):
+		yield self.raw.read(10)
+		raise requests.ConnectionError("Connection reset")
+
+	monkeypatch.setattr(requests.Response, "iter_content", iter_content)
+
+	with pytest.raises(requests.ConnectionError, match="Connection reset"):
+		download_objects_inv(docs_server.url)
+
+	assert not list(cache_dir_for_url(docs_server.docs_url).parent.glob(".*.tmp"))
@@ -2,9 +2,12 @@
 import pytest
 from apeye import URL
 from consolekit.testing import CliRunner, Result
+from domdf_python_tools.paths import PathPlus
 
 # this package
+import searchdocs.__main__
 from searchdocs.__main__ import main
+from tests.conftest import OBJECTS, DocsServer, make_objects_inv
 
 
 def param(term: str, url: str):
@@ -107,3 +110,31 @@ def test_find_url_exceptions(term: str):
 
 	assert result.exit_code == 0
 	assert result.stdout.strip() == f"https://docs.python.org/3/library/exceptions.html#{term}"
+
+
+@pytest.mark.parametrize(
+		"term, uri",
+		[
+				pytest.param("cache", "library/functools.html#functools.cache", id="cache"),
+				pytest.param("search", "library/re.html#re.search", id="search"),
+				]
+		)
+def test_search_term_is_not_a_command(
+		tmp_cache_dir: PathPlus,
+		tmp_pathplus: PathPlus,
+		monkeypatch,
+		term: str,
+		uri: str,
+		):
+	objects = [
+			*OBJECTS,
+			("functools.cache", "py", "function", "library/functools.html#$"),
+			("re.search", "py", "function", "library/re.html#$"),
+			]
+
+	with DocsServer(make_objects_inv(tmp_pathplus / "objects.inv", objects)) as docs_server:
+		monkeypatch.setattr(searchdocs.__main__, "DOCS_PYTHON_ORG", docs_server.url)
+
+		result: Result = CliRunner().invoke(main, args=[term])
+		assert result.exit_code == 0
+		assert result.stdout.strip() == f"{docs_server.docs_url}/{uri}"
@@ -0,0 +1,123 @@
+# stdlib
+from typing import Any, Dict, List
+
+# 3rd party
+import pytest
+import sphobjinv  # type: ignore[import-untyped]
+from domdf_python_tools.paths import PathPlus
+
+# this package
+from searchdocs import Inventory
+from searchdocs.compact import CompactInventory, InventoryParser
+from searchdocs.index import IndexEntry
+
+
+@pytest.fixture()
+def varied_objects_inv(tmp_pathplus: PathPlus) -> PathPlus:
+	inventory = sphobjinv.Inventory()
+	inventory.project = "Démo project"
+	inventory.version = "2.0 beta"
+
+	for name, domain, role, priority, uri, dispname in [
+		("pathlib.Path", "py", "class", '1', "library/pathlib.html#$", '-'),
+		("Sorting HOW TO", "std", "label", "-1", "howto/sorting.html#sortinghowto", "Sorting HOW TO"),
+		("sorting-howto", "std", "label", '-1', "howto/sorting.html#$", "Sorting HOW TO"),
+		("café.crème", "py", "function", '0', "library/café.html#$", '-'),
+		("index", "std", "doc", "-1", "index.html", "Contents"),
+		("c.PyObject", "c", "type", '1', "c-api/structures.html#c.PyObject", '-'),
+		]:
+		inventory.objects.append(
+				sphobjinv.DataObjStr(
+						name=name,
+						domain=domain,
+						role=role,
+						priority=priority,
+						uri=uri,
+						dispname=dispname,
+						)
+				)
+
+	filename = tmp_pathplus / "objects.inv"
+	sphobjinv.writebytes(str(filename), sphobjinv.compress(inventory.data_file(contract=True)))
+	return filename
+
+
+def test_compact_inventory(varied_objects_inv: PathPlus):
+	expected = sphobjinv.Inventory(varied_objects_inv)
+	inventory = CompactInventory(varied_objects_inv)
+
+	assert inventory.project == expected.project
+	assert inventory.version == expected.version
+	assert len(inventory) == len(expected.objects) == 6
+	assert inventory.roles == ["py:class", "std:label", "py:function", "std:doc", "c:type"]
+
+	for idx, obj in enumerate(expected.objects):
+		assert inventory.name(idx) == obj.name
+		assert inventory.role(idx) == f"{obj.domain}:{obj.role}"
+		assert inventory.priority(idx) == int(obj.priority)
+		assert inventory.uri(idx) == obj.uri
+		assert inventory.uri_expanded(idx) == obj.uri_expanded
+		assert inventory.dispname_expanded(idx) == obj.dispname_expanded
+		assert inventory[idx] == IndexEntry(obj.name, f"{obj.domain}:{obj.role}", obj.uri_expanded)
+
+	assert inventory.names == [obj.name for obj in expected.objects]
+	assert inventory[-1] == IndexEntry("c.PyObject", "c:type", "c-api/structures.html#c.PyObject")
+	assert list(inventory) == [inventory[idx] for idx in range(6)]
+
+	with pytest.raises(IndexError, match="index out of range"):
+		inventory[6]
+
+
+def test_compact_inventory_from_bytes(objects_inv: PathPlus):
+	inventory = CompactInventory.from_bytes(objects_inv.read_bytes())
+	assert len(inventory) == 15
+	assert inventory[1] == IndexEntry("pathlib.Path", "py:class", "library/pathlib.html#pathlib.Path")
+
+	assert len(CompactInventory()) == 0
+
+	with pytest.raises(ValueError, match="Not a version 2 Sphinx inventory."):
+		CompactInventory.from_bytes(b"# Sphinx inventory version 1\n# Project: Demo\n")
+
+	with pytest.raises(ValueError, match="Could not decompress the inventory"):
+		CompactInventory.from_bytes(objects_inv.read_bytes()[:-20])
+
+
+def test_compact_suggest_from_name(objects_inv: PathPlus):
+	inventory = CompactInventory(objects_inv)
+	expected = Inventory(objects_inv)
+
+	options: List[Dict[str, Any]] = [
+			{},
+			{"limit": 1, "with_score": True},
+			{"with_index": True, "with_score": True, "thresh": 0},
+			]
+
+	for kwargs in options:
+		for name in ["dict", "Path", "dic", "zzzzzz"]:
+			assert inventory.suggest_from_name(name, **kwargs) == expected.suggest_from_name(name, **kwargs)
+
+
+def test_inventory_parser(objects_inv: PathPlus):
+	data = objects_inv.read_bytes()
+	expected = CompactInventory(objects_inv)
+
+	for chunk_size in [1, 7, 100, len(data)]:
+		parser = InventoryParser()
+		for start in range(0, len(data), chunk_size):
+			parser.feed(data[start:start + chunk_size])
+
+		inventory = parser.close()
+		assert inventory.project == expected.project == "Demo"
+		assert list(inventory) == list(expected)
+
+	parser = InventoryParser()
+	parser.feed(data[:-20])
+	with pytest.raises(ValueError, match="the data is incomplete"):
+		parser.close()
+
+	parser = InventoryParser()
+	parser.feed(b"# Sphinx inventory")
+	with pytest.raises(ValueError, match="Not a version 2 Sphinx inventory."):
+		parser.close()
+	with pytest.raises(ValueError, match="Not a version 2 Sphinx inventory."):
+		parser.feed(b" version 1\n")
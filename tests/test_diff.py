@@ -0,0 +1,74 @@
+# 3rd party
+from domdf_python_tools.paths import PathPlus
+
+# this package
+from searchdocs import cache_dir_for_url, download_objects_inv, find_url
+from searchdocs.diff import InventoryDiff, carry_over_results, diff_indexes
+from searchdocs.index import load_index
+from searchdocs.instrumentation import Timings
+from searchdocs.results import get_result_cache
+from tests.conftest import OBJECTS, DocsServer, make_objects_inv
+
+# "set" is removed, "dict.clear" moves to a new page, and "pathlib.PurePath" is added.
+NEW_OBJECTS = [
+		*OBJECTS[:1],
+		("pathlib.PurePath", "py", "class", "library/pathlib.html#$"),
+		*OBJECTS[1:4],
+		("dict.clear", "py", "method", "library/dict.html#$"),
+		*OBJECTS[5:7],
+		*OBJECTS[8:],
+		]
+
+
+def test_diff_indexes(tmp_pathplus: PathPlus):
+	old_objects_inv = make_objects_inv(tmp_pathplus / "old.inv")
+	new_objects_inv = make_objects_inv(tmp_pathplus / "new.inv", NEW_OBJECTS)
+
+	with load_index(old_objects_inv) as old, load_index(new_objects_inv) as new:
+		diff = diff_indexes(old, new)
+
+		assert [new.name(idx) for idx in diff.added] == ["pathlib.PurePath", "dict.clear"]
+		assert [old.name(idx) for idx in diff.removed] == ["dict.clear", "set"]
+		assert diff.moved[1] == 2
+		assert all(old[old_idx] == new[new_idx] for old_idx, new_idx in diff.moved.items())
+		assert len(diff.moved) == len(old) - 2
+
+		assert diff_indexes(old, old) == InventoryDiff([], [], {idx: idx for idx in range(len(old))})
+
+
+def test_carry_over_results(docs_server: DocsServer):
+	search_terms = ["pathlib.Path", "decimal.Decimal", "set", "dict.clear", "pathlib.PurePat"]
+	for search_term in search_terms:
+		find_url(docs_server.url, search_term)
+
+	make_objects_inv(docs_server.objects_inv, NEW_OBJECTS)
+	docs_server.etag = '"def456"'
+
+	with Timings() as timings:
+		objects_inv = download_objects_inv(docs_server.url, max_age=0)
+
+	assert timings.counters["result_cache.carried_over"] == 2
+	assert timings.counters["result_cache.discarded"] == 3
+
+	result_cache = get_result_cache(cache_dir_for_url(docs_server.docs_url), objects_inv)
+	assert [search_term for search_term in search_terms if result_cache.get(search_term)] == [
+			"pathlib.Path",
+			"decimal.Decimal",
+			]
+
+	# The discarded results are searched for again.
+	assert find_url(docs_server.url, "dict.clear") == docs_server.docs_url / "library/dict.html#dict.clear"
+	assert find_url(docs_server.url, "pathlib.PurePat") == docs_server.docs_url / "library/pathlib.html#pathlib.PurePath"
+	assert str(find_url(docs_server.url, "pathlib.Path")).endswith("#pathlib.Path")
+
+
+def test_carry_over_results_unchanged(docs_server: DocsServer):
+	find_url(docs_server.url, "pathlib.Path")
+	old_objects_inv = download_objects_inv(docs_server.url)
+
+	new_objects_inv = old_objects_inv.with_name("def456")
+	new_objects_inv.write_bytes(old_objects_inv.read_bytes())
+	load_index(new_objects_inv).close()
+
+	assert carry_over_results(old_objects_inv, new_objects_inv) == 1
+	assert carry_over_results(old_objects_inv.with_name("missing"), new_objects_inv) == 0
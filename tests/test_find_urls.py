@@ -0,0 +1,74 @@
+# 3rd party
+import pytest
+from consolekit.testing import CliRunner, Result
+from domdf_python_tools.paths import PathPlus
+
+# this package
+import searchdocs.__main__
+from searchdocs import find_url, find_urls
+from searchdocs.__main__ import main
+from searchdocs.search import SearchEngine
+from tests.conftest import DocsServer
+
+TERMS = ["pathlib.Path", "dic", "Decimal", "zzzzzz", "pathlib.Path", "KeyError"]
+
+
+def expected(docs_server: DocsServer):
+	return [
+			("pathlib.Path", docs_server.docs_url / "library/pathlib.html#pathlib.Path"),
+			("dic", docs_server.docs_url / "library/stdtypes.html#dict"),
+			("Decimal", docs_server.docs_url / "library/decimal.html#module-decimal"),
+			("zzzzzz", None),
+			("pathlib.Path", docs_server.docs_url / "library/pathlib.html#pathlib.Path"),
+			("KeyError", docs_server.docs_url / "library/exceptions.html#KeyError"),
+			]
+
+
+def test_find_urls(docs_server: DocsServer):
+	assert list(find_urls(docs_server.url, TERMS)) == expected(docs_server)
+	assert len(docs_server.requests) == 3
+
+	# Results are cached for find_url.
+	assert find_url(docs_server.url, "dic") == docs_server.docs_url / "library/stdtypes.html#dict"
+
+
+def test_find_urls_parallel(docs_server: DocsServer, monkeypatch):
+	monkeypatch.setattr(SearchEngine, "parallel_threshold", 2)
+	assert list(find_urls(docs_server.url, iter(TERMS), processes=2)) == expected(docs_server)
+
+
+def test_find_urls_not_found(docs_server: DocsServer):
+	with pytest.raises(ValueError, match="Object zzzzzz not found."):
+		find_url(docs_server.url, "zzzzzz")
+
+
+@pytest.mark.parametrize("backend", ["python", "rapidfuzz"])
+def test_cli_batch(docs_server: DocsServer, tmp_pathplus: PathPlus, monkeypatch, backend: str):
+	monkeypatch.setattr(searchdocs.__main__, "DOCS_PYTHON_ORG", docs_server.url)
+
+	runner = CliRunner(mix_stderr=False)
+	result: Result = runner.invoke(main, args=["--backend", backend, "--batch", '-'], input="pathlib.Path\n\ndic \nKeyError\n")
+	assert result.exit_code == 0
+	assert result.stdout.splitlines() == [
+			f"pathlib.Path\t{docs_server.docs_url}/library/pathlib.html#pathlib.Path",
+			f"dic\t{docs_server.docs_url}/library/stdtypes.html#dict",
+			f"KeyError\t{docs_server.docs_url}/library/exceptions.html#KeyError",
+			]
+
+	(tmp_pathplus / "terms.txt").write_lines(["zzzzzz", "Decimal"])
+	result = runner.invoke(main, args=["--backend", backend, "--batch", str(tmp_pathplus / "terms.txt")])
+	assert result.exit_code == 1
+	assert result.stdout.splitlines() == [f"Decimal\t{docs_server.docs_url}/library/decimal.html#module-decimal"]
+	assert result.stderr.splitlines() == ["Object zzzzzz not found."]
+
+
+def test_cli_batch_usage(docs_server: DocsServer):
+	runner = CliRunner(mix_stderr=False)
+
+	result: Result = runner.invoke(main, args=["--batch", '-', "dict"])
+	assert result.exit_code == 2
+	assert "SEARCH_TERM cannot be used with '--batch'." in result.stderr
+
+	result = runner.invoke(main, args=[])
+	assert result.exit_code == 2
+	assert "Missing argument 'SEARCH_TERM'." in result.stderr
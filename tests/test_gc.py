@@ -0,0 +1,171 @@
+# stdlib
+import os
+import time
+from typing import Iterator
+
+# 3rd party
+import pytest
+from consolekit.testing import CliRunner, Result
+from domdf_python_tools.paths import PathPlus
+
+# this package
+import searchdocs.cache
+from searchdocs import cache_dir_for_url, download_objects_inv, find_url
+from searchdocs.__main__ import cache
+from searchdocs.cache import GarbageCollection, collect_garbage, parse_age, parse_size, site_stats
+from searchdocs.index import index_filename
+from tests.conftest import DocsServer, cached_objects_inv
+
+
+def make_old(path: PathPlus, age: float) -> None:
+	mtime = time.time() - age
+	os.utime(path, (mtime, mtime))
+
+
+@pytest.fixture()
+def other_server(objects_inv: PathPlus, tmp_cache_dir: PathPlus) -> Iterator[DocsServer]:
+	with DocsServer(objects_inv) as server:
+		yield server
+
+
+@pytest.fixture()
+def two_sites(docs_server: DocsServer, other_server: DocsServer) -> None:
+	find_url(docs_server.url, "dict")
+	find_url(other_server.url, "dict")
+
+	# The first site was last used a day ago.
+	make_old(cached_objects_inv(docs_server.docs_url), 86400)
+
+
+def test_site_stats(two_sites, docs_server: DocsServer, other_server: DocsServer):
+	stats = site_stats()
+	assert [site.docs_url for site in stats] == [other_server.docs_url, docs_server.docs_url]
+	assert [site.results for site in stats] == [1, 1]
+	assert all(site.size > docs_server.objects_inv.stat().st_size for site in stats)
+	assert stats[0].last_used > stats[1].last_used  # type: ignore[operator]
+
+
+def test_collect_garbage_outdated(docs_server: DocsServer, tmp_cache_dir: PathPlus):
+	download_objects_inv(docs_server.url)
+	docs_cache_dir = cache_dir_for_url(docs_server.docs_url)
+
+	(docs_cache_dir / "old-etag").write_bytes(b"x" * 100)
+	(docs_cache_dir / "old-etag.idx").write_bytes(b"x" * 10)
+	(tmp_cache_dir / ".interrupted.tmp").write_bytes(b"x" * 5)
+	(tmp_cache_dir / ".in-progress.tmp").write_bytes(b"x" * 1)
+	make_old(tmp_cache_dir / ".interrupted.tmp", 7200)
+	make_old(docs_cache_dir / "old-etag", 3600)
+
+	assert collect_garbage() == GarbageCollection([], 115)
+	objects_inv = cached_objects_inv(docs_server.docs_url)
+	assert sorted(path.name for path in docs_cache_dir.iterdir()) == sorted([
+			objects_inv.name,
+			index_filename(objects_inv).name,
+			"inventory.json",
+			])
+	assert (tmp_cache_dir / ".in-progress.tmp").is_file()
+
+
+def test_collect_garbage_limits(two_sites, docs_server: DocsServer, other_server: DocsServer):
+	old_site = cache_dir_for_url(docs_server.docs_url)
+	new_site = cache_dir_for_url(other_server.docs_url)
+
+	assert collect_garbage(max_age=3600 * 25).removed == []
+	assert collect_garbage(max_size=10**9).removed == []
+
+	# The least recently used site is removed first.
+	assert collect_garbage(max_size=(sum(site.size for site in site_stats()) - 1), keep=[]).removed == [
+			docs_server.docs_url,
+			]
+	assert not old_site.exists()
+	assert new_site.is_dir()
+
+	assert collect_garbage(max_size=0, keep=[new_site]).removed == []
+	assert collect_garbage(max_age=0).removed == [other_server.docs_url]
+
+	# Searching again downloads the inventory again.
+	assert find_url(docs_server.url, "dict") == docs_server.docs_url / "library/stdtypes.html#dict"
+
+
+def test_automatic_collection(two_sites, docs_server: DocsServer, other_server: DocsServer, monkeypatch):
+	monkeypatch.setenv("SEARCHDOCS_CACHE_MAX_AGE", "1h")
+
+	other_server.etag = '"def456"'
+	download_objects_inv(other_server.url, max_age=0)
+
+	assert not cache_dir_for_url(docs_server.docs_url).exists()
+	assert index_filename(cached_objects_inv(other_server.docs_url, "def456")).is_file()
+
+
+def test_parse():
+	assert parse_size("1024") == 1024
+	assert parse_size("1.5K") == 1536
+	assert parse_size("500MiB") == 500 * 1024**2
+	assert parse_size("2g") == 2 * 1024**3
+	assert parse_age("90") == 90
+	assert parse_age("30d") == 30 * 86400
+	assert parse_age("1.5h") == 5400
+
+	with pytest.raises(ValueError, match="Invalid size 'lots'."):
+		parse_size("lots")
+	with pytest.raises(ValueError, match="Invalid age '-1d'."):
+		parse_age("-1d")
+
+
+def test_collect_garbage_files_removed(two_sites, docs_server: DocsServer, tmp_cache_dir: PathPlus, monkeypatch):
+	# Files are removed by other processes between being found and being examined.
+	(tmp_cache_dir / ".interrupted.tmp").write_bytes(b"x" * 5)
+	make_old(tmp_cache_dir / ".interrupted.tmp", 7200)
+	rglob = PathPlus.rglob
+
+	def removing_rglob(self, pattern):
+		for path in rglob(self, pattern):
+			if path.is_file() and path.name != "cache.db":
+				path.unlink()
+			yield path
+
+	monkeypatch.setattr(PathPlus, "rglob", removing_rglob)
+
+	assert collect_garbage(max_size=0).removed
+	site_stats()
+
+	# The current inventory is replaced after it is found.
+	find_url(docs_server.url, "dict")
+	current_objects_inv = searchdocs.cache._current_objects_inv
+
+	def replaced(site_dir: PathPlus):
+		objects_inv_file = current_objects_inv(site_dir)
+		if objects_inv_file is not None:
+			objects_inv_file.unlink()
+		return objects_inv_file
+
+	monkeypatch.setattr(searchdocs.cache, "_current_objects_inv", replaced)
+
+	assert collect_garbage(max_size=0) == GarbageCollection([], 0)
+	assert [site.last_used for site in site_stats()] == [None]
+
+	# Downloads which collect garbage afterwards succeed.
+	monkeypatch.setenv("SEARCHDOCS_CACHE_MAX_SIZE", '1')
+	download_objects_inv(docs_server.url, max_age=None)
+
+
+def test_cli(two_sites, docs_server: DocsServer, other_server: DocsServer, tmp_cache_dir: PathPlus):
+	runner = CliRunner(mix_stderr=False)
+
+	result: Result = runner.invoke(cache, args=["stats"])
+	assert result.exit_code == 0
+	lines = result.stdout.splitlines()
+	assert lines[0].startswith(f"{other_server.docs_url}\t")
+	assert lines[0].count("\t1 results\tlast used ") == 1
+	assert lines[1].startswith(f"{docs_server.docs_url}\t")
+	assert lines[2].startswith("Total ")
+	assert lines[2].endswith(f" in {tmp_cache_dir}")
+
+	result = runner.invoke(cache, args=["gc", "--max-age", "1h"])
+	assert result.exit_code == 0
+	assert result.stdout == f"Removed {docs_server.docs_url}\n"
+	assert result.stderr.startswith("Freed ")
+
+	result = runner.invoke(cache, args=["gc", "--max-size", "big"])
+	assert result.exit_code == 2
+	assert "Invalid size 'big'." in result.stderr
@@ -0,0 +1,75 @@
+# 3rd party
+import pytest
+from domdf_python_tools.paths import PathPlus
+
+# this package
+from searchdocs.index import IndexEntry, InventoryIndex, build_index, index_filename, load_index
+
+
+def test_index_filename():
+	assert index_filename("cache/abc-123") == PathPlus("cache/abc-123.idx")
+
+
+def test_load_index(objects_inv: PathPlus):
+	assert not index_filename(objects_inv).is_file()
+
+	with load_index(objects_inv) as index:
+		assert index_filename(objects_inv).is_file()
+		assert len(index) == 15
+		assert index.names[:3] == ["pathlib", "pathlib.Path", "zipfile.Path"]
+		assert index[0] == IndexEntry("pathlib", "py:module", "library/pathlib.html#module-pathlib")
+		assert index[1] == IndexEntry("pathlib.Path", "py:class", "library/pathlib.html#pathlib.Path")
+		assert index[-1] == IndexEntry("sorting-howto", "std:label", "howto/sorting.html#sorting-howto")
+
+		with pytest.raises(IndexError, match="index out of range"):
+			index[15]
+
+	# Reuses the existing index.
+	mtime = index_filename(objects_inv).stat().st_mtime_ns
+	with load_index(objects_inv) as index:
+		assert index.names[3] == "dict"
+	assert index_filename(objects_inv).stat().st_mtime_ns == mtime
+
+
+def test_load_index_invalid(objects_inv: PathPlus):
+	index_filename(objects_inv).write_bytes(b"not an index")
+
+	with pytest.raises(ValueError, match="is not a compatible searchdocs index"):
+		InventoryIndex(index_filename(objects_inv))
+
+	# Rebuilt in place.
+	with load_index(objects_inv) as index:
+		assert len(index) == 15
+
+
+def test_build_index_filename(objects_inv: PathPlus):
+	filename = build_index(objects_inv, objects_inv.parent / "custom.idx")
+	assert filename == objects_inv.parent / "custom.idx"
+
+	with InventoryIndex(filename) as index:
+		assert index.names == [entry.name for entry in (index[i] for i in range(len(index)))]
+
+
+def test_exact_and_suffix_matches(objects_inv: PathPlus):
+	with load_index(objects_inv) as index:
+		assert index.name(1) == "pathlib.Path"
+
+		assert index.exact_matches("dict") == [3]
+		assert index.exact_matches("typing dict") == [5]
+		assert index.exact_matches("dic") == []
+
+		assert index.suffix_matches("path") == [1, 2]
+		assert index.suffix_matches("dict") == [5]
+		assert index.suffix_matches("clear") == [4]
+		assert index.suffix_matches("pathlib") == []
+
+
+def test_role_matches(objects_inv: PathPlus):
+	with load_index(objects_inv) as index:
+		assert index.role_matches("py:class") == [1, 2, 3, 6, 7, 9]
+		assert index.role_matches("py:exception") == [11, 12]
+		assert index.role_matches("std:label") == [14]
+		assert index.role_matches("std") == [14]
+		assert index.role_matches("py") == list(range(14))
+		assert index.role_matches("py:attribute") == []
+		assert index.role_matches("class") == []
@@ -0,0 +1,90 @@
+# 3rd party
+from consolekit.testing import CliRunner, Result
+
+# this package
+import searchdocs.__main__
+from searchdocs import find_url
+from searchdocs.__main__ import main
+from searchdocs.instrumentation import Hook, Timings, count, register_hook, span, unregister_hook
+from tests.conftest import DocsServer
+
+
+class Recorder(Hook):
+
+	def __init__(self):
+		self.events = []
+
+	def span_ended(self, name, duration):
+		assert duration >= 0
+		self.events.append(("span", name))
+
+	def counted(self, name, value):
+		self.events.append(("count", name, value))
+
+
+def test_hooks():
+	recorder = Recorder()
+
+	with span("unrecorded"):
+		count("unrecorded")
+
+	register_hook(recorder)
+	try:
+		with span("outer"):
+			with span("inner"):
+				count("things", 3)
+	finally:
+		unregister_hook(recorder)
+
+	count("unrecorded")
+	assert recorder.events == [("count", "things", 3), ("span", "inner"), ("span", "outer")]
+
+
+def test_find_url_timings(docs_server: DocsServer):
+	with Timings() as timings:
+		find_url(docs_server.url, "pathlib.Path")
+
+	assert list(timings.spans) == [
+			"resolve_url",
+			"download_objects_inv.request",
+			"index.build",
+			"download_objects_inv",
+			"result_cache.open",
+			"result_cache.lookup",
+			"index.load",
+			"search",
+			]
+	assert timings.counters == {
+			"redirect_cache.miss": 1,
+			"inventory.downloaded": 1,
+			"bytes_downloaded": docs_server.objects_inv.stat().st_size,
+			"result_cache.miss": 1,
+			}
+
+	with Timings() as timings:
+		find_url(docs_server.url, "pathlib.Path")
+		find_url(docs_server.url, "dict", max_age=0)
+
+	assert timings.spans["resolve_url"][0] == 2
+	assert timings.counters == {
+			"redirect_cache.hit": 1,
+			"redirect_cache.miss": 1,
+			"inventory.fresh": 1,
+			"inventory.not_modified": 1,
+			"result_cache.memory_hit": 1,
+			"result_cache.miss": 1,
+			}
+
+
+def test_cli_timings(docs_server: DocsServer, monkeypatch):
+	monkeypatch.setattr(searchdocs.__main__, "DOCS_PYTHON_ORG", docs_server.url)
+
+	runner = CliRunner(mix_stderr=False)
+	result: Result = runner.invoke(main, args=["--timings", "pathlib.Path"])
+	assert result.exit_code == 0
+	assert result.stdout == f"{docs_server.docs_url}/library/pathlib.html#pathlib.Path\n"
+
+	lines = result.stderr.splitlines()
+	assert lines[0].startswith("resolve_url ")
+	assert any(line.startswith("total ") for line in lines)
+	assert any(line.split() == ["result_cache.miss", '1'] for line in lines)
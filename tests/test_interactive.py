@@ -0,0 +1,97 @@
+# stdlib
+from collections import Counter
+
+# 3rd party
+import pytest
+from consolekit.testing import CliRunner, Result
+from domdf_python_tools.paths import PathPlus
+
+# this package
+from searchdocs.__main__ import main
+from searchdocs.index import load_index, ngrams, process_name
+from searchdocs.interactive import IncrementalSearch, interactive_search
+from searchdocs.search import SearchEngine
+from tests.conftest import DocsServer
+
+
+@pytest.mark.parametrize("backend", ["python", "rapidfuzz"])
+def test_incremental_search(objects_inv: PathPlus, backend: str):
+	with load_index(objects_inv) as index:
+		engine = SearchEngine(index, backend=backend)
+		search = IncrementalSearch(engine, limit=3)
+
+		for query in ['d', "di", "dic", "dict", "dict.", "dict.c", "dict.", "dict", "dec", '', "getclose"]:
+			processed_query = process_name(query)
+			matches = search.update(query)
+
+			if not processed_query:
+				assert matches == []
+				continue
+
+			if backend == "rapidfuzz":
+				assert matches == engine.score(processed_query, thresh=0, limit=3)
+			else:
+				# The same as counting the shared trigrams from scratch.
+				candidates = {
+						*engine.candidate_indices(processed_query),
+						*index.exact_matches(processed_query),
+						*index.suffix_matches(processed_query),
+						}
+				assert matches == engine.score(processed_query, sorted(candidates), thresh=0, limit=3)
+
+				overlap: "Counter[int]" = Counter()
+				for gram in ngrams(processed_query):
+					overlap.update(index.postings(gram))
+				assert dict(search._overlap) == dict(overlap)
+
+
+def test_incremental_search_roles(objects_inv: PathPlus):
+	with load_index(objects_inv) as index:
+		search = IncrementalSearch(SearchEngine(index), roles=["py:class"])
+
+		assert [match.name for match in search.update("dic")] == ["dict", "decimal.Decimal", "list"]
+		assert [match.name for match in search.update("dict")] == ["dict", "list", "decimal.Decimal"]
+
+		# Results for previous queries are reused.
+		assert search.update("dic") is search.update("dic")
+
+
+def test_interactive_search(docs_server: DocsServer):
+	keys = iter(["d", "i", "c", "\x1b[B", "\r"])
+	url = interactive_search(docs_server.url, getchar=keys.__next__)
+	assert url == docs_server.docs_url / "library/stdtypes.html#dict.clear"
+
+	keys = iter(["x", "\x7f", "\x15", "list", "\r"])
+	url = interactive_search(docs_server.url, "dict", getchar=keys.__next__)
+	assert url == docs_server.docs_url / "library/stdtypes.html#list"
+
+	keys = iter(["\x1b[A", "\r"])
+	url = interactive_search(docs_server.url, "dict", roles=["py:data"], getchar=keys.__next__)
+	assert url == docs_server.docs_url / "library/typing.html#typing.Dict"
+
+	assert interactive_search(docs_server.url, "dict", getchar=iter(["\x1b"]).__next__) is None
+
+	def end_of_input() -> str:
+		raise EOFError
+
+	assert interactive_search(docs_server.url, "dict", getchar=end_of_input) is None
+
+	# The inventory is only downloaded once.
+	assert docs_server.requests.count(("GET", "/3/objects.inv")) == 1
+
+
+def test_cli_interactive(docs_server: DocsServer):
+	runner = CliRunner(mix_stderr=False)
+
+	result: Result = runner.invoke(main, args=["-u", docs_server.url, "-i", "dic"], input="t\r")
+	assert result.exit_code == 0
+	assert result.stdout.splitlines() == [f"{docs_server.docs_url}/library/stdtypes.html#dict"]
+	assert "> dict" in result.stderr
+
+	result = runner.invoke(main, args=["-u", docs_server.url, "-i"], input="\x1b")
+	assert result.exit_code == 1
+	assert result.stdout == ''
+
+	result = runner.invoke(main, args=["-u", docs_server.url, "-u", docs_server.url, "-i"])
+	assert result.exit_code == 2
+	assert "Only one '--docs-url' can be used with '--interactive'." in result.stderr
@@ -0,0 +1,125 @@
+# stdlib
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# 3rd party
+from domdf_python_tools.paths import PathPlus
+
+# this package
+from searchdocs import cache_dir_for_url, download_objects_inv
+from searchdocs._locking import FileLock
+from searchdocs.cache import collect_garbage
+from tests.conftest import DocsServer, cached_objects_inv
+
+_DOWNLOAD = """
+import sys, time
+import searchdocs
+from domdf_python_tools.paths import PathPlus
+searchdocs.cache_dir = PathPlus(sys.argv[1])
+time.sleep(max(0, float(sys.argv[3]) - time.time()))
+print(searchdocs.download_objects_inv(sys.argv[2], max_age=0))
+"""
+
+_READ = """
+import sys
+import searchdocs
+from domdf_python_tools.paths import PathPlus
+searchdocs.cache_dir = PathPlus(sys.argv[1])
+print(searchdocs.find_url(sys.argv[2], "dict"), flush=True)
+sys.stdin.read()
+"""
+
+
+def test_file_lock(tmp_pathplus: PathPlus):
+	lock = FileLock(tmp_pathplus / "locks" / ".site.lock")
+	other = FileLock(tmp_pathplus / "locks" / ".site.lock")
+
+	with lock:
+		assert not other.acquire(blocking=False)
+
+	assert other.acquire(blocking=False)
+	assert not lock.acquire(blocking=False)
+	other.release()
+	other.release()
+
+	assert lock.acquire()
+	lock.release()
+
+
+def test_file_lock_shared(tmp_pathplus: PathPlus):
+	readers = [FileLock(tmp_pathplus / ".site.readers.lock", shared=True) for _ in range(2)]
+	writer = FileLock(tmp_pathplus / ".site.readers.lock")
+
+	assert all(reader.acquire(blocking=False) for reader in readers)
+	assert not writer.acquire(blocking=False)
+
+	for reader in readers:
+		reader.release()
+
+	assert writer.acquire(blocking=False)
+	assert not readers[0].acquire(blocking=False)
+	writer.release()
+
+
+def test_collect_garbage_skips_readers(docs_server: DocsServer, tmp_cache_dir: PathPlus):
+	# A site which another process has open is not removed.
+	reader = subprocess.Popen(
+			[sys.executable, "-c", _READ, str(tmp_cache_dir), docs_server.url],
+			stdin=subprocess.PIPE,
+			stdout=subprocess.PIPE,
+			text=True,
+			)
+
+	try:
+		assert reader.stdout is not None
+		assert reader.stdout.readline().strip() == f"{docs_server.docs_url}/library/stdtypes.html#dict"
+
+		assert collect_garbage(max_age=0).removed == []
+		assert cache_dir_for_url(docs_server.docs_url).is_dir()
+	finally:
+		reader.communicate("", timeout=60)
+
+	assert collect_garbage(max_age=0).removed == [docs_server.docs_url]
+	assert not cache_dir_for_url(docs_server.docs_url).exists()
+
+	# Sites only used by this process are removed.
+	download_objects_inv(docs_server.url)
+	assert collect_garbage(max_age=0).removed == [docs_server.docs_url]
+
+
+def test_single_download_threads(docs_server: DocsServer):
+	docs_server.delay = 0.5
+
+	with ThreadPoolExecutor(max_workers=4) as executor:
+		filenames = list(executor.map(lambda _: download_objects_inv(docs_server.url, max_age=0), range(4)))
+
+	assert filenames == [cached_objects_inv(docs_server.docs_url)] * 4
+	assert docs_server.requests.count(("GET", "/3/objects.inv")) == 1
+
+
+def test_single_download_processes(docs_server: DocsServer, tmp_cache_dir: PathPlus):
+	docs_server.delay = 0.5
+	start = str(time.time() + 2)
+
+	processes = [
+			subprocess.Popen(
+					[sys.executable, "-c", _DOWNLOAD, str(tmp_cache_dir), docs_server.url, start],
+					stdout=subprocess.PIPE,
+					text=True,
+					) for _ in range(4)
+			]
+
+	filenames = [process.communicate(timeout=60)[0].strip() for process in processes]
+	assert [process.returncode for process in processes] == [0] * 4
+
+	# One process downloaded the inventory, and the others used it.
+	assert filenames == [str(cached_objects_inv(docs_server.docs_url))] * 4
+	assert docs_server.requests.count(("GET", "/3/objects.inv")) == 1
+
+	# When the inventory changes, the previous one is kept for processes still reading it.
+	docs_server.etag = '"def456"'
+	assert download_objects_inv(docs_server.url, max_age=0) == cached_objects_inv(docs_server.docs_url, "def456")
+	assert cached_objects_inv(docs_server.docs_url).is_file()
+	assert not list(tmp_cache_dir.rglob(".*.tmp"))
@@ -0,0 +1,190 @@
+# stdlib
+import time
+from typing import Dict
+
+# 3rd party
+import pytest
+from domdf_python_tools.paths import PathPlus
+
+# this package
+from searchdocs import ObjectNotFoundError, cache_dir_for_url, download_objects_inv, find_url, find_urls
+from searchdocs.results import (
+		DEFAULT_MEMORY_SIZE,
+		DEFAULT_NOT_FOUND_TTL,
+		DEFAULT_SIZE_LIMIT,
+		ResultCache,
+		close_result_cache,
+		get_result_cache,
+		options_from_environment
+		)
+from searchdocs.search import SearchEngine
+from tests.conftest import DocsServer, cached_objects_inv
+
+
+def test_result_cache_memory(tmp_pathplus: PathPlus, monkeypatch):
+	result_cache = ResultCache(tmp_pathplus, tmp_pathplus / "abc123", memory_size=2)
+	result_cache.set("dict", "https://example.com/dict")
+	result_cache.set("list", "https://example.com/list")
+	result_cache.set("set", "https://example.com/set")
+
+	disk_reads: Dict[str, int] = {}
+	disk_get = result_cache._disk.get
+
+	def get(key, **kwargs):
+		disk_reads[key] = disk_reads.get(key, 0) + 1
+		return disk_get(key, **kwargs)
+
+	monkeypatch.setattr(result_cache._disk, "get", get)
+
+	# The two most recent results are held in memory; older ones are read from disk.
+	assert result_cache.get("set") == "https://example.com/set"
+	assert result_cache.get("list") == "https://example.com/list"
+	assert disk_reads == {}
+
+	assert result_cache.get("dict") == "https://example.com/dict"
+	assert result_cache.get("dict") == "https://example.com/dict"
+	assert result_cache.get("tuple") is None
+	assert disk_reads == {"dict": 1, "tuple": 1}
+
+	result_cache.close()
+
+
+def test_result_cache_not_found(tmp_pathplus: PathPlus, monkeypatch):
+	result_cache = ResultCache(tmp_pathplus, tmp_pathplus / "abc123", not_found_ttl=60)
+	result_cache.set_not_found("dcit", ["dict", "dict.clear"])
+	result_cache.set("list", "https://example.com/list")
+
+	assert result_cache.get("dcit") is None
+	assert result_cache.get_not_found("dcit") == ["dict", "dict.clear"]
+	assert result_cache.get_not_found("list") is None
+	assert result_cache.get_not_found("tuple") is None
+
+	# Read from disk by another process, using the same inventory.
+	other = ResultCache(tmp_pathplus, tmp_pathplus / "abc123")
+	assert other.get("dcit") is None
+	assert other.get_not_found("dcit") == ["dict", "dict.clear"]
+	other.close()
+
+	# Not found in another version of the inventory, and not carried over to it.
+	other = ResultCache(tmp_pathplus, tmp_pathplus / "def456")
+	assert other.get_not_found("dcit") is None
+	assert other.results_for(tmp_pathplus / "abc123") == {"list": ("https://example.com/list", None)}
+	other.close()
+
+	# Finding the search term replaces the entry.
+	result_cache.set("dcit", "https://example.com/dict")
+	assert result_cache.get_not_found("dcit") is None
+	assert result_cache.get("dcit") == "https://example.com/dict"
+
+	# Entries expire after not_found_ttl seconds.
+	result_cache.set_not_found("tuple")
+	assert result_cache.get_not_found("tuple") == []
+
+	now = time.time()
+	monkeypatch.setattr(time, "time", lambda: now + 61)
+	assert result_cache.get_not_found("tuple") is None
+
+	result_cache.close()
+
+
+def test_get_result_cache(tmp_pathplus: PathPlus):
+	result_cache = get_result_cache(tmp_pathplus, tmp_pathplus / "abc123")
+	assert get_result_cache(tmp_pathplus, tmp_pathplus / "abc123") is result_cache
+
+	# A new inventory gets a new cache.
+	new_result_cache = get_result_cache(tmp_pathplus, tmp_pathplus / "def456")
+	assert new_result_cache is not result_cache
+
+	close_result_cache(tmp_pathplus)
+	assert get_result_cache(tmp_pathplus, tmp_pathplus / "def456") is not new_result_cache
+	close_result_cache(tmp_pathplus)
+
+
+def test_get_result_cache_options(tmp_pathplus: PathPlus, monkeypatch):
+	result_cache = get_result_cache(tmp_pathplus, tmp_pathplus / "abc123")
+	assert result_cache.memory_size == DEFAULT_MEMORY_SIZE
+	assert result_cache.not_found_ttl == DEFAULT_NOT_FOUND_TTL
+	assert result_cache._disk.size_limit == DEFAULT_SIZE_LIMIT
+	assert result_cache._disk.eviction_policy == "least-recently-stored"
+	close_result_cache(tmp_pathplus)
+
+	monkeypatch.setenv("SEARCHDOCS_RESULTS_MEMORY_SIZE", "10")
+	monkeypatch.setenv("SEARCHDOCS_RESULTS_MAX_SIZE", "1M")
+	monkeypatch.setenv("SEARCHDOCS_RESULTS_NOT_FOUND_TTL", "1h")
+	assert options_from_environment() == {"memory_size": 10, "size_limit": 1024 * 1024, "not_found_ttl": 3600}
+
+	# Arguments take precedence over the environment.
+	result_cache = get_result_cache(tmp_pathplus, tmp_pathplus / "abc123", not_found_ttl=60)
+	assert result_cache.memory_size == 10
+	assert result_cache.not_found_ttl == 60
+	assert result_cache._disk.size_limit == 1024 * 1024
+	close_result_cache(tmp_pathplus)
+
+
+def test_result_cache_shared(tmp_pathplus: PathPlus):
+	# Processes with different versions of the inventory share the database.
+	old_result_cache = ResultCache(tmp_pathplus, tmp_pathplus / "abc123")
+	new_result_cache = ResultCache(tmp_pathplus, tmp_pathplus / "def456")
+
+	old_result_cache.set("dict", "https://example.com/old")
+	assert new_result_cache.get("dict") is None
+
+	new_result_cache.set("dict", "https://example.com/new")
+	assert new_result_cache.get("dict") == "https://example.com/new"
+	assert ResultCache(tmp_pathplus, tmp_pathplus / "abc123").get("dict") is None
+
+	old_result_cache.close()
+	new_result_cache.close()
+
+
+def test_find_url_inventory_changed(docs_server: DocsServer):
+	assert str(find_url(docs_server.url, "pathlib.Path")).endswith("#pathlib.Path")
+
+	# Simulate a stale result, which should be discarded when the inventory changes.
+	docs_cache_dir = cache_dir_for_url(docs_server.docs_url)
+	get_result_cache(docs_cache_dir, cached_objects_inv(docs_server.docs_url)).set("pathlib.Path", "https://example.com")
+	assert str(find_url(docs_server.url, "pathlib.Path")) == "https://example.com"
+
+	docs_server.etag = '"def456"'
+	assert download_objects_inv(docs_server.url, max_age=0) == cached_objects_inv(docs_server.docs_url, "def456")
+	assert str(find_url(docs_server.url, "pathlib.Path")).endswith("#pathlib.Path")
+
+
+def test_find_url_not_found(docs_server: DocsServer, monkeypatch):
+	suggestions = ["list", "decimal.Decimal", "decimal", "sorting-howto"]
+
+	with pytest.raises(ObjectNotFoundError, match="Object collections not found. Did you mean list, ") as e:
+		find_url(docs_server.url, "collections")
+
+	assert e.value.search_term == "collections"
+	assert e.value.suggestions == suggestions
+
+	# Repeating the search fails without searching the inventory again.
+	searches = []
+	best_match = SearchEngine.best_match
+
+	def record_search(self, query, **kwargs):
+		searches.append(query)
+		return best_match(self, query, **kwargs)
+
+	monkeypatch.setattr(SearchEngine, "best_match", record_search)
+
+	for _ in range(2):
+		with pytest.raises(ObjectNotFoundError) as e:
+			find_url(docs_server.url, "collections")
+		assert e.value.suggestions == suggestions
+
+	# The suggestions are found by the same search.
+	assert dict(find_urls(docs_server.url, ["collections", "zzzzzz"])) == {"collections": None, "zzzzzz": None}
+	assert searches == ["zzzzzz"]
+
+	with pytest.raises(ObjectNotFoundError, match=r"Object zzzzzz not found.$") as e:
+		find_url(docs_server.url, "zzzzzz")
+	assert e.value.suggestions == []
+	assert searches == ["zzzzzz"]
+
+	# Not found results are not kept when the inventory changes.
+	docs_server.etag = '"def456"'
+	with pytest.raises(ObjectNotFoundError):
+		find_url(docs_server.url, "collections", max_age=0)
+	assert searches == ["zzzzzz", "collections"]
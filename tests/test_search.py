@@ -0,0 +1,275 @@
+# stdlib
+import random
+from typing import List, Optional
+
+# 3rd party
+import pytest
+from domdf_python_tools.paths import PathPlus
+
+# this package
+from benchmarks.fixtures import synthetic_objects
+import searchdocs.search
+from searchdocs import Inventory
+from searchdocs.index import load_index, process_name
+from searchdocs.search import Match, SearchEngine, rank_names
+from tests.conftest import make_objects_inv
+
+
+@pytest.mark.parametrize(
+		"term, expected",
+		[
+				("pathlib.Path", "pathlib.Path"),
+				("dict", "dict"),
+				("dict ", "dict"),
+				("dic", "dict"),
+				("Dict", "dict"),
+				("Dict ", "dict"),
+				("typing.Dict", "typing.Dict"),
+				("set", "set"),
+				("Set", "set"),
+				("list", "list"),
+				("sum", "sum"),
+				("Decimal", "decimal"),
+				("decimal.Decimal", "decimal.Decimal"),
+				("difflib.get_clos_matches", "difflib.get_close_matches"),
+				("difflib.get_closest_matches", "difflib.get_close_matches"),
+				("KeyError", "KeyError"),
+				]
+		)
+def test_search(objects_inv: PathPlus, term: str, expected: str):
+	with load_index(objects_inv) as index:
+		matches = SearchEngine(index).search(term)
+		assert matches[0].name == expected
+		assert matches[0] == SearchEngine(index).score(process_name(term), range(len(index)))[0]
+
+
+def test_search_results(objects_inv: PathPlus):
+	with load_index(objects_inv) as index:
+		engine = SearchEngine(index)
+
+		assert engine.search("dict", limit=2) == [Match("dict", 100, 3), Match("dict.clear", 57, 4)]
+		assert engine.search("dict", thresh=60) == [Match("dict", 100, 3)]
+		assert engine.search("zzzzzz") == []
+
+		match = engine.search("dict", limit=1)[0]
+		assert match.idx == 3
+		assert index[match.idx].name == "dict"
+
+
+@pytest.mark.parametrize(
+		"term, expected",
+		[
+				("Dict", Match("dict", 100, 3)),
+				("typing.dict", Match("typing.Dict", 100, 5)),
+				("Path", Match("pathlib.Path", 50, 1)),
+				("clear", Match("dict.clear", 67, 4)),
+				("get_close_matches", Match("difflib.get_close_matches", 81, 10)),
+				("dic", None),
+				]
+		)
+def test_lookup(objects_inv: PathPlus, term: str, expected: Match):
+	with load_index(objects_inv) as index:
+		engine = SearchEngine(index)
+		assert engine.lookup(process_name(term)) == expected
+
+		if expected is not None:
+			assert engine.search(term, limit=1) == [expected]
+
+
+def test_lookup_thresh(objects_inv: PathPlus):
+	with load_index(objects_inv) as index:
+		engine = SearchEngine(index)
+		assert engine.lookup("path", thresh=60) is None
+		assert engine.search("Path", thresh=60, limit=1) == [Match("pathlib", 73, 0)]
+
+
+def test_backends(objects_inv: PathPlus):
+	queries = ["Dict", "pathlib", "Path", "dic", "getclosematches", "zzzzzz", "decimal.decimal"]
+
+	with load_index(objects_inv) as index:
+		python = SearchEngine(index, processes=1)
+		vectorised = SearchEngine(index, backend="rapidfuzz")
+
+		for query in queries:
+			assert vectorised.search(query) == python.score(process_name(query))
+			assert vectorised.search(query, limit=1) == python.search(query, limit=1)
+
+		assert vectorised.best_matches(queries) == python.best_matches(queries)
+		assert vectorised.best_matches(queries, thresh=90)[3] is None
+
+		with pytest.raises(ValueError, match="Unknown scoring backend 'numpy'"):
+			SearchEngine(index, backend="numpy")
+
+
+@pytest.mark.parametrize("backend", ["python", "rapidfuzz"])
+def test_search_roles(objects_inv: PathPlus, backend: str, monkeypatch):
+	with load_index(objects_inv) as index:
+		engine = SearchEngine(index, backend=backend)
+
+		assert engine.search("dict", limit=1, roles=["py:method"]) == [Match("dict.clear", 57, 4)]
+		assert engine.search("dict", limit=2, roles=["py:class", "py:data"]) == [
+				Match("dict", 100, 3),
+				Match("typing.Dict", 53, 5),
+				]
+		assert engine.search("Path", limit=1, roles=["py:module"]) == [Match("pathlib", 73, 0)]
+		assert engine.search("dict", roles=["std"]) == []
+		assert engine.search("dict", roles=[]) == []
+
+		# Only the objects with the given roles are scored.
+		scored = []
+		score = engine.score
+
+		def record_score(query, indices=None, **kwargs):
+			scored.append(None if indices is None else list(indices))
+			return score(query, indices, **kwargs)
+
+		monkeypatch.setattr(engine, "score", record_score)
+		engine.search("zzzzzz", roles=["py:exception"])
+		assert scored[-1] == [11, 12]
+
+
+def test_parallel_score(objects_inv: PathPlus):
+	queries = ["dict", "Path", "getclosematches", "zzzzzz", "decimal"]
+
+	with load_index(objects_inv) as index:
+		serial = SearchEngine(index, processes=1)
+
+		with SearchEngine(index, processes=3) as parallel:
+			parallel.parallel_score_threshold = 1
+
+			for query in map(process_name, queries):
+				assert parallel.score(query, thresh=0) == serial.score(query, thresh=0)
+				assert parallel.score(query, limit=3) == serial.score(query, limit=3)
+				assert parallel.score(query, iter([1, 3, 4, 5])) == serial.score(query, [1, 3, 4, 5])
+				assert parallel.search(query) == serial.search(query)
+
+			# Batches are searched in the worker processes.
+			parallel.parallel_threshold = 1
+			assert parallel.best_matches(queries) == serial.best_matches(queries)
+			assert parallel.best_matches_with_suggestions(queries) == serial.best_matches_with_suggestions(queries)
+
+			assert parallel._pool is not None
+
+		assert parallel._pool is None
+
+
+def test_serial_by_default(objects_inv: PathPlus):
+	# Worker processes are only used when asked for, as by find_urls.
+	with load_index(objects_inv) as index, SearchEngine(index) as engine:
+		assert engine.processes == 1
+
+		engine.parallel_score_threshold = 1
+		engine.parallel_threshold = 1
+		engine.score(process_name("dict"))
+		engine.best_matches(["dict", "Path"])
+		assert engine._pool is None
+
+
+@pytest.mark.parametrize("backend", ["python", "rapidfuzz"])
+def test_best_match(objects_inv: PathPlus, backend: str):
+	queries = ["Dict", "Path", "dic", "getclosematches", "collections", "zzzzzz", "clear", "sorting"]
+
+	with load_index(objects_inv) as index:
+		engine = SearchEngine(index, backend=backend)
+		results = []
+
+		for query in queries:
+			match, suggestions = engine.best_match(query)
+			results.append((match, suggestions))
+
+			# The same match as a search for the single best match.
+			expected = engine.search(query, limit=1)
+			assert match == (expected[0] if expected else None)
+
+			if match is None:
+				assert suggestions == engine.search(query, thresh=30, limit=5)
+			else:
+				assert suggestions == []
+
+		assert engine.best_match("collections")[1][0] == Match("list", 40, 6)
+		assert engine.best_match("zzzzzz") == (None, [])
+		assert engine.best_matches_with_suggestions(queries) == results
+
+
+@pytest.mark.parametrize("roles", [None, ["py:method", "py:attribute"]])
+def test_search_limit_exhaustive(tmp_pathplus: PathPlus, roles: Optional[List[str]]):
+	objects = synthetic_objects(2000)
+	names = [name for name, *_ in objects]
+
+	# Misspelt names, which share few trigrams with many similar names.
+	rng = random.Random(0)
+	queries = []
+	for name in rng.sample(names, 40):
+		chars = list(name)
+		for _ in range(3):
+			position = rng.randrange(len(chars))
+			chars[position] = rng.choice("abcdefghijklmnopqrstuvwxyz.")
+		queries.append(''.join(chars))
+
+	with load_index(make_objects_inv(tmp_pathplus / "objects.inv", objects)) as index:
+		engine = SearchEngine(index, candidates=50)
+		indices = None if roles is None else engine.role_indices(roles)
+
+		for query in queries:
+			expected = engine.score(process_name(query), indices, thresh=50, limit=10)
+			assert engine.search(query, limit=10, roles=roles) == expected
+
+
+def test_candidate_indices(objects_inv: PathPlus):
+	with load_index(objects_inv) as index:
+		candidates = SearchEngine(index, candidates=3).candidate_indices("decimal")
+		assert len(candidates) == 3
+		assert {8, 9} <= set(candidates)
+
+
+def test_processed_names_reused(objects_inv: PathPlus, monkeypatch):
+	with load_index(objects_inv) as index:
+		engine = SearchEngine(index)
+		first = engine.search("dict")
+
+		processed: List[str] = []
+
+		def record_process_name(name: str) -> str:
+			processed.append(name)
+			return process_name(name)
+
+		monkeypatch.setattr(searchdocs.search, "process_name", record_process_name)
+
+		assert engine.search("dict") == first
+		assert processed == ["dict"]
+
+
+def test_rank_names():
+	names = ["dict", "typing.Dict", "dict.clear", "list"]
+
+	assert rank_names("dict", names) == [
+			Match("dict", 100, 0),
+			Match("dict.clear", 57, 2),
+			Match("typing.Dict", 53, 1),
+			Match("list", 50, 3),
+			]
+	assert rank_names("dict", names, limit=2) == [Match("dict", 100, 0), Match("dict.clear", 57, 2)]
+	assert rank_names("dict", names, [1, 3], thresh=0) == [Match("typing.Dict", 53, 1), Match("list", 50, 3)]
+	assert rank_names("dict", names, thresh=101) == []
+
+	processed_names = [process_name(name) for name in names]
+	assert rank_names("dict", names, processed_names=processed_names) == rank_names("dict", names)
+
+	assert rank_names("dict", names, backend="rapidfuzz") == rank_names("dict", names)
+	assert rank_names("dict", names, [1, 3], thresh=0, backend="rapidfuzz") == [
+			Match("typing.Dict", 53, 1),
+			Match("list", 50, 3),
+			]
+
+
+def test_suggest_from_name(objects_inv: PathPlus):
+	inventory = Inventory(objects_inv)
+
+	assert inventory.suggest_from_name("dict") == ["dict", "dict.clear", "typing.Dict", "list"]
+	assert inventory.suggest_from_name("dict", backend="rapidfuzz") == ["dict", "dict.clear", "typing.Dict", "list"]
+	assert inventory.suggest_from_name("dict", limit=1, with_score=True) == [("dict", 100)]
+	assert inventory.suggest_from_name("dict", limit=1, with_index=True) == [("dict", 3)]
+	assert inventory.suggest_from_name("Dict", limit=2, with_index=True, with_score=True) == [
+			("dict", 100, 3),
+			("dict.clear", 57, 4),
+			]
@@ -0,0 +1,103 @@
+# stdlib
+from typing import Iterator
+
+# 3rd party
+import pytest
+from consolekit.testing import CliRunner, Result
+from domdf_python_tools.paths import PathPlus
+
+# this package
+from searchdocs import SearchResult, search_sites
+from searchdocs.__main__ import main
+from tests.conftest import DocsServer, make_objects_inv
+
+NUMPY_OBJECTS = [
+		("numpy", "py", "module", "reference/index.html#module-$"),
+		("numpy.ndarray", "py", "class", "reference/generated.html#$"),
+		("numpy.array", "py", "function", "reference/generated.html#$"),
+		("numpy.dtype", "py", "class", "reference/generated.html#$"),
+		]
+
+
+@pytest.fixture()
+def numpy_server(tmp_pathplus: PathPlus, docs_server: DocsServer) -> Iterator[DocsServer]:
+	(tmp_pathplus / "numpy").maybe_make()
+	objects_inv = make_objects_inv(tmp_pathplus / "numpy" / "objects.inv", NUMPY_OBJECTS)
+
+	with DocsServer(objects_inv) as server:
+		yield server
+
+
+def test_search_sites(docs_server: DocsServer, numpy_server: DocsServer):
+	results = search_sites([docs_server.url, numpy_server.url], "ndarray", limit=3, thresh=30)
+	assert results == [
+			SearchResult(
+					"numpy.ndarray",
+					"py:class",
+					70,
+					numpy_server.docs_url / "reference/generated.html#numpy.ndarray",
+					),
+			SearchResult(
+					"numpy.array",
+					"py:function",
+					67,
+					numpy_server.docs_url / "reference/generated.html#numpy.array",
+					),
+			SearchResult("dict.clear", "py:method", 35, docs_server.docs_url / "library/stdtypes.html#dict.clear"),
+			]
+
+
+def test_search_sites_ties(docs_server: DocsServer, numpy_server: DocsServer):
+	results = search_sites([numpy_server.url, docs_server.url], "dict", limit=2, thresh=0)
+	assert [result.name for result in results] == ["dict", "dict.clear"]
+
+	assert search_sites([docs_server.url, numpy_server.url], "zzzzzz") == []
+
+
+def test_search_sites_roles(docs_server: DocsServer, numpy_server: DocsServer):
+	results = search_sites([docs_server.url, numpy_server.url], "array", limit=3, thresh=0, roles=["py:function"])
+	assert [(result.name, result.role) for result in results] == [
+			("numpy.array", "py:function"),
+			("difflib.get_close_matches", "py:function"),
+			("sum", "py:function"),
+			]
+
+	assert search_sites([docs_server.url], "sorting", roles=["py"]) == []
+	assert search_sites([docs_server.url], "sorting", roles=["std:label"])[0].name == "sorting-howto"
+
+
+def test_cli_docs_url(docs_server: DocsServer, numpy_server: DocsServer):
+	runner = CliRunner()
+
+	result: Result = runner.invoke(main, args=["-u", docs_server.url, "-u", numpy_server.url, "ndarray"])
+	assert result.exit_code == 0
+	assert result.stdout.strip() == f"{numpy_server.docs_url}/reference/generated.html#numpy.ndarray"
+
+	result = runner.invoke(main, args=["--docs-url", docs_server.url, "Decimal"])
+	assert result.exit_code == 0
+	assert result.stdout.strip() == f"{docs_server.docs_url}/library/decimal.html#module-decimal"
+
+
+def test_cli_limit_scores_roles(docs_server: DocsServer):
+	runner = CliRunner()
+
+	result: Result = runner.invoke(main, args=["-u", docs_server.url, "--limit", '2', "dict"])
+	assert result.exit_code == 0
+	assert result.stdout.splitlines() == [
+			f"{docs_server.docs_url}/library/stdtypes.html#dict",
+			f"{docs_server.docs_url}/library/stdtypes.html#dict.clear",
+			]
+
+	result = runner.invoke(main, args=["-u", docs_server.url, "-n", '2', "--scores", "--role", "py:class", "dict"])
+	assert result.exit_code == 0
+	assert result.stdout.splitlines() == [
+			f"100\tdict\tpy:class\t{docs_server.docs_url}/library/stdtypes.html#dict",
+			f"50\tlist\tpy:class\t{docs_server.docs_url}/library/stdtypes.html#list",
+			]
+
+	with pytest.raises(ValueError, match="Object dict not found."):
+		runner.invoke(main, args=["-u", docs_server.url, "--role", "std:label", "dict"])
+
+	result = runner.invoke(main, args=["--batch", '-', "--limit", '2'], input="dict\n")
+	assert result.exit_code == 2
+	assert "'--limit', '--scores', '--role' and '--interactive' cannot be used with '--batch'." in result.stdout
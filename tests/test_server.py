@@ -0,0 +1,132 @@
+# stdlib
+import http.client
+import json
+import threading
+import time
+from typing import Callable, Iterator
+
+# 3rd party
+import pytest
+from consolekit.testing import CliRunner, Result
+
+# this package
+import searchdocs.__main__
+from searchdocs import ObjectNotFoundError
+from searchdocs.__main__ import main
+from searchdocs.server import SearchServer, _server_address, find_url_from_server, server_file
+from tests.conftest import DocsServer
+
+
+def wait_for(condition: Callable[[], bool], timeout: float = 10) -> None:
+	deadline = time.monotonic() + timeout
+
+	while not condition():
+		if time.monotonic() > deadline:
+			pytest.fail("Timed out waiting for the search server.")
+		time.sleep(0.01)
+
+
+@pytest.fixture()
+def search_server(docs_server: DocsServer) -> Iterator[SearchServer]:
+	with SearchServer() as server:
+		thread = threading.Thread(target=server.serve, daemon=True)
+		thread.start()
+
+		wait_for(server_file().is_file)
+
+		yield server
+
+		server.shutdown()
+		thread.join()
+
+
+def test_find_url_from_server(docs_server: DocsServer, search_server: SearchServer):
+	url = find_url_from_server(docs_server.url, "pathlib.Path")
+	assert url == docs_server.docs_url / "library/pathlib.html#pathlib.Path"
+	assert find_url_from_server(docs_server.url, "pathlib.Path") == url
+	assert find_url_from_server(docs_server.url, "dic", max_age=None) == docs_server.docs_url / "library/stdtypes.html#dict"
+
+	with pytest.raises(ObjectNotFoundError, match="Object zzzzzz not found."):
+		find_url_from_server(docs_server.url, "zzzzzz")
+
+	with pytest.raises(ObjectNotFoundError, match="Object collections not found. Did you mean list, ") as e:
+		find_url_from_server(docs_server.url, "collections")
+	assert e.value.suggestions == ["list", "decimal.Decimal", "decimal", "sorting-howto"]
+
+	# The inventory was only downloaded once.
+	assert docs_server.requests.count(("GET", "/3/objects.inv")) == 1
+
+
+def test_server_bad_request(docs_server: DocsServer, search_server: SearchServer):
+	address = _server_address()
+	assert address is not None
+
+	for query in ["search_term=dict", f"docs_url={docs_server.url}&search_term=dict&max_age=abc"]:
+		connection = http.client.HTTPConnection(*address, timeout=5)
+		try:
+			connection.request("GET", f"/find_url?{query}")
+			response = connection.getresponse()
+			assert response.status == 400
+			assert "error" in json.loads(response.read())
+		finally:
+			connection.close()
+
+	# The server keeps answering requests.
+	assert find_url_from_server(docs_server.url, "dict") == docs_server.docs_url / "library/stdtypes.html#dict"
+
+
+def test_server_error(docs_server: DocsServer, search_server: SearchServer, monkeypatch):
+
+	def fail(*args, **kwargs):
+		raise ValueError("Invalid inventory")
+
+	monkeypatch.setattr(search_server, "find_url", fail)
+
+	address = _server_address()
+	assert address is not None
+
+	connection = http.client.HTTPConnection(*address, timeout=5)
+	try:
+		connection.request("GET", f"/find_url?docs_url={docs_server.url}&search_term=dict")
+		response = connection.getresponse()
+		assert response.status == 500
+		assert json.loads(response.read()) == {"error": "ValueError: Invalid inventory"}
+	finally:
+		connection.close()
+
+	# The failure is not reported as a missing object, so the caller searches by itself.
+	assert find_url_from_server(docs_server.url, "dict") is None
+
+
+def test_server_stopped(docs_server: DocsServer, search_server: SearchServer):
+	assert server_file().is_file()
+	search_server.shutdown()
+
+	wait_for(lambda: not server_file().is_file())
+
+	assert find_url_from_server(docs_server.url, "pathlib.Path") is None
+
+
+def test_server_stale_file(docs_server: DocsServer):
+	assert find_url_from_server(docs_server.url, "pathlib.Path") is None
+
+	server_file().dump_json({"host": "127.0.0.1", "port": 1, "pid": 0})
+	assert find_url_from_server(docs_server.url, "pathlib.Path") is None
+
+
+def test_cli_uses_server(docs_server: DocsServer, search_server: SearchServer, monkeypatch):
+	monkeypatch.setattr(searchdocs.__main__, "DOCS_PYTHON_ORG", docs_server.url)
+
+	def fail(*args, **kwargs):
+		raise AssertionError("Searched outside the server")
+
+	monkeypatch.setattr(searchdocs, "find_url", fail)
+
+	runner = CliRunner()
+	result: Result = runner.invoke(main, args=["decimal.Decimal"])
+	assert result.exit_code == 0
+	assert result.stdout.strip() == f"{docs_server.docs_url}/library/decimal.html#decimal.Decimal"
+
+	result = runner.invoke(main, args=["Decimal"])
+	assert result.exit_code == 0
+	assert result.stdout.strip() == f"{docs_server.docs_url}/library/decimal.html#module-decimal"
@@ -0,0 +1,89 @@
+# stdlib
+import json
+import re
+import subprocess
+import sys
+from typing import List
+
+# 3rd party
+from coincidence.selectors import not_pypy
+from domdf_python_tools.paths import PathPlus
+
+# this package
+from searchdocs import find_url
+from tests.conftest import DocsServer
+
+# The maximum time, in seconds, which importing the command line interface may take.
+STARTUP_BUDGET = 0.25
+
+# Modules which are slow to import, and are not needed for a cached search.
+HEAVY_MODULES = ["consolekit", "fuzzywuzzy", "requests", "sphobjinv"]
+
+_CACHED_SEARCH = """
+import json, sys
+import searchdocs
+from domdf_python_tools.paths import PathPlus
+searchdocs.cache_dir = PathPlus(sys.argv[1])
+from searchdocs.__main__ import main
+main(sys.argv[2:], standalone_mode=False)
+print(json.dumps(sorted(sys.modules)))
+"""
+
+
+def run_python(*args: str) -> List[str]:
+	process = subprocess.run([sys.executable, *args], capture_output=True, check=True, text=True)
+	return process.stdout.splitlines()
+
+
+def test_import_is_lightweight():
+	stdout = run_python(
+			"-c",
+			"import json, sys, searchdocs.__main__; "
+			"print(json.dumps(sorted(sys.modules))); "
+			"print('cache_dir' in vars(searchdocs))",
+			)
+
+	modules = json.loads(stdout[0])
+	for module in [*HEAVY_MODULES, "appdirs"]:
+		assert module not in modules
+
+	# The cache directory is not determined, or created, on import.
+	assert stdout[1] == "False"
+
+
+def test_docs_python_org():
+	stdout = run_python(
+			"-c",
+			"import searchdocs.__main__; "
+			"print(type(searchdocs.__main__.DOCS_PYTHON_ORG).__name__, searchdocs.__main__.DOCS_PYTHON_ORG)",
+			)
+
+	assert stdout == ["RequestsURL https://docs.python.org/3"]
+
+
+def test_cached_search_is_lightweight(docs_server: DocsServer, tmp_cache_dir: PathPlus):
+	url = find_url(docs_server.url, "pathlib.Path")
+
+	stdout = run_python("-c", _CACHED_SEARCH, str(tmp_cache_dir), "--offline", "-u", docs_server.url, "pathlib.Path")
+	assert stdout[0] == str(url)
+
+	modules = json.loads(stdout[1])
+	for module in HEAVY_MODULES:
+		assert module not in modules
+
+
+@not_pypy("-X importtime is only supported on CPython.")
+def test_startup_budget():
+	times = []
+
+	for _ in range(3):
+		process = subprocess.run(
+				[sys.executable, "-X", "importtime", "-c", "import searchdocs.__main__"],
+				capture_output=True,
+				check=True,
+				text=True,
+				)
+		cumulative = re.findall(r"import time:\s+\d+ \|\s+(\d+) \| searchdocs.__main__", process.stderr)
+		times.append(int(cumulative[0]) / 1e6)
+
+	assert min(times) < STARTUP_BUDGET
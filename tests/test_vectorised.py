@@ -0,0 +1,45 @@
+# stdlib
+import random
+
+# 3rd party
+from fuzzywuzzy.fuzz import ratio  # type: ignore[import-untyped]
+
+# this package
+from searchdocs.index import process_name
+from searchdocs.search import rank_names
+from searchdocs.vectorised import best_matches, rank, score_matrix
+from tests.conftest import OBJECTS
+
+NAMES = [process_name(name) for name, *_ in OBJECTS]
+
+
+def test_score_matrix():
+	random.seed(1)
+	strings = ["", *("".join(random.choices("abcdé .", k=random.randint(0, 20))) for _ in range(200))]
+
+	scores = score_matrix(strings, strings)
+	assert scores.shape == (len(strings), len(strings))
+	assert scores.tolist() == [[ratio(query, name) for name in strings] for query in strings]
+
+
+def test_rank():
+	for query in ["dict", "path", "decimal", "getclosematches", "zzzzzz"]:
+		expected = [(match.score, match.idx) for match in rank_names(query, NAMES)]
+		assert rank(query, NAMES) == expected
+
+	assert rank("dict", NAMES, limit=2) == [(100, 3), (57, 4)]
+	assert rank("dict", NAMES, [6, 5], thresh=0) == [(53, 5), (50, 6)]
+	assert rank("dict", {5: NAMES[5], 6: NAMES[6]}, [6, 5], thresh=0) == [(53, 5), (50, 6)]
+	assert rank("dict", NAMES, []) == []
+
+
+def test_best_matches(monkeypatch):
+	queries = ["dict", "pathlib", "path", "zzzzzz", "decimal"]
+	expected = [(100, 3), (100, 0), (73, 0), None, (100, 8)]
+
+	assert best_matches(queries, NAMES) == expected
+	assert best_matches(queries, []) == [None] * len(queries)
+
+	# Scored in several blocks.
+	monkeypatch.setattr("searchdocs.vectorised._MAX_CELLS", len(NAMES) * 2)
+	assert best_matches(queries, NAMES) == expected
@@ -0,0 +1,112 @@
+# stdlib
+import io
+import tarfile
+
+# 3rd party
+import pytest
+import requests
+from consolekit.testing import CliRunner, Result
+from domdf_python_tools.paths import PathPlus
+
+# this package
+import searchdocs.__main__
+from searchdocs import cache_dir_for_url, find_url
+from searchdocs.__main__ import cache
+from searchdocs.cache import WarmedSite, export_cache, import_cache, warm
+from searchdocs.index import index_filename
+from searchdocs.results import close_all_result_caches, get_result_cache
+from tests.conftest import DocsServer, cached_objects_inv
+
+
+def no_network(*args, **kwargs):
+	raise AssertionError("Unexpected network access")
+
+
+def test_warm(docs_server: DocsServer):
+	sites = warm([docs_server.url], ["pathlib.Path", "Decimal", "zzzzzz"])
+	assert sites == [WarmedSite(docs_server.docs_url, 15, 2)]
+
+	docs_cache_dir = cache_dir_for_url(docs_server.docs_url)
+	objects_inv = cached_objects_inv(docs_server.docs_url)
+	assert index_filename(objects_inv).is_file()
+
+	result_cache = get_result_cache(docs_cache_dir, objects_inv)
+	assert result_cache.get("Decimal") == str(docs_server.docs_url / "library/decimal.html#module-decimal")
+	assert result_cache.get("zzzzzz") is None
+
+	assert docs_server.requests == [("HEAD", '/'), ("HEAD", "/3/"), ("GET", "/3/objects.inv")]
+
+
+def test_warm_serial(docs_server: DocsServer, monkeypatch):
+	processes = []
+	find_urls = searchdocs.find_urls
+
+	def record_find_urls(*args, **kwargs):
+		processes.append(kwargs.get("processes"))
+		return find_urls(*args, **kwargs)
+
+	monkeypatch.setattr(searchdocs, "find_urls", record_find_urls)
+
+	# Worker processes must not be forked from the threads which warm each site.
+	assert warm([docs_server.url], ["Decimal"]) == [WarmedSite(docs_server.docs_url, 15, 1)]
+	assert processes == [1]
+
+
+def test_export_import(docs_server: DocsServer, tmp_pathplus: PathPlus, monkeypatch):
+	warm([docs_server.url], ["pathlib.Path"])
+	(searchdocs._cache_dir() / "server.json").write_text("{}")
+	archive = export_cache(tmp_pathplus / "cache.tar.gz")
+
+	with tarfile.open(archive) as tar:
+		names = tar.getnames()
+	assert "redirects.json" in names
+	assert "server.json" not in names
+	assert f"{cache_dir_for_url(docs_server.docs_url).name}/{cached_objects_inv(docs_server.docs_url).name}" in names
+
+	# Import into an empty cache on a machine without network access.
+	close_all_result_caches()
+	cache_dir_for_url.cache_clear()
+	monkeypatch.setattr(searchdocs, "cache_dir", tmp_pathplus / "other_cache")
+	monkeypatch.setattr(requests.Session, "request", no_network)
+
+	assert import_cache(archive) == [docs_server.docs_url]
+	assert find_url(docs_server.url, "pathlib.Path") == docs_server.docs_url / "library/pathlib.html#pathlib.Path"
+	assert find_url(docs_server.url, "dict") == docs_server.docs_url / "library/stdtypes.html#dict"
+
+	# Importing again replaces the site's cache.
+	assert import_cache(archive) == [docs_server.docs_url]
+	assert find_url(docs_server.url, "dict") == docs_server.docs_url / "library/stdtypes.html#dict"
+
+
+@pytest.mark.parametrize("name", ["../escape", "/etc/passwd", "not-a-site/file", "server.json"])
+def test_import_cache_unsafe(tmp_cache_dir: PathPlus, tmp_pathplus: PathPlus, name: str):
+	archive = tmp_pathplus / "bad.tar.gz"
+
+	with tarfile.open(archive, "w:gz") as tar:
+		info = tarfile.TarInfo(name)
+		info.size = 4
+		tar.addfile(info, io.BytesIO(b"data"))
+
+	with pytest.raises(ValueError, match="Unexpected entry .* in cache archive."):
+		import_cache(archive)
+
+	assert not list(tmp_cache_dir.iterdir())
+
+
+def test_cli_warm(docs_server: DocsServer, tmp_pathplus: PathPlus, monkeypatch):
+	monkeypatch.setattr(searchdocs.__main__, "DOCS_PYTHON_ORG", docs_server.url)
+	(tmp_pathplus / "terms.txt").write_lines(["pathlib.Path", '', "zzzzzz"])
+
+	runner = CliRunner(mix_stderr=False)
+	result: Result = runner.invoke(
+			cache,
+			args=["warm", "--terms", str(tmp_pathplus / "terms.txt"), "--export", str(tmp_pathplus / "cache.tar.gz")],
+			)
+	assert result.exit_code == 0
+	assert result.stdout == f"{docs_server.docs_url}\t15 objects\t1 results\n"
+	assert result.stderr == f"Exported to {tmp_pathplus / 'cache.tar.gz'}\n"
+
+	result = runner.invoke(cache, args=["warm", "--import", str(tmp_pathplus / "cache.tar.gz")])
+	assert result.exit_code == 0
+	assert result.stdout == ''
+	assert result.stderr == f"Imported {docs_server.docs_url}\n"